@@ -0,0 +1,94 @@
+import os
+import json
+
+import pygame
+
+from config import FONT_NAME, FONT_CACHE_PATH, TEXT_COLOR
+
+
+def _read_font_cache(path: str) -> dict[str, str]:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            entries = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
+
+
+def resolve_font_path(
+    name: str = FONT_NAME, cache_path: str = FONT_CACHE_PATH
+) -> str | None:
+    # pygame.font.match_font scans every installed font on first use,
+    # which dominates a cold start. Its answer is kept in cache_path and
+    # trusted while that file still exists; "" records that nothing
+    # matched and pygame's default font is used, as SysFont would.
+    entries = _read_font_cache(cache_path) if cache_path else {}
+    path = entries.get(name)
+    if isinstance(path, str) and (not path or os.path.isfile(path)):
+        return path or None
+    path = pygame.font.match_font(name)
+    if cache_path:
+        entries[name] = path or ""
+        try:
+            with open(cache_path, "w", encoding="utf-8") as fh:
+                json.dump(entries, fh, indent=2, sort_keys=True)
+        except OSError:
+            # A read-only install just pays for the scan every launch
+            pass
+    return path
+
+
+class FontCache:
+    # One Font per size, created on first use from a font file resolved
+    # once; pygame.font must be initialised before the first get()
+    def __init__(
+        self, name: str = FONT_NAME, cache_path: str = FONT_CACHE_PATH
+    ) -> None:
+        self.name = name
+        self.cache_path = cache_path
+        self._path: str | None = None
+        self._resolved = False
+        self._fonts: dict[int, pygame.font.Font] = {}
+
+    @property
+    def path(self) -> str | None:
+        if not self._resolved:
+            self._path = resolve_font_path(self.name, self.cache_path)
+            self._resolved = True
+        return self._path
+
+    def get(self, size: int) -> pygame.font.Font:
+        size = int(size)
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = pygame.font.Font(self.path, size)
+        return font
+
+    def clear(self) -> None:
+        # Fonts die with pygame.font.quit(); call this alongside it
+        self._fonts.clear()
+
+
+FONTS = FontCache()
+
+_static_text: dict[
+    tuple[pygame.font.Font, str, tuple[int, int, int]], pygame.Surface
+] = {}
+
+
+def get_font(size: int) -> pygame.font.Font:
+    return FONTS.get(size)
+
+
+def static_text(
+    font: pygame.font.Font,
+    text: str,
+    color: tuple[int, int, int] = TEXT_COLOR,
+) -> pygame.Surface:
+    # Text that never changes, e.g. menu lines, rendered once per run;
+    # unlike hud.TextCache nothing is ever evicted
+    key = (font, text, color)
+    surface = _static_text.get(key)
+    if surface is None:
+        surface = _static_text[key] = font.render(text, True, color)
+    return surface
@@ -0,0 +1,371 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+from typing import Callable, NamedTuple
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from config import *
+from item import Item
+from profiler import PhaseTimer
+from simulation import (
+    FixedStepDriver,
+    FrameInput,
+    Simulation,
+    generate_monster,
+)
+from spawner import Wave
+from hud import Hud
+from assets import get_font
+from sprites import SpriteCache, scene_backdrop
+from main import render_scene
+from camera import Camera
+from snapshot import restore_snapshot_file
+from pipeline import PipelinedDriver
+
+
+class Scenario(NamedTuple):
+    name: str
+    frames: int
+    setup: Callable[[Simulation], None]
+    per_frame: Callable[[Simulation], None] | None = None
+
+
+def populate_horde(sim: Simulation, count: int) -> None:
+    for _ in range(count):
+        sim.monsters.append(generate_monster(sim.player, sim.rng))
+
+
+def scatter_items(sim: Simulation, count: int) -> None:
+    # Loaded directly so the cap and merging do not thin the flood
+    sim.items.load(
+        Item(
+            sim.rng.uniform(16.0, float(WORLD_WIDTH - 16)),
+            sim.rng.uniform(16.0, float(WORLD_HEIGHT - 16)),
+        )
+        for _ in range(count)
+    )
+
+
+def schedule_wave(sim: Simulation, count: int) -> None:
+    # One scripted wave half a second in, past the default warmup
+    sim.waves = [Wave(sim.time + 0.5, count)]
+    sim.next_wave = 0
+
+
+def force_volley(sim: Simulation) -> None:
+    # Fire a volley every frame regardless of the cooldown
+    sim.next_volley_time = min(sim.next_volley_time, sim.time)
+
+
+SCENARIOS = {
+    s.name: s
+    for s in (
+        Scenario("horde_50", 600, lambda sim: populate_horde(sim, 50)),
+        Scenario("horde_500", 300, lambda sim: populate_horde(sim, 500)),
+        Scenario(
+            "horde_5000", 60, lambda sim: populate_horde(sim, 5000)
+        ),
+        Scenario(
+            "volley_spam",
+            600,
+            lambda sim: populate_horde(sim, 100),
+            force_volley,
+        ),
+        Scenario("item_flood", 600, lambda sim: scatter_items(sim, 5000)),
+        Scenario("wave_1000", 120, lambda sim: schedule_wave(sim, 1000)),
+    )
+}
+
+
+def scripted_input(frame: int) -> FrameInput:
+    # Slow circle around the centre while sweeping aim
+    angle = frame * 0.02
+    aim = frame * 0.05
+    return FrameInput(
+        math.cos(angle),
+        math.sin(angle),
+        WORLD_WIDTH / 2 + math.cos(aim) * 400.0,
+        WORLD_HEIGHT / 2 + math.sin(aim) * 400.0,
+    )
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pct(p: float) -> float:
+        # nearest-rank percentile
+        rank = max(1, math.ceil(p / 100.0 * n))
+        return ordered[rank - 1] * 1000.0
+
+    return {
+        "mean_ms": sum(ordered) / n * 1000.0,
+        "p50_ms": pct(50.0),
+        "p99_ms": pct(99.0),
+        "max_ms": ordered[-1] * 1000.0,
+    }
+
+
+def run_scenario(
+    scenario: Scenario,
+    frames: int,
+    warmup: int,
+    seed: int,
+    monster_backend: str,
+    bullet_backend: str,
+    screen: pygame.Surface | None,
+    font: pygame.font.Font | None,
+    pipelined: bool = False,
+) -> dict:
+    sim = Simulation(seed, monster_backend, bullet_backend)
+    scenario.setup(sim)
+    timer = PhaseTimer()
+    sim.profiler = timer
+    pipeline = None
+    view = sim
+    if pipelined:
+        # Ticking at the frame rate keeps it to one step per frame
+        pipeline = PipelinedDriver(FixedStepDriver(sim, FPS), timer)
+    if font is not None:
+        hud = Hud(font)
+        sprites = SpriteCache()
+        camera = Camera(*screen.get_size())
+        backdrop = scene_backdrop(
+            sim.tile_map, camera, screen.get_size()
+        )
+
+    frame_times: list[float] = []
+    peaks = {"monsters": 0, "bullets": 0, "items": 0}
+    dt = 1.0 / float(FPS)
+    for frame in range(warmup + frames):
+        if frame == warmup:
+            timer.clear()
+            frame_times.clear()
+        if pipeline is not None:
+            # Draw the last frame while the worker simulates this one
+            start = time.perf_counter()
+            timer.start()
+            view = pipeline.wait()
+            timer.mark("sim_wait")
+            if scenario.per_frame is not None:
+                scenario.per_frame(sim)
+            pipeline.submit(dt, scripted_input(frame))
+        else:
+            if scenario.per_frame is not None:
+                scenario.per_frame(sim)
+            start = time.perf_counter()
+            sim.step(dt, scripted_input(frame))
+        if screen is not None:
+            camera.follow(view.player.x, view.player.y)
+            hud.update(view.player, view.time)
+            timer.mark("hud")
+            render_scene(
+                screen,
+                hud,
+                sprites,
+                view.player,
+                view.time,
+                view.monsters,
+                view.bullets,
+                view.items,
+                1.0,
+                backdrop,
+                camera,
+            )
+            timer.mark("render_scene")
+            pygame.display.flip()
+            timer.mark("flip")
+        frame_times.append(time.perf_counter() - start)
+        peaks["monsters"] = max(peaks["monsters"], len(view.monsters))
+        peaks["bullets"] = max(peaks["bullets"], len(view.bullets))
+        peaks["items"] = max(peaks["items"], len(view.items))
+    if pipeline is not None:
+        pipeline.close()
+
+    return {
+        "frames": frames,
+        "frame": summarize(frame_times),
+        "phases": {
+            phase: summarize(samples)
+            for phase, samples in timer.samples.items()
+        },
+        "peak_entities": peaks,
+    }
+
+
+def compare(
+    results: dict,
+    baseline: dict,
+    threshold: float,
+    min_delta_ms: float,
+) -> list[str]:
+    regressions: list[str] = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        pairs = [("frame", current["frame"], base.get("frame"))]
+        for phase, stats in current["phases"].items():
+            pairs.append(
+                (phase, stats, base.get("phases", {}).get(phase))
+            )
+        for phase, stats, base_stats in pairs:
+            if base_stats is None:
+                continue
+            for key in ("mean_ms", "p50_ms"):
+                now = stats[key]
+                then = base_stats[key]
+                if (
+                    now > then * (1.0 + threshold)
+                    and now - then > min_delta_ms
+                ):
+                    regressions.append(
+                        f"{name}/{phase} {key}: "
+                        f"{then:.3f} -> {now:.3f} ms "
+                        f"(+{(now / then - 1.0) * 100.0:.0f}%)"
+                    )
+    return regressions
+
+
+def print_report(results: dict) -> None:
+    for name, data in results["scenarios"].items():
+        peaks = data["peak_entities"]
+        print(
+            f"\n{name}  ({data['frames']} frames, peak "
+            f"{peaks['monsters']} monsters / {peaks['bullets']} bullets"
+            f" / {peaks['items']} items)"
+        )
+        print(f"  {'phase':<30}{'mean':>10}{'p50':>10}{'p99':>10}")
+        rows = list(data["phases"].items()) + [("frame", data["frame"])]
+        for phase, stats in rows:
+            print(
+                f"  {phase:<30}"
+                f"{stats['mean_ms']:>10.3f}"
+                f"{stats['p50_ms']:>10.3f}"
+                f"{stats['p99_ms']:>10.3f}"
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Run scripted per-phase frame benchmarks."
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="scenario to run (repeatable, default: all)",
+    )
+    parser.add_argument(
+        "--snapshot", default=None,
+        help="run a scenario starting from this saved state",
+    )
+    parser.add_argument("--frames", type=int, default=None)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument(
+        "--monster-backend", choices=("list", "numpy"),
+        default=MONSTER_BACKEND,
+    )
+    parser.add_argument(
+        "--bullet-backend", choices=("list", "pool"),
+        default=BULLET_BACKEND,
+    )
+    parser.add_argument(
+        "--no-render", action="store_true",
+        help="time the simulation only",
+    )
+    parser.add_argument(
+        "--pipelined", action="store_true",
+        help="simulate on a worker thread while rendering the last frame",
+    )
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument(
+        "--threshold", type=float, default=0.15,
+        help="relative slowdown that counts as a regression",
+    )
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=0.05,
+        help="ignore slowdowns smaller than this",
+    )
+    args = parser.parse_args()
+    if args.pipelined and args.no_render:
+        parser.error("--pipelined needs rendering")
+
+    screen = None
+    font = None
+    if not args.no_render:
+        pygame.init()
+        screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        font = get_font(28)
+
+    names = args.scenario or list(SCENARIOS)
+    if args.snapshot:
+        path = args.snapshot
+        SCENARIOS["snapshot"] = Scenario(
+            "snapshot", 600, lambda sim: restore_snapshot_file(sim, path)
+        )
+        names = (args.scenario or []) + ["snapshot"]
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "snapshot": args.snapshot,
+            "warmup": args.warmup,
+            "monster_backend": args.monster_backend,
+            "bullet_backend": args.bullet_backend,
+            "render": not args.no_render,
+            "pipelined": args.pipelined,
+        },
+        "scenarios": {},
+    }
+    for name in names:
+        scenario = SCENARIOS[name]
+        results["scenarios"][name] = run_scenario(
+            scenario,
+            args.frames or scenario.frames,
+            args.warmup,
+            args.seed,
+            args.monster_backend,
+            args.bullet_backend,
+            screen,
+            font,
+            args.pipelined,
+        )
+
+    if screen is not None:
+        pygame.quit()
+
+    print_report(results)
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"\nwrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(
+            results, baseline, args.threshold, args.min_delta_ms
+        )
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) vs {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nno regressions vs {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,815 @@
+import os
+import sys
+import time
+import zlib
+import select
+import socket
+import struct
+import stat
+import argparse
+import threading
+from typing import NamedTuple
+
+import numpy as np
+
+from config import *
+from monster_store import MonsterStore
+from bullet_pool import BulletPool
+from item_store import FrozenItems, ItemState
+from render_state import RenderState
+
+STREAM_MAGIC = b"SNMV"
+STREAM_VERSION = 1
+
+# Every message: kind, payload length; keyframe and delta payloads are
+# zlib-compressed
+MESSAGE = struct.Struct("<BI")
+MSG_HELLO = 1
+MSG_KEYFRAME = 2
+MSG_DELTA = 3
+MSG_ACK = 4
+# magic, version, world width and height, position step, publish rate
+HELLO = struct.Struct("<4sHdddd")
+# keyframe id (for a delta, the keyframe it is against), items
+# version, frame, time
+FRAME = struct.Struct("<IIqd")
+# x, y, hp, face_dx, face_dy, xp, xp_to_next, level
+PLAYER = struct.Struct("<7dq")
+# monsters (for a delta, the added ones), palette entries, bullets,
+# items
+COUNTS = struct.Struct("<IIII")
+# Keyframe id a viewer has decoded
+ACK = struct.Struct("<I")
+# Items count of a delta whose items are its keyframe's
+ITEMS_UNCHANGED = 0xFFFFFFFF
+
+# Positions and radii go out in whole position steps
+MONSTER_WIRE = (
+    ("uid", "<u4"),
+    ("qx", "<u2"),
+    ("qy", "<u2"),
+    ("radius", "<u2"),
+    ("color_index", "u1"),
+)
+BULLET_WIRE = (
+    ("qx", "<u2"),
+    ("qy", "<u2"),
+)
+ITEM_WIRE = (
+    ("qx", "<u2"),
+    ("qy", "<u2"),
+    ("heal", "<f4"),
+)
+
+# A viewer that cannot take a frame within this long is dropped
+SEND_TIMEOUT_SECONDS = 0.5
+# How often the encoder thread looks for viewers and acks when idle
+POLL_SECONDS = 0.1
+
+
+class StreamFrame(NamedTuple):
+    # What one published frame shows, copied on the game thread
+    frame: int
+    time: float
+    player: tuple
+    uid: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    radius: np.ndarray
+    color_index: np.ndarray
+    palette: list[tuple[int, int, int]]
+    bullet_x: np.ndarray
+    bullet_y: np.ndarray
+    items: FrozenItems
+
+
+class Keyframe(NamedTuple):
+    id: int
+    # Frames the broadcaster had encoded when it was made
+    sequence: int
+    items_version: int
+    # Monster rows in uid order, as sent
+    uid: np.ndarray
+    qx: np.ndarray
+    qy: np.ndarray
+    radius: np.ndarray
+    color_index: np.ndarray
+    # Decoded items, kept by viewers only
+    items: FrozenItems | None = None
+
+
+def position_step(
+    world_width: float = WORLD_WIDTH,
+    world_height: float = WORLD_HEIGHT,
+    step: float = BROADCAST_POSITION_STEP,
+) -> float:
+    # Coarser than asked when the world would not fit 16 bits
+    return max(float(step), max(world_width, world_height) / 65535.0)
+
+
+def _quantize(values: np.ndarray, step: float) -> np.ndarray:
+    return np.clip(np.rint(values / step), 0, 65535).astype(np.uint16)
+
+
+def capture_frame(sim) -> StreamFrame:
+    player = sim.player
+    monsters = sim.monsters
+    if isinstance(monsters, MonsterStore):
+        uid = monsters.uid.copy()
+        x = monsters.x.copy()
+        y = monsters.y.copy()
+        radius = monsters.radius.copy()
+        color_index = monsters.color_index.copy()
+        palette = list(monsters.palette)
+    else:
+        n = len(monsters)
+        uid = np.fromiter((m.uid for m in monsters), np.int64, n)
+        x = np.fromiter((m.x for m in monsters), np.float64, n)
+        y = np.fromiter((m.y for m in monsters), np.float64, n)
+        radius = np.fromiter((m.radius for m in monsters), np.float64, n)
+        ids: dict[tuple[int, int, int], int] = {}
+        palette = []
+        cids = []
+        for m in monsters:
+            cid = ids.get(m.color)
+            if cid is None:
+                cid = ids[m.color] = len(palette)
+                palette.append(m.color)
+            cids.append(cid)
+        color_index = np.array(cids, dtype=np.int16)
+    bullets = sim.bullets
+    if isinstance(bullets, BulletPool):
+        bullet_x = bullets.x.copy()
+        bullet_y = bullets.y.copy()
+    else:
+        n = len(bullets)
+        bullet_x = np.fromiter((b.x for b in bullets), np.float64, n)
+        bullet_y = np.fromiter((b.y for b in bullets), np.float64, n)
+    return StreamFrame(
+        sim.frame,
+        sim.time,
+        (
+            player.x,
+            player.y,
+            player.hp,
+            player.face_dx,
+            player.face_dy,
+            player.xp,
+            player.xp_to_next,
+            player.level,
+        ),
+        uid,
+        x,
+        y,
+        radius,
+        color_index,
+        palette,
+        bullet_x,
+        bullet_y,
+        sim.items.frozen(),
+    )
+
+
+def _wire_monsters(frame: StreamFrame, step: float) -> dict[str, np.ndarray]:
+    # Quantized monster rows in uid order, so deltas can match rows
+    # with a binary search
+    uid = frame.uid.astype(np.uint32)
+    order = np.argsort(uid, kind="stable")
+    return {
+        "uid": uid[order],
+        "qx": _quantize(frame.x[order], step),
+        "qy": _quantize(frame.y[order], step),
+        "radius": _quantize(frame.radius[order], step),
+        "color_index": frame.color_index[order].astype(np.uint8),
+    }
+
+
+def _message(kind: int, payload: bytes) -> bytes:
+    return MESSAGE.pack(kind, len(payload)) + payload
+
+
+def _split_messages(buffer: bytearray) -> list[tuple[int, bytes]]:
+    # Complete messages at the front of buffer, which loses them
+    messages = []
+    pos = 0
+    while len(buffer) - pos >= MESSAGE.size:
+        kind, length = MESSAGE.unpack_from(buffer, pos)
+        end = pos + MESSAGE.size + length
+        if end > len(buffer):
+            break
+        messages.append((kind, bytes(buffer[pos + MESSAGE.size:end])))
+        pos = end
+    del buffer[:pos]
+    return messages
+
+
+def _columns_bytes(columns: dict[str, np.ndarray], layout) -> list[bytes]:
+    return [columns[name].astype(dtype).tobytes() for name, dtype in layout]
+
+
+def _frame_parts(
+    frame: StreamFrame, key_id: int, counts: tuple[int, int]
+) -> list[bytes]:
+    # Header, player, counts and palette; counts is (monsters, items)
+    palette = np.array(frame.palette, dtype=np.uint8).reshape(-1, 3)
+    return [
+        FRAME.pack(
+            key_id,
+            frame.items.version & 0xFFFFFFFF,
+            frame.frame,
+            frame.time,
+        ),
+        PLAYER.pack(*frame.player),
+        COUNTS.pack(
+            counts[0], len(palette), len(frame.bullet_x), counts[1]
+        ),
+        palette.tobytes(),
+    ]
+
+
+def _point_parts(frame: StreamFrame, step: float, items: bool) -> list[bytes]:
+    parts = [
+        _quantize(frame.bullet_x, step).tobytes(),
+        _quantize(frame.bullet_y, step).tobytes(),
+    ]
+    if items:
+        states = list(frame.items)
+        parts += _columns_bytes(
+            {
+                "qx": _quantize(
+                    np.array([it.x for it in states], np.float64), step
+                ),
+                "qy": _quantize(
+                    np.array([it.y for it in states], np.float64), step
+                ),
+                "heal": np.array([it.heal for it in states], np.float64),
+            },
+            ITEM_WIRE,
+        )
+    return parts
+
+
+def encode_keyframe(
+    key_id: int,
+    frame: StreamFrame,
+    monsters: dict[str, np.ndarray],
+    step: float,
+) -> bytes:
+    parts = _frame_parts(
+        frame, key_id, (len(monsters["uid"]), len(frame.items))
+    )
+    parts += _columns_bytes(monsters, MONSTER_WIRE)
+    parts += _point_parts(frame, step, True)
+    return _message(MSG_KEYFRAME, zlib.compress(b"".join(parts), 1))
+
+
+def encode_delta(
+    base: Keyframe,
+    frame: StreamFrame,
+    monsters: dict[str, np.ndarray],
+    step: float,
+) -> tuple[bytes, int]:
+    # Monsters still in base send a 16-bit move from their keyframe
+    # position, found through a presence bit per keyframe row; the rest
+    # go out whole. Returns the message and how many went out whole.
+    uid = monsters["uid"]
+    n_base = len(base.uid)
+    found = np.zeros(len(uid), dtype=bool)
+    dx = dy = np.zeros(0, dtype=np.int32)
+    kept = np.zeros(n_base, dtype=bool)
+    if n_base and len(uid):
+        rows = np.minimum(np.searchsorted(base.uid, uid), n_base - 1)
+        found = base.uid[rows] == uid
+        dx = monsters["qx"].astype(np.int32) - base.qx[rows]
+        dy = monsters["qy"].astype(np.int32) - base.qy[rows]
+        found &= (np.abs(dx) <= 32767) & (np.abs(dy) <= 32767)
+        # Both sides are in uid order, so moves come in keyframe order
+        kept[rows[found]] = True
+        dx = dx[found]
+        dy = dy[found]
+    added = {name: values[~found] for name, values in monsters.items()}
+    n_added = len(added["uid"])
+    items_changed = (frame.items.version & 0xFFFFFFFF) != base.items_version
+    parts = _frame_parts(
+        frame,
+        base.id,
+        (n_added, len(frame.items) if items_changed else ITEMS_UNCHANGED),
+    )
+    parts.append(np.packbits(kept, bitorder="little").tobytes())
+    parts.append(dx.astype("<i2").tobytes())
+    parts.append(dy.astype("<i2").tobytes())
+    parts += _columns_bytes(added, MONSTER_WIRE)
+    parts += _point_parts(frame, step, items_changed)
+    message = _message(MSG_DELTA, zlib.compress(b"".join(parts), 1))
+    return message, n_added
+
+
+def _parse_address(address: str) -> tuple[int, object]:
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address
+
+
+def _remove_socket_file(path: str) -> None:
+    # Only a socket is ours to remove; a mistyped address naming a
+    # regular file must not delete it, and bind() then reports the clash
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if stat.S_ISSOCK(mode):
+        os.unlink(path)
+
+
+class _Viewer:
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.buffer = bytearray()
+        # Keyframe deltas are against, and one sent but not yet acked
+        self.acked: int | None = None
+        self.pending: int | None = None
+
+
+class Broadcaster:
+    # Streams the game to spectators. publish() runs on the game thread
+    # and only copies the state, at most rate times a second and only
+    # while someone watches. A background thread quantizes, delta
+    # encodes, compresses and sends it, and takes new viewers and their
+    # acks; a frame it has not started on when the next arrives is
+    # dropped, so a slow viewer never holds up the game.
+    def __init__(
+        self,
+        address: str = BROADCAST_ADDRESS,
+        rate: float = BROADCAST_RATE,
+        keyframe_interval: int = BROADCAST_KEYFRAME_INTERVAL,
+        world: tuple[float, float] = (WORLD_WIDTH, WORLD_HEIGHT),
+    ) -> None:
+        self.rate = float(rate)
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self.world = (float(world[0]), float(world[1]))
+        self.step = position_step(*self.world)
+        family, target = _parse_address(address)
+        self._unix_path = target if family == socket.AF_UNIX else None
+        if self._unix_path is not None:
+            # Left behind by a run that did not shut down cleanly
+            _remove_socket_file(target)
+        listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            listener.bind(target)
+            listener.listen()
+        except OSError:
+            listener.close()
+            raise
+        listener.setblocking(False)
+        self.listener = listener
+        # Where viewers connect, with any port 0 resolved
+        self.address = (
+            "%s:%d" % listener.getsockname()
+            if family == socket.AF_INET
+            else target
+        )
+        self.viewers: list[_Viewer] = []
+        self.frames_published = 0
+        self.frames_dropped = 0
+        self.keyframes_sent = 0
+        self.deltas_sent = 0
+        self.bytes_sent = 0
+        self._interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        self._next_due = 0.0
+        self._sequence = 0
+        self._next_key_id = 0
+        self._keyframes: dict[int, Keyframe] = {}
+        self._latest: StreamFrame | None = None
+        self._wake = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="broadcast", daemon=True
+        )
+        self._thread.start()
+
+    def publish(self, sim) -> bool:
+        # Hand the current state to the encoder if a frame is due;
+        # call only while nothing else is changing sim
+        if not self.viewers:
+            return False
+        now = time.perf_counter()
+        if now < self._next_due:
+            return False
+        self._next_due = now + self._interval
+        frame = capture_frame(sim)
+        with self._wake:
+            if self._latest is not None:
+                self.frames_dropped += 1
+            self._latest = frame
+            self._wake.notify()
+        self.frames_published += 1
+        return True
+
+    def close(self) -> None:
+        with self._wake:
+            self._closed = True
+            self._wake.notify()
+        self._thread.join()
+        for viewer in self.viewers:
+            viewer.sock.close()
+        self.viewers = []
+        self.listener.close()
+        if self._unix_path is not None:
+            _remove_socket_file(self._unix_path)
+
+    def _run(self) -> None:
+        while True:
+            with self._wake:
+                if self._latest is None and not self._closed:
+                    self._wake.wait(POLL_SECONDS)
+                if self._closed:
+                    return
+                frame = self._latest
+                self._latest = None
+            self._poll()
+            if frame is not None and self.viewers:
+                self._send(frame)
+
+    def _poll(self) -> None:
+        # New viewers and whatever the current ones sent, without waiting
+        socks = [self.listener] + [viewer.sock for viewer in self.viewers]
+        readable, _, _ = select.select(socks, [], [], 0)
+        if not readable:
+            return
+        if self.listener in readable:
+            self._accept()
+        for viewer in list(self.viewers):
+            if viewer.sock in readable:
+                self._read(viewer)
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            sock.setblocking(True)
+            sock.settimeout(SEND_TIMEOUT_SECONDS)
+            if sock.family == socket.AF_INET:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            viewer = _Viewer(sock)
+            hello = HELLO.pack(
+                STREAM_MAGIC, STREAM_VERSION, *self.world, self.step,
+                self.rate,
+            )
+            if self._write(viewer, _message(MSG_HELLO, hello)):
+                self.viewers.append(viewer)
+
+    def _read(self, viewer: _Viewer) -> None:
+        try:
+            data = viewer.sock.recv(4096)
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(viewer)
+            return
+        viewer.buffer += data
+        for kind, payload in _split_messages(viewer.buffer):
+            if kind != MSG_ACK:
+                continue
+            (key_id,) = ACK.unpack(payload)
+            if key_id in self._keyframes:
+                viewer.acked = key_id
+            if viewer.pending == key_id:
+                viewer.pending = None
+
+    def _write(self, viewer: _Viewer, message: bytes) -> bool:
+        try:
+            viewer.sock.sendall(message)
+        except OSError:
+            self._drop(viewer)
+            return False
+        self.bytes_sent += len(message)
+        return True
+
+    def _drop(self, viewer: _Viewer) -> None:
+        viewer.sock.close()
+        if viewer in self.viewers:
+            self.viewers.remove(viewer)
+
+    def _send(self, frame: StreamFrame) -> None:
+        self._sequence += 1
+        step = self.step
+        monsters = _wire_monsters(frame, step)
+        # Built at most once per frame, however many viewers need them
+        keyframe: tuple[Keyframe, bytes] | None = None
+        deltas: dict[int, tuple[bytes, int]] = {}
+        for viewer in list(self.viewers):
+            base = self._keyframes.get(viewer.acked)
+            message = None
+            if base is not None:
+                due = (
+                    self._sequence - base.sequence >= self.keyframe_interval
+                )
+                if not due or viewer.pending is not None:
+                    delta = deltas.get(base.id)
+                    if delta is None:
+                        delta = deltas[base.id] = encode_delta(
+                            base, frame, monsters, step
+                        )
+                    message, added = delta
+                    # Mostly new monsters: a keyframe is no bigger
+                    if viewer.pending is None and added * 2 > len(
+                        monsters["uid"]
+                    ):
+                        message = None
+            elif viewer.pending is not None:
+                # Its first keyframe is not acknowledged yet
+                continue
+            if message is None:
+                if keyframe is None:
+                    keyframe = self._make_keyframe(frame, monsters)
+                viewer.pending = keyframe[0].id
+                if self._write(viewer, keyframe[1]):
+                    self.keyframes_sent += 1
+            elif self._write(viewer, message):
+                self.deltas_sent += 1
+        live = {viewer.acked for viewer in self.viewers}
+        live.update(viewer.pending for viewer in self.viewers)
+        for key_id in [k for k in self._keyframes if k not in live]:
+            del self._keyframes[key_id]
+
+    def _make_keyframe(
+        self, frame: StreamFrame, monsters: dict[str, np.ndarray]
+    ) -> tuple[Keyframe, bytes]:
+        key_id = self._next_key_id
+        self._next_key_id = (key_id + 1) & 0xFFFFFFFF
+        key = Keyframe(
+            key_id,
+            self._sequence,
+            frame.items.version & 0xFFFFFFFF,
+            monsters["uid"],
+            monsters["qx"],
+            monsters["qy"],
+            monsters["radius"],
+            monsters["color_index"],
+        )
+        self._keyframes[key_id] = key
+        return key, encode_keyframe(key_id, frame, monsters, self.step)
+
+
+class _Cursor:
+    def __init__(self, buffer: bytes) -> None:
+        self.buffer = buffer
+        self.pos = 0
+
+    def unpack(self, layout: struct.Struct) -> tuple:
+        values = layout.unpack_from(self.buffer, self.pos)
+        self.pos += layout.size
+        return values
+
+    def array(self, dtype: str, count: int) -> np.ndarray:
+        values = np.frombuffer(
+            self.buffer, dtype=dtype, count=count, offset=self.pos
+        )
+        self.pos += values.nbytes
+        return values
+
+    def columns(self, layout, count: int) -> dict[str, np.ndarray]:
+        return {name: self.array(dtype, count) for name, dtype in layout}
+
+
+class Spectator:
+    # Viewer end of a stream: decodes each frame into a RenderState and
+    # acknowledges every keyframe once it has it
+    def __init__(self, address: str) -> None:
+        family, target = _parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.connect(target)
+        self.closed = False
+        self.state = RenderState()
+        self.frames = 0
+        self.keyframes = 0
+        self.bytes_received = 0
+        self._buffer = bytearray()
+        self._keyframes: dict[int, Keyframe] = {}
+        messages: list[tuple[int, bytes]] = []
+        while not messages and not self.closed:
+            messages = self._receive(None)
+        if not messages or messages[0][0] != MSG_HELLO:
+            raise ValueError("not a spectator stream")
+        magic, version, width, height, step, rate = HELLO.unpack(
+            messages[0][1]
+        )
+        if magic != STREAM_MAGIC or version != STREAM_VERSION:
+            raise ValueError("unsupported spectator stream")
+        self.world = (width, height)
+        self.step = step
+        self.rate = rate
+        self._backlog = messages[1:]
+
+    def _receive(self, timeout: float | None) -> list[tuple[int, bytes]]:
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        if readable:
+            data = self.sock.recv(1 << 16)
+            if not data:
+                self.closed = True
+            self._buffer += data
+            self.bytes_received += len(data)
+        return _split_messages(self._buffer)
+
+    def poll(self, timeout: float = 0.0) -> bool:
+        # Wait up to timeout for data and decode everything complete;
+        # True when state holds a new frame
+        messages = self._backlog + self._receive(timeout)
+        self._backlog = []
+        updated = False
+        for kind, payload in messages:
+            if kind in (MSG_KEYFRAME, MSG_DELTA):
+                updated |= self._decode(kind, zlib.decompress(payload))
+        return updated
+
+    def close(self) -> None:
+        self.sock.close()
+        self.closed = True
+
+    def _decode(self, kind: int, body: bytes) -> bool:
+        cursor = _Cursor(body)
+        key_id, items_version, frame, time_seconds = cursor.unpack(FRAME)
+        player = cursor.unpack(PLAYER)
+        n, n_palette, n_bullets, n_items = cursor.unpack(COUNTS)
+        palette = [
+            tuple(color)
+            for color in cursor.array("u1", n_palette * 3)
+            .reshape(-1, 3)
+            .tolist()
+        ]
+        if kind == MSG_KEYFRAME:
+            rows = cursor.columns(MONSTER_WIRE, n)
+            qx = rows["qx"]
+            qy = rows["qy"]
+            radius = rows["radius"]
+            color_index = rows["color_index"]
+        else:
+            base = self._keyframes.get(key_id)
+            if base is None:
+                return False
+            # Older keyframes will not be referred to again
+            for old in [k for k in self._keyframes if k < key_id]:
+                del self._keyframes[old]
+            kept = np.unpackbits(
+                cursor.array("u1", (len(base.uid) + 7) // 8),
+                count=len(base.uid),
+                bitorder="little",
+            ).astype(bool)
+            moved = int(np.count_nonzero(kept))
+            dx = cursor.array("<i2", moved)
+            dy = cursor.array("<i2", moved)
+            added = cursor.columns(MONSTER_WIRE, n)
+            qx = np.concatenate((base.qx[kept] + dx, added["qx"]))
+            qy = np.concatenate((base.qy[kept] + dy, added["qy"]))
+            radius = np.concatenate((base.radius[kept], added["radius"]))
+            color_index = np.concatenate(
+                (base.color_index[kept], added["color_index"])
+            )
+        step = self.step
+        state = self.state
+        bullets = cursor.columns(BULLET_WIRE, n_bullets)
+        if kind == MSG_DELTA and n_items == ITEMS_UNCHANGED:
+            items = base.items
+        else:
+            rows_items = cursor.columns(ITEM_WIRE, n_items)
+            items = FrozenItems.of(
+                items_version,
+                (
+                    ItemState(x * step, y * step, heal)
+                    for x, y, heal in zip(
+                        rows_items["qx"].tolist(),
+                        rows_items["qy"].tolist(),
+                        rows_items["heal"].tolist(),
+                    )
+                ),
+            )
+        if kind == MSG_KEYFRAME:
+            self._keyframes[key_id] = Keyframe(
+                key_id, 0, items_version, rows["uid"], qx, qy, radius,
+                color_index, items,
+            )
+            self.keyframes += 1
+            self.sock.sendall(_message(MSG_ACK, ACK.pack(key_id)))
+
+        target = state.player
+        (
+            target.x,
+            target.y,
+            target.hp,
+            target.face_dx,
+            target.face_dy,
+            target.xp,
+            target.xp_to_next,
+            target.level,
+        ) = player
+        target.prev_x = target.x
+        target.prev_y = target.y
+        monsters = state.monsters
+        monsters.resize(len(qx))
+        np.multiply(qx, step, out=monsters.x)
+        np.multiply(qy, step, out=monsters.y)
+        np.multiply(radius, step, out=monsters.radius)
+        monsters.color_index[:] = color_index
+        monsters.palette = palette
+        state.bullets.resize(n_bullets)
+        np.multiply(bullets["qx"], step, out=state.bullets.x)
+        np.multiply(bullets["qy"], step, out=state.bullets.y)
+        state.items = items
+        state.time = time_seconds
+        state.frame = frame
+        self.frames += 1
+        return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Watch a game that streams to BROADCAST_ADDRESS."
+    )
+    parser.add_argument(
+        "address", nargs="?", default=BROADCAST_ADDRESS,
+        help="host:port or Unix socket path of the game",
+    )
+    parser.add_argument(
+        "--headless", action="store_true",
+        help="no window; just decode and report",
+    )
+    parser.add_argument(
+        "--frames", type=int, default=0,
+        help="stop after this many frames (0: until the game ends)",
+    )
+    args = parser.parse_args()
+    if not args.address:
+        parser.error("no address given and BROADCAST_ADDRESS is empty")
+
+    if args.headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    from hud import Hud
+    from assets import get_font
+    from sprites import SpriteCache, scene_backdrop
+    from tilemap import load_tile_map
+    from main import render_scene
+    from camera import Camera
+
+    spectator = Spectator(args.address)
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption(f"{WINDOW_CAPTION} - spectator")
+    hud = Hud(get_font(28))
+    sprites = SpriteCache()
+    camera = Camera(*screen.get_size(), *spectator.world)
+    backdrop = scene_backdrop(
+        load_tile_map(MAP_FILE) if MAP_FILE else None,
+        camera,
+        screen.get_size(),
+    )
+
+    state = spectator.state
+    started = time.perf_counter()
+    running = True
+    while running and not spectator.closed:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        if not spectator.poll(1.0 / float(FPS)):
+            continue
+        camera.follow(state.player.x, state.player.y)
+        hud.update(state.player, state.time)
+        render_scene(
+            screen,
+            hud,
+            sprites,
+            state.player,
+            state.time,
+            state.monsters,
+            state.bullets,
+            state.items,
+            1.0,
+            backdrop,
+            camera,
+        )
+        pygame.display.flip()
+        if args.frames and spectator.frames >= args.frames:
+            break
+    elapsed = time.perf_counter() - started
+    spectator.close()
+    pygame.quit()
+
+    frames = max(1, spectator.frames)
+    print(
+        f"{spectator.frames} frames ({spectator.keyframes} keyframes) in "
+        f"{elapsed:.1f}s, {spectator.bytes_received / 1024.0:.1f} KiB, "
+        f"{spectator.bytes_received / frames:.0f} bytes/frame"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,8 @@ from config import (
 
 
 class Bullet:
+    __slots__ = ("x", "y", "prev_x", "prev_y", "vx", "vy")
+
     def __init__(
         self,
         x: float,
@@ -16,6 +18,8 @@ class Bullet:
     ) -> None:
         self.x = x
         self.y = y
+        self.prev_x = x
+        self.prev_y = y
         self.vx = vx
         self.vy = vy
 
@@ -23,10 +27,12 @@ class Bullet:
         self.x += self.vx * dt_seconds
         self.y += self.vy * dt_seconds
 
-    def draw(self, screen: pygame.Surface) -> None:
+    def draw(
+        self, screen: pygame.Surface, offset: tuple[int, int] = (0, 0)
+    ) -> None:
         pygame.draw.circle(
             screen,
             BULLET_COLOR,
-            (int(self.x), int(self.y)),
+            (int(self.x) - offset[0], int(self.y) - offset[1]),
             BULLET_RADIUS,
         )
@@ -0,0 +1,268 @@
+import numpy as np
+
+from config import (
+    BULLET_POOL_CAPACITY,
+    BULLET_POOL_OVERFLOW,
+)
+from bullet import Bullet
+
+# Per-bullet columns. Live rows are a contiguous run in spawn order
+# starting at the pool's head, with room for twice the capacity so the
+# run only moves back to the start once every capacity spawns.
+COLUMNS = ("_x", "_y", "_prev_x", "_prev_y", "_vx", "_vy", "_serial")
+# Capacity-sized scratch buffers for per-frame work
+SCRATCH = ("_step", "_out", "_cmp", "_mark", "_keep_serial")
+
+
+class BulletView:
+    # Index-based handle into a BulletPool; only valid until the next
+    # spawn or despawn, which may shift the bullets after it
+    __slots__ = ("_pool", "_index")
+
+    def __init__(self, pool: "BulletPool", index: int) -> None:
+        self._pool = pool
+        self._index = index
+
+    @property
+    def x(self) -> float:
+        pool = self._pool
+        return float(pool._x[pool._head + self._index])
+
+    @property
+    def y(self) -> float:
+        pool = self._pool
+        return float(pool._y[pool._head + self._index])
+
+    @property
+    def prev_x(self) -> float:
+        pool = self._pool
+        return float(pool._prev_x[pool._head + self._index])
+
+    @property
+    def prev_y(self) -> float:
+        pool = self._pool
+        return float(pool._prev_y[pool._head + self._index])
+
+    @property
+    def vx(self) -> float:
+        pool = self._pool
+        return float(pool._vx[pool._head + self._index])
+
+    @property
+    def vy(self) -> float:
+        pool = self._pool
+        return float(pool._vy[pool._head + self._index])
+
+    draw = Bullet.draw
+
+
+class BulletPool:
+    def __init__(
+        self,
+        capacity: int | None = None,
+        overflow: str | None = None,
+    ) -> None:
+        # Defaults are read at call time so sweep overrides reach them
+        if capacity is None:
+            capacity = BULLET_POOL_CAPACITY
+        if overflow is None:
+            overflow = BULLET_POOL_OVERFLOW
+        if overflow not in ("drop_new", "recycle_oldest"):
+            raise ValueError(f"unknown overflow policy: {overflow!r}")
+        capacity = max(1, int(capacity))
+        self.capacity = capacity
+        self.overflow = overflow
+        self.count = 0
+        self.dropped = 0
+        self._head = 0
+        self._next_serial = 0
+        self._x = np.zeros(2 * capacity, dtype=np.float64)
+        self._y = np.zeros(2 * capacity, dtype=np.float64)
+        self._prev_x = np.zeros(2 * capacity, dtype=np.float64)
+        self._prev_y = np.zeros(2 * capacity, dtype=np.float64)
+        self._vx = np.zeros(2 * capacity, dtype=np.float64)
+        self._vy = np.zeros(2 * capacity, dtype=np.float64)
+        self._serial = np.zeros(2 * capacity, dtype=np.int64)
+        # Scratch buffers for the per-frame updates
+        self._step = np.zeros(capacity, dtype=np.float64)
+        self._out = np.zeros(capacity, dtype=bool)
+        self._cmp = np.zeros(capacity, dtype=bool)
+        self._mark = np.zeros(capacity, dtype=bool)
+        self._keep_serial = np.zeros(capacity, dtype=np.int64)
+
+    def _live(self, column: np.ndarray) -> np.ndarray:
+        return column[self._head:self._head + self.count]
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._live(self._x)
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._live(self._y)
+
+    @property
+    def prev_x(self) -> np.ndarray:
+        return self._live(self._prev_x)
+
+    @property
+    def prev_y(self) -> np.ndarray:
+        return self._live(self._prev_y)
+
+    @property
+    def vx(self) -> np.ndarray:
+        return self._live(self._vx)
+
+    @property
+    def vy(self) -> np.ndarray:
+        return self._live(self._vy)
+
+    @property
+    def serial(self) -> np.ndarray:
+        return self._live(self._serial)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __getitem__(self, index: int) -> BulletView:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("bullet index out of range")
+        return BulletView(self, index)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield BulletView(self, index)
+
+    def spawn(self, x: float, y: float, vx: float, vy: float) -> bool:
+        if self.count == self.capacity:
+            if self.overflow != "recycle_oldest":
+                self.dropped += 1
+                return False
+            # Rows are in spawn order, so the oldest is the first
+            self._head += 1
+            self.count -= 1
+            self.dropped += 1
+        i = self._head + self.count
+        if i == len(self._x):
+            self._rebase()
+            i = self.count
+        self._x[i] = x
+        self._y[i] = y
+        self._prev_x[i] = x
+        self._prev_y[i] = y
+        self._vx[i] = vx
+        self._vy[i] = vy
+        self._serial[i] = self._next_serial
+        self._next_serial += 1
+        self.count += 1
+        return True
+
+    def _rebase(self) -> None:
+        # Only called with the run at the end of the columns, which
+        # puts the head at least a capacity in, so the copies never
+        # overlap
+        head = self._head
+        n = self.count
+        for name in COLUMNS:
+            column = getattr(self, name)
+            column[:n] = column[head:head + n]
+        self._head = 0
+
+    def marks(self) -> np.ndarray:
+        # Cleared per-bullet flags to set and pass to despawn_mask; the
+        # buffer is shared, so it only lasts until the next call
+        mark = self._mark[:self.count]
+        mark.fill(False)
+        return mark
+
+    def despawn_mask(self, mask: np.ndarray) -> int:
+        # Remove the bullets whose flag is set, keeping the rest in
+        # spawn order; returns how many went
+        n = self.count
+        keep = self._cmp[:n]
+        np.logical_not(mask, out=keep)
+        kept = int(np.count_nonzero(keep))
+        if kept == n:
+            return 0
+        # The one allocation: where the survivors are
+        rows = np.flatnonzero(keep)
+        for name in COLUMNS:
+            live = self._live(getattr(self, name))
+            scratch = (
+                self._keep_serial if name == "_serial" else self._step
+            )[:kept]
+            np.take(live, rows, out=scratch, mode="clip")
+            live[:kept] = scratch
+        self.count = kept
+        return n - kept
+
+    def despawn(self, index: int) -> None:
+        self.despawn_many((index,))
+
+    def despawn_many(self, indices) -> None:
+        mark = self.marks()
+        for index in indices:
+            mark[index] = True
+        self.despawn_mask(mark)
+
+    def clear(self) -> None:
+        self.count = 0
+        self._head = 0
+
+    def load_arrays(self, columns: dict[str, np.ndarray]) -> None:
+        n = len(columns["x"])
+        if n > self.capacity:
+            raise ValueError(
+                f"{n} bullets do not fit a pool of {self.capacity}"
+            )
+        # Back into spawn order, which the oldest-first recycling needs
+        order = np.argsort(columns["serial"], kind="stable")
+        for name, values in columns.items():
+            getattr(self, "_" + name)[:n] = np.asarray(values)[order]
+        self._head = 0
+        self.count = n
+        self._next_serial = int(self._serial[:n].max()) + 1 if n else 0
+
+    def remember_positions(self) -> None:
+        np.copyto(self.prev_x, self.x)
+        np.copyto(self.prev_y, self.y)
+
+    def update(self, dt_seconds: float) -> None:
+        n = self.count
+        if not n:
+            return
+        step = self._step[:n]
+        np.multiply(self.vx, dt_seconds, out=step)
+        np.add(self.x, step, out=self.x)
+        np.multiply(self.vy, dt_seconds, out=step)
+        np.add(self.y, step, out=self.y)
+
+    def cull(
+        self,
+        min_x: float,
+        min_y: float,
+        max_x: float,
+        max_y: float,
+    ) -> int:
+        n = self.count
+        if not n:
+            return 0
+        xs = self.x
+        ys = self.y
+        out = self._out[:n]
+        cmp = self._cmp[:n]
+        np.less(xs, min_x, out=out)
+        np.greater(xs, max_x, out=cmp)
+        np.logical_or(out, cmp, out=out)
+        np.less(ys, min_y, out=cmp)
+        np.logical_or(out, cmp, out=out)
+        np.greater(ys, max_y, out=cmp)
+        np.logical_or(out, cmp, out=out)
+        if not out.any():
+            return 0
+        return self.despawn_mask(out)
@@ -0,0 +1,60 @@
+import numpy as np
+
+from config import WORLD_HEIGHT, WORLD_WIDTH
+
+
+class Camera:
+    # Top-left corner of the view in world pixels. It centres on its
+    # target but never shows past the world edge; a world no larger
+    # than the view keeps the camera at (0, 0), so screen and world
+    # coordinates coincide.
+    def __init__(
+        self,
+        view_width: int,
+        view_height: int,
+        world_width: float | None = None,
+        world_height: float | None = None,
+    ) -> None:
+        # The world size is read at call time so sweep overrides reach it
+        if world_width is None:
+            world_width = WORLD_WIDTH
+        if world_height is None:
+            world_height = WORLD_HEIGHT
+        self.view_width = int(view_width)
+        self.view_height = int(view_height)
+        self.max_x = max(0, int(world_width) - self.view_width)
+        self.max_y = max(0, int(world_height) - self.view_height)
+        self.scrolls = bool(self.max_x or self.max_y)
+        # Whole pixels, so static things do not shimmer while scrolling
+        self.x = 0
+        self.y = 0
+
+    @property
+    def offset(self) -> tuple[int, int]:
+        return self.x, self.y
+
+    def follow(self, x: float, y: float) -> None:
+        self.x = min(max(int(x) - self.view_width // 2, 0), self.max_x)
+        self.y = min(max(int(y) - self.view_height // 2, 0), self.max_y)
+
+    def to_world(self, screen_x: int, screen_y: int) -> tuple[int, int]:
+        return screen_x + self.x, screen_y + self.y
+
+    def bounds(self, margin: float = 0.0) -> tuple[float, float, float, float]:
+        # World-space rectangle in view, grown by margin on every side
+        return (
+            self.x - margin,
+            self.y - margin,
+            self.x + self.view_width + margin,
+            self.y + self.view_height + margin,
+        )
+
+    def is_visible(self, x: float, y: float, margin: float = 0.0) -> bool:
+        left, top, right, bottom = self.bounds(margin)
+        return left <= x <= right and top <= y <= bottom
+
+    def visible_mask(
+        self, xs: np.ndarray, ys: np.ndarray, margin: float = 0.0
+    ) -> np.ndarray:
+        left, top, right, bottom = self.bounds(margin)
+        return (xs >= left) & (xs <= right) & (ys >= top) & (ys <= bottom)
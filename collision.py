@@ -0,0 +1,211 @@
+import math
+import random
+
+import numpy as np
+
+from config import (
+    BULLET_RADIUS,
+    DROP_CHANCE,
+    MONSTER_XP_ON_KILL,
+)
+from player import Player
+from monster import Monster
+from monster_store import MonsterStore
+from bullet import Bullet
+from bullet_pool import BulletPool
+from item import Item
+from item_store import ItemStore
+from spatial import SpatialGrid, neighbour_pairs
+from free_list import FreeList
+
+
+def resolve_bullet_hits(
+    player: Player,
+    monsters: list[Monster] | MonsterStore,
+    bullets: list[Bullet] | BulletPool,
+    items: ItemStore,
+    rng: random.Random,
+    grid: SpatialGrid | None = None,
+    monster_pool: FreeList | None = None,
+    item_pool: FreeList | None = None,
+) -> None:
+    # Dead monsters go back to monster_pool and drops come from
+    # item_pool when given
+    new_item = item_pool.acquire if item_pool is not None else Item
+    if isinstance(monsters, MonsterStore):
+        _resolve_store_hits(
+            player, monsters, bullets, items, rng, new_item
+        )
+        return
+    if not monsters:
+        return
+    if not bullets:
+        _drop_dead(monsters, monster_pool)
+        return
+
+    max_radius = max(float(m.radius) for m in monsters)
+    if grid is None:
+        grid = SpatialGrid(max_radius + BULLET_RADIUS)
+    else:
+        grid.ensure_cell_size(max_radius + BULLET_RADIUS)
+    bxs, bys = _bullet_points(bullets)
+    grid.rebuild_points(bxs, bys)
+
+    # Each monster consumes at most one bullet, the earliest one in
+    # list order that is still unspent, as with a per-monster scan
+    consumed = _spent_flags(bullets)
+    spent = 0
+    new_monsters: list[Monster] = []
+    for m in monsters:
+        reach = float(m.radius) + BULLET_RADIUS
+        for k in sorted(grid.query(m.x, m.y, reach)):
+            if consumed[k]:
+                continue
+            if math.hypot(m.x - bxs[k], m.y - bys[k]) <= reach:
+                m.take_damage(player.get_bullet_damage())
+                consumed[k] = True
+                spent += 1
+                if m.hp <= 0.0:
+                    player.gain_xp(float(MONSTER_XP_ON_KILL))
+                    if rng.random() < float(DROP_CHANCE):
+                        items.append(new_item(m.x, m.y))
+                break
+        if m.hp > 0.0:
+            new_monsters.append(m)
+        elif monster_pool is not None:
+            monster_pool.release(m)
+    monsters[:] = new_monsters
+
+    if spent:
+        _remove_spent(bullets, consumed)
+
+
+def _resolve_store_hits(
+    player: Player,
+    store: MonsterStore,
+    bullets: list[Bullet] | BulletPool,
+    items: ItemStore,
+    rng: random.Random,
+    new_item=Item,
+) -> None:
+    if not store or not bullets:
+        store.remove_dead()
+        return
+
+    # Contacts come from a cell sort of the bullet columns rather than
+    # the shared grid, so no per-bullet Python objects are built
+    bxs, bys = _bullet_arrays(bullets)
+    xs = store.x
+    ys = store.y
+    radii = store.radius
+    rows, hits = neighbour_pairs(
+        xs, ys, bxs, bys, float(radii.max()) + BULLET_RADIUS
+    )
+    within = (
+        np.hypot(xs[rows] - bxs[hits], ys[rows] - bys[hits])
+        <= radii[rows] + BULLET_RADIUS
+    )
+    # Rows are kept in uid order, so this serves monsters as a scan of
+    # the store would
+    resolve_contact_hits(
+        player, store, bullets, items, rng, rows[within], hits[within],
+        new_item,
+    )
+
+
+def resolve_contact_hits(
+    player: Player,
+    store: MonsterStore,
+    bullets: list[Bullet] | BulletPool,
+    items: ItemStore,
+    rng: random.Random,
+    rows: np.ndarray,
+    hits: np.ndarray,
+    new_item=Item,
+) -> None:
+    # Bullet hits from contacts found elsewhere, e.g. by shard workers:
+    # rows[n] is a store index within reach of bullet hits[n]. Monsters
+    # are served in uid order and each consumes the lowest-numbered
+    # bullet still unspent, so the outcome does not depend on how the
+    # rows happen to be arranged.
+    if not len(rows) or not bullets:
+        store.remove_dead()
+        return
+    order = np.lexsort((hits, store.uid[rows]))
+    hps = store.hp
+    xs = store.x
+    ys = store.y
+    consumed = _spent_flags(bullets)
+    spent = 0
+    hit_index: list[int] = []
+    hit_damage: list[float] = []
+    last = -1
+    for i, k in zip(rows[order].tolist(), hits[order].tolist()):
+        if i == last or consumed[k]:
+            continue
+        damage = player.get_bullet_damage()
+        consumed[k] = True
+        spent += 1
+        last = i
+        hit_index.append(i)
+        hit_damage.append(damage)
+        if max(0.0, float(hps[i]) - damage) <= 0.0:
+            player.gain_xp(float(MONSTER_XP_ON_KILL))
+            if rng.random() < float(DROP_CHANCE):
+                items.append(new_item(float(xs[i]), float(ys[i])))
+
+    store.apply_damage(hit_index, hit_damage)
+    store.remove_dead()
+    if spent:
+        _remove_spent(bullets, consumed)
+
+
+def _drop_dead(
+    monsters: list[Monster],
+    monster_pool: FreeList | None,
+) -> None:
+    alive = [m for m in monsters if m.hp > 0.0]
+    if monster_pool is not None and len(alive) != len(monsters):
+        monster_pool.release_many([m for m in monsters if m.hp <= 0.0])
+    monsters[:] = alive
+
+
+def _bullet_points(
+    bullets: list[Bullet] | BulletPool,
+) -> tuple[list[float], list[float]]:
+    # For the per-monster scan of the list backend
+    if isinstance(bullets, BulletPool):
+        return bullets.x.tolist(), bullets.y.tolist()
+    return [b.x for b in bullets], [b.y for b in bullets]
+
+
+def _bullet_arrays(
+    bullets: list[Bullet] | BulletPool,
+) -> tuple[np.ndarray, np.ndarray]:
+    if isinstance(bullets, BulletPool):
+        return bullets.x, bullets.y
+    n = len(bullets)
+    return (
+        np.fromiter((b.x for b in bullets), np.float64, n),
+        np.fromiter((b.y for b in bullets), np.float64, n),
+    )
+
+
+def _spent_flags(
+    bullets: list[Bullet] | BulletPool,
+) -> list[bool] | np.ndarray:
+    if isinstance(bullets, BulletPool):
+        return bullets.marks()
+    return [False] * len(bullets)
+
+
+def _remove_spent(
+    bullets: list[Bullet] | BulletPool,
+    consumed: list[bool] | np.ndarray,
+) -> None:
+    if isinstance(bullets, BulletPool):
+        bullets.despawn_mask(consumed)
+    else:
+        bullets[:] = [
+            b for k, b in enumerate(bullets) if not consumed[k]
+        ]
@@ -5,6 +5,28 @@ WINDOW_WIDTH = 1920
 WINDOW_HEIGHT = 1020
 FPS = 60
 
+# World size in pixels; a world larger than the window scrolls, with
+# the camera following the player and off-screen entities culled
+WORLD_WIDTH = WINDOW_WIDTH
+WORLD_HEIGHT = WINDOW_HEIGHT
+# Floor grid spacing drawn in scrolling worlds so movement is visible
+FLOOR_GRID_SPACING = 160
+FLOOR_GRID_COLOR = (26, 26, 34)
+
+# Fixed simulation tick rate (Hz), independent of the render rate, and
+# the most ticks one rendered frame may run to catch up after a hitch
+SIMULATION_TICK_RATE = 60
+SIMULATION_MAX_CATCH_UP_STEPS = 5
+
+# Opt-in dirty-rectangle rendering; falls back to a full flip once the
+# changed area passes this fraction of the window
+DIRTY_RECT_RENDERING = False
+DIRTY_RECT_FULL_REDRAW_RATIO = 0.4
+
+# Simulate the next frame on a worker thread while the main thread
+# draws a copy of the last one; costs one frame of input latency
+PIPELINED_RENDERING = False
+
 # Colors
 BACKGROUND_COLOR = (18, 18, 24)
 ACCENT_COLOR = (130, 238, 130)
@@ -16,6 +38,9 @@ BOSS_COLOR = (200, 120, 240)
 
 # Text and font
 FONT_NAME = "arial"
+# Where the font file FONT_NAME resolves to is remembered between runs;
+# delete the file to pick up newly installed fonts, empty disables
+FONT_CACHE_PATH = "font_cache.json"
 WINDOW_CAPTION = (
     "Sure Not Monkeys"
 )
@@ -23,6 +48,68 @@ HINT_TEXT = (
     "WASD to move\nESC to quit"
 )
 
+# Frame profiler: F3 toggles the overlay; history is a ring buffer of
+# this many frames, written to PROFILER_CSV_PATH on exit when set
+PROFILER_TOGGLE_KEY = "f3"
+PROFILER_HISTORY_FRAMES = 600
+PROFILER_CSV_PATH = ""
+PROFILER_OVERLAY_REFRESH_FRAMES = 15
+PROFILER_PHASES = (
+    "events",
+    "sim_wait",
+    "broadcast",
+    "player",
+    "spawning",
+    "update_monsters",
+    "separate_monsters",
+    "separate_player_and_monsters",
+    "apply_monster_damage",
+    "bullets",
+    "collision",
+    "item_pickup",
+    "hud",
+    "render_scene",
+    "flip",
+    "gc",
+)
+
+# Record each game's inputs to this file for replay.py; empty disables
+REPLAY_RECORD_PATH = ""
+
+# Spectator streaming: the game publishes its state to viewers
+# ("python broadcast.py") this many times a second. "host:port" listens
+# on TCP, anything else is a Unix socket path; empty disables. Each
+# viewer gets a full keyframe at least every BROADCAST_KEYFRAME_INTERVAL
+# frames and deltas against the last keyframe it acknowledged between;
+# positions are sent in steps of BROADCAST_POSITION_STEP pixels.
+BROADCAST_ADDRESS = ""
+BROADCAST_RATE = 20
+BROADCAST_KEYFRAME_INTERVAL = 60
+BROADCAST_POSITION_STEP = 0.125
+
+# Quicksave: F5 writes a binary snapshot of the running game, F9 loads it
+SNAPSHOT_PATH = "quicksave.snms"
+SNAPSHOT_SAVE_KEY = "f5"
+SNAPSHOT_LOAD_KEY = "f9"
+
+# Cyclic GC runs between frames instead of mid-frame: a due collection
+# waits for a frame with this much unused budget, or is forced once its
+# generation counter reaches GC_FORCE_FACTOR times the threshold
+GC_POLICY_ENABLED = True
+GC_MIN_SLACK_SECONDS = 0.002
+GC_FORCE_FACTOR = 4.0
+GC_REPORT = False
+
+# Dead monsters and picked-up items kept for reuse, per type
+ENTITY_FREE_LIST_SIZE = 4096
+
+# Rendered HUD text surfaces kept in the LRU cache
+HUD_TEXT_CACHE_SIZE = 64
+
+# Print how long launch took up to the first main menu frame, by phase;
+# "python main.py --startup-time" prints it and exits there
+STARTUP_REPORT = False
+
 # Main menu texts
 MENU_TITLE = "Sure Not Monkeys"
 MENU_START_PROMPT = "Press Enter to Start  •  Esc to Quit"
@@ -49,8 +136,60 @@ MONSTER_DAMAGE_DISTANCE = 32.0
 MONSTER_DAMAGE_PER_SECOND = 12.0
 MONSTER_SEPARATION_PASSES = 2
 MONSTER_SEPARATION_PADDING = 2.0
+# How overlapping monsters are pushed apart: "sequential" moves each
+# overlapping pair in turn; "jacobi" (numpy backend only) works every
+# push out from where the monsters stood before the pass and applies
+# them together, vectorized and independent of row order, as the
+# sharded simulation does
+MONSTER_SEPARATION = "sequential"
 PLAYER_MONSTER_PADDING = 2.0
 MONSTER_MAX_HP = 100
+# Monsters placed in one batch keep at least this much space between
+# centres when the arena has room
+MONSTER_SPAWN_SPACING = 2 * MONSTER_RADIUS + MONSTER_SEPARATION_PADDING
+MONSTER_SPAWN_SAMPLE_ROUNDS = 8
+# Scripted waves: (seconds into the run, monster count) pairs such as
+# ((60.0, 200), (120.0, 400)); empty keeps the regular trickle only
+MONSTER_WAVES = ()
+# Spawn rate and wave sizes are multiplied by this so monsters are as
+# dense on the ground in a world bigger than the window; by default the
+# ratio of world area to window area, which is 1.0 for a single screen
+MONSTER_DENSITY_SCALE = (WORLD_WIDTH * WORLD_HEIGHT) / (
+    WINDOW_WIDTH * WINDOW_HEIGHT
+)
+
+# Monster level of detail by distance outside the window-sized view a
+# camera following the player shows, nearest tier first: (up to this
+# many pixels beyond the view edge, update every Nth tick, pairwise
+# separation, on the ticks it updates). The nearest tier must be full
+# rate, so everything on screen is; in a world no larger than the
+# window no monster ever leaves it. Skipped ticks are made up on the
+# next update. Empty gives every monster full updates every tick.
+MONSTER_LOD_TIERS = (
+    (240.0, 1, True),
+    (1200.0, 2, True),
+    (float("inf"), 4, False),
+)
+
+# Monster storage: "list" of Monster objects or "numpy" arrays
+MONSTER_BACKEND = "list"
+
+# Sharded headless simulation (shard.py): the world is split into this
+# many vertical strips, each simulated by its own worker process, over
+# monster arrays in shared memory reserved for this many to start with
+SHARD_COUNT = 4
+SHARD_MONSTER_CAPACITY = 65536
+
+# Obstacle map: a text file of TILE_SIZE tiles where '#' is a wall,
+# e.g. "maps/arena.txt"; None keeps the open arena
+MAP_FILE = None
+TILE_SIZE = 40
+WALL_COLOR = (58, 58, 74)
+
+# Spatial grid cells must fit the widest monster pair interaction
+SPATIAL_GRID_CELL_SIZE = (
+    2 * max(MONSTER_RADIUS, BOSS_RADIUS) + MONSTER_SEPARATION_PADDING
+)
 
 # Bullets
 BULLET_SPEED = 520.0
@@ -59,6 +198,12 @@ BULLET_COOLDOWN_SECONDS = 0.35
 BULLET_DAMAGE = 25
 BULLET_DAMAGE_PER_LEVEL = 25
 
+# Bullet storage: "list" of Bullet objects or a fixed-capacity "pool"
+BULLET_BACKEND = "list"
+BULLET_POOL_CAPACITY = 2048
+# Spawning into a full pool: "drop_new" or "recycle_oldest"
+BULLET_POOL_OVERFLOW = "recycle_oldest"
+
 # Volley attack
 VOLLEY_BULLET_SPEED = 360.0
 VOLLEY_COOLDOWN_SECONDS = 1.2
@@ -77,3 +222,11 @@ DROP_CHANCE = 0.5
 DROP_HEAL_AMOUNT = 20.0
 ITEM_COLOR = (120, 220, 120)
 ITEM_SIZE = 12
+# Drops vanish after ITEM_LIFETIME_SECONDS and the oldest go first
+# beyond ITEM_MAX_COUNT; 0 disables either limit
+ITEM_LIFETIME_SECONDS = 30.0
+ITEM_MAX_COUNT = 400
+# A drop landing this close to another merges into it, up to
+# ITEM_MAX_HEAL; 0 disables merging
+ITEM_MERGE_RADIUS = 24.0
+ITEM_MAX_HEAL = 100.0
@@ -0,0 +1,119 @@
+import pygame
+
+from config import (
+    BACKGROUND_COLOR,
+    DIRTY_RECT_FULL_REDRAW_RATIO,
+)
+from hud import Hud
+from sprites import (
+    SpriteCache,
+    collect_bullet_blits,
+    collect_item_blits,
+    collect_monster_blits,
+    collect_player_blits,
+)
+
+
+class DirtyRectRenderer:
+    # The HUD lives in a cached background layer; each frame the screen
+    # is restored from it only where sprites appeared, vanished or moved,
+    # and just those rects are pushed to the display
+    def __init__(
+        self,
+        screen: pygame.Surface,
+        full_redraw_ratio: float = DIRTY_RECT_FULL_REDRAW_RATIO,
+        backdrop: pygame.Surface | None = None,
+    ) -> None:
+        self.screen = screen
+        self.backdrop = backdrop
+        self.full_redraw_ratio = float(full_redraw_ratio)
+        self.background = pygame.Surface(screen.get_size()).convert()
+        self._screen_area = screen.get_width() * screen.get_height()
+        self._hud_blits: list | None = None
+        self._prev_sprites: set = set()
+        self._prev_facing = pygame.Rect(0, 0, 0, 0)
+        self._needs_full = True
+        self._pending: list[pygame.Rect] | None = None
+        self.full_redraws = 0
+        self.partial_updates = 0
+
+    def invalidate(self) -> None:
+        self._needs_full = True
+
+    def _rebuild_background(self, hud: Hud) -> list[pygame.Rect]:
+        old = self._hud_blits or []
+        new = hud.blit_list()
+        if self.backdrop is None:
+            self.background.fill(BACKGROUND_COLOR)
+        else:
+            self.background.blit(self.backdrop, (0, 0))
+        self.background.blits(new, doreturn=False)
+        self._hud_blits = new
+        return [
+            pygame.Rect(pos, surf.get_size()) for surf, pos in old + new
+        ]
+
+    def render(
+        self,
+        hud: Hud,
+        sprites: SpriteCache,
+        player,
+        time_seconds: float,
+        monsters,
+        bullets,
+        items,
+        alpha: float = 1.0,
+    ) -> None:
+        screen = self.screen
+        dirty: list[pygame.Rect] = []
+        if hud.blit_list() is not self._hud_blits:
+            dirty.extend(self._rebuild_background(hud))
+
+        batch: list = []
+        collect_monster_blits(sprites, monsters, batch, alpha)
+        collect_item_blits(sprites, items, batch)
+        collect_bullet_blits(sprites, bullets, batch, alpha)
+        collect_player_blits(sprites, player, time_seconds, batch, alpha)
+
+        current = set(batch)
+        for surf, pos in current.symmetric_difference(self._prev_sprites):
+            dirty.append(pygame.Rect(pos, surf.get_size()))
+        dirty.append(self._prev_facing)
+        self._prev_sprites = current
+
+        area = 0
+        if not self._needs_full:
+            bounds = screen.get_rect()
+            for rect in dirty:
+                clipped = rect.clip(bounds)
+                area += clipped.width * clipped.height
+
+        limit = self.full_redraw_ratio * self._screen_area
+        if self._needs_full or area > limit:
+            screen.blit(self.background, (0, 0))
+            screen.blits(batch, doreturn=False)
+            self._prev_facing = player.draw_facing(screen, alpha)
+            self._pending = None
+            self._needs_full = False
+            self.full_redraws += 1
+            return
+
+        background = self.background
+        for rect in dirty:
+            screen.blit(background, rect, rect)
+        # Every sprite is redrawn so overlaps with restored areas stay
+        # correct; only the dirty rects reach the display
+        screen.blits(batch, doreturn=False)
+        facing = player.draw_facing(screen, alpha)
+        dirty.append(facing)
+        self._prev_facing = facing
+        self._pending = dirty
+        self.partial_updates += 1
+
+    def present(self) -> None:
+        # Push the last render to the display: the dirty rects after a
+        # partial update, the whole window after a full redraw
+        if self._pending is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self._pending)
@@ -0,0 +1,33 @@
+from config import ENTITY_FREE_LIST_SIZE
+
+
+class FreeList:
+    # Recycles dead entities: acquire() re-initialises a released object
+    # through its reset() instead of allocating a new one
+    def __init__(self, cls: type, max_free: int = ENTITY_FREE_LIST_SIZE):
+        self.cls = cls
+        self.max_free = max(0, int(max_free))
+        self._free: list = []
+        self.created = 0
+        self.reused = 0
+
+    def __len__(self) -> int:
+        return len(self._free)
+
+    def acquire(self, *args):
+        if self._free:
+            obj = self._free.pop()
+            obj.reset(*args)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self.cls(*args)
+
+    def release(self, obj) -> None:
+        if len(self._free) < self.max_free:
+            self._free.append(obj)
+
+    def release_many(self, objs) -> None:
+        room = self.max_free - len(self._free)
+        if room > 0:
+            self._free.extend(objs[:room])
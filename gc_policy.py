@@ -0,0 +1,125 @@
+import gc
+import time
+from typing import Callable
+
+from config import (
+    FPS,
+    GC_FORCE_FACTOR,
+    GC_MIN_SLACK_SECONDS,
+)
+
+# (generation, seconds, objects collected)
+PauseCallback = Callable[[int, float, int], None]
+
+
+class GcPolicy:
+    # Keeps the cyclic collector out of gameplay frames: startup objects
+    # are frozen, automatic collection is off while playing, and the
+    # generations that would have been due are collected at the end of
+    # frames that left enough of their budget unused
+    def __init__(
+        self,
+        frame_budget: float = 1.0 / float(FPS),
+        min_slack: float = GC_MIN_SLACK_SECONDS,
+        force_factor: float = GC_FORCE_FACTOR,
+        on_pause: PauseCallback | None = None,
+    ) -> None:
+        self.frame_budget = float(frame_budget)
+        self.min_slack = float(min_slack)
+        self.force_factor = max(1.0, float(force_factor))
+        self.on_pause = on_pause
+        self.thresholds = gc.get_threshold()
+        self.active = False
+        # Running estimate of what a collection of each generation costs
+        self.estimates = [0.0005, 0.001, 0.005]
+        self.pauses = [0, 0, 0]
+        self.total_seconds = [0.0, 0.0, 0.0]
+        self.max_seconds = [0.0, 0.0, 0.0]
+        self.forced = 0
+        self._started = 0.0
+        self._was_enabled = gc.isenabled()
+
+    def _on_gc(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self._started = time.perf_counter()
+            return
+        seconds = time.perf_counter() - self._started
+        generation = info["generation"]
+        self.pauses[generation] += 1
+        self.total_seconds[generation] += seconds
+        self.max_seconds[generation] = max(
+            self.max_seconds[generation], seconds
+        )
+        estimate = self.estimates[generation]
+        self.estimates[generation] = estimate + (seconds - estimate) * 0.25
+        if self.on_pause is not None:
+            self.on_pause(generation, seconds, info["collected"])
+
+    def begin(self) -> None:
+        # Call once the game's long-lived objects exist
+        if self.active:
+            return
+        self._was_enabled = gc.isenabled()
+        gc.collect()
+        gc.freeze()
+        gc.disable()
+        gc.callbacks.append(self._on_gc)
+        self.active = True
+
+    def end(self) -> None:
+        if not self.active:
+            return
+        gc.unfreeze()
+        if self._was_enabled:
+            gc.enable()
+        gc.callbacks.remove(self._on_gc)
+        self.active = False
+
+    def due_generation(self) -> int:
+        # Mirror the interpreter's own trigger: the oldest generation
+        # whose counter has reached its threshold, or -1
+        counts = gc.get_count()
+        for generation in (2, 1, 0):
+            threshold = self.thresholds[generation]
+            if threshold and counts[generation] >= threshold:
+                return generation
+        return -1
+
+    def frame_end(self, frame_seconds: float) -> int:
+        # Returns the generation collected, or -1
+        if not self.active:
+            return -1
+        generation = self.due_generation()
+        if generation < 0:
+            return -1
+        slack = self.frame_budget - frame_seconds
+        if slack >= max(self.min_slack, self.estimates[generation]):
+            gc.collect(generation)
+            return generation
+        # Never let garbage pile up indefinitely on a busy scene
+        count = gc.get_count()[generation]
+        if count >= self.thresholds[generation] * self.force_factor:
+            self.forced += 1
+            gc.collect(generation)
+            return generation
+        return -1
+
+    def idle(self) -> None:
+        # Nothing is timed while paused, so a full collection is free
+        if self.active:
+            gc.collect()
+
+    def summary(self) -> str:
+        parts = []
+        for generation in range(3):
+            n = self.pauses[generation]
+            if not n:
+                continue
+            parts.append(
+                f"gen{generation}: {n} x "
+                f"{self.total_seconds[generation] / n * 1000.0:.2f} ms avg"
+                f", {self.max_seconds[generation] * 1000.0:.2f} ms max"
+            )
+        if self.forced:
+            parts.append(f"{self.forced} forced")
+        return "gc " + ("; ".join(parts) if parts else "idle")
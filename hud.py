@@ -0,0 +1,128 @@
+from collections import OrderedDict
+
+import pygame
+
+from config import (
+    WINDOW_WIDTH,
+    TEXT_COLOR,
+    HINT_TEXT,
+    HINT_TEXT_COLOR,
+    HUD_TEXT_CACHE_SIZE,
+)
+
+
+class TextCache:
+    def __init__(
+        self,
+        font: pygame.font.Font,
+        max_entries: int = HUD_TEXT_CACHE_SIZE,
+    ) -> None:
+        self.font = font
+        self.max_entries = max(1, int(max_entries))
+        self._surfaces: OrderedDict[
+            tuple[str, tuple[int, int, int]], pygame.Surface
+        ] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+    def render(
+        self,
+        text: str,
+        color: tuple[int, int, int] = TEXT_COLOR,
+    ) -> pygame.Surface:
+        key = (text, color)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+        surface = self.font.render(text, True, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+
+def compose_hint_block(font: pygame.font.Font) -> pygame.Surface:
+    lines = [
+        font.render(line, True, HINT_TEXT_COLOR)
+        for line in HINT_TEXT.splitlines()
+        if line
+    ]
+    line_height = font.get_linesize()
+    width = max((s.get_width() for s in lines), default=0)
+    height = line_height * (len(lines) - 1) + (
+        lines[-1].get_height() if lines else 0
+    )
+    block = pygame.Surface((max(1, width), max(1, height)), pygame.SRCALPHA)
+    # Lines share one colour, so max-blending onto a transparent fill of
+    # that colour keeps the antialiased edges exactly as rendered
+    block.fill((*HINT_TEXT_COLOR, 0))
+    y = 0
+    for surf in lines:
+        block.blit(surf, (0, y), special_flags=pygame.BLEND_RGBA_MAX)
+        y += line_height
+    return block
+
+
+class Hud:
+    def __init__(self, font: pygame.font.Font) -> None:
+        self.font = font
+        self.text = TextCache(font)
+        self.line_height = font.get_linesize()
+        self.hint_block = compose_hint_block(font)
+        self.hint_pos = (20, 20)
+        self._values: tuple | None = None
+        self._blits: list[tuple[pygame.Surface, tuple[int, int]]] = [
+            (self.hint_block, self.hint_pos)
+        ]
+
+    def update(self, player, time_seconds: float) -> bool:
+        # Only reformat and re-layout when a displayed value changes
+        values = (
+            int(time_seconds),
+            int(player.hp),
+            player.level,
+            int(player.xp),
+            int(player.xp_to_next),
+        )
+        if values == self._values:
+            return False
+        self._values = values
+        total_seconds, hp, level, xp, xp_to_next = values
+
+        minutes = total_seconds // 60
+        seconds = total_seconds % 60
+        timer_surface = self.text.render(f"{minutes:02d}:{seconds:02d}")
+        timer_pos = (WINDOW_WIDTH // 2 - timer_surface.get_width() // 2, 6)
+
+        line_h = self.line_height
+        lvl_surface = self.text.render(f"LVL: {level}")
+        lvl_pos = (WINDOW_WIDTH - lvl_surface.get_width() - 20, 6)
+
+        hp_surface = self.text.render(f"HP: {hp}")
+        hp_pos = (
+            WINDOW_WIDTH - hp_surface.get_width() - 20,
+            6 + line_h + 2,
+        )
+
+        xp_surface = self.text.render(f"XP: {xp}/{xp_to_next}")
+        xp_pos = (
+            WINDOW_WIDTH - xp_surface.get_width() - 20,
+            hp_pos[1] + line_h + 2,
+        )
+
+        self._blits = [
+            (timer_surface, timer_pos),
+            (hp_surface, hp_pos),
+            (lvl_surface, lvl_pos),
+            (xp_surface, xp_pos),
+            (self.hint_block, self.hint_pos),
+        ]
+        return True
+
+    def blit_list(self) -> list[tuple[pygame.Surface, tuple[int, int]]]:
+        return self._blits
+
+    def draw(self, screen: pygame.Surface) -> None:
+        screen.blits(self.blit_list(), doreturn=False)
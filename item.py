@@ -1,16 +1,40 @@
+import math
+
 import pygame
 
-from config import ITEM_COLOR, ITEM_SIZE
+from config import DROP_HEAL_AMOUNT, ITEM_COLOR, ITEM_SIZE
 
 
 class Item:
-    def __init__(self, x: float, y: float) -> None:
+    __slots__ = ("x", "y", "heal", "expires_at")
+
+    def __init__(
+        self,
+        x: float,
+        y: float,
+        heal: float = DROP_HEAL_AMOUNT,
+        expires_at: float = math.inf,
+    ) -> None:
+        self.reset(x, y, heal, expires_at)
+
+    def reset(
+        self,
+        x: float,
+        y: float,
+        heal: float = DROP_HEAL_AMOUNT,
+        expires_at: float = math.inf,
+    ) -> None:
         self.x = x
         self.y = y
+        self.heal = float(heal)
+        self.expires_at = expires_at
 
-    def draw(self, screen: pygame.Surface) -> None:
+    def draw(
+        self, screen: pygame.Surface, offset: tuple[int, int] = (0, 0)
+    ) -> None:
         half = ITEM_SIZE // 2
-        rect = pygame.Rect(int(self.x) - half, int(self.y) - half,
+        rect = pygame.Rect(int(self.x) - offset[0] - half,
+                           int(self.y) - offset[1] - half,
                            ITEM_SIZE, ITEM_SIZE)
         pygame.draw.rect(screen, ITEM_COLOR, rect)
         pygame.draw.rect(screen, (40, 80, 40), rect, width=2)
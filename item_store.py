@@ -0,0 +1,194 @@
+import math
+from typing import Iterable, Iterator, NamedTuple
+
+from config import (
+    ITEM_LIFETIME_SECONDS,
+    ITEM_MAX_COUNT,
+    ITEM_MAX_HEAL,
+    ITEM_MERGE_RADIUS,
+    SPATIAL_GRID_CELL_SIZE,
+)
+from item import Item
+from spatial import SpatialGrid
+from free_list import FreeList
+
+
+class ItemState(NamedTuple):
+    x: float
+    y: float
+    heal: float
+
+
+class FrozenItems:
+    # Immutable copy of a store's drops at one version, safe to read
+    # from another thread while the store keeps changing
+    def __init__(self, store: "ItemStore") -> None:
+        self.version = store.version
+        self._items = tuple(
+            ItemState(item.x, item.y, item.heal) for item in store
+        )
+
+    @classmethod
+    def of(cls, version: int, items: Iterable[ItemState]) -> "FrozenItems":
+        # From item states received elsewhere, e.g. by a spectator
+        frozen = cls.__new__(cls)
+        frozen.version = version
+        frozen._items = tuple(items)
+        return frozen
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __iter__(self) -> Iterator[ItemState]:
+        return iter(self._items)
+
+
+class ItemStore:
+    # Dropped items in drop order, indexed by an incremental spatial
+    # grid so pickup and merge queries only look at nearby cells. Every
+    # item lives the same time and merging keeps the older expiry, so
+    # the oldest item is always first and expiry stops at the first
+    # survivor.
+    def __init__(
+        self,
+        pool: FreeList | None = None,
+        lifetime: float | None = None,
+        max_count: int | None = None,
+        merge_radius: float | None = None,
+        cell_size: float = SPATIAL_GRID_CELL_SIZE,
+    ) -> None:
+        if lifetime is None:
+            lifetime = ITEM_LIFETIME_SECONDS
+        if max_count is None:
+            max_count = ITEM_MAX_COUNT
+        if merge_radius is None:
+            merge_radius = ITEM_MERGE_RADIUS
+        self.pool = pool
+        self.lifetime = float(lifetime)
+        self.max_count = int(max_count)
+        self.merge_radius = float(merge_radius)
+        self.time = 0.0
+        # Bumped on every change so renderers can reuse their blit list
+        self.version = 0
+        self.expired = 0
+        self.merged = 0
+        # dict as an ordered set: O(1) removal, iteration in drop order
+        self._items: dict[Item, None] = {}
+        self._grid = SpatialGrid(cell_size)
+        self._frozen: FrozenItems | None = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __iter__(self) -> Iterator[Item]:
+        return iter(self._items)
+
+    def frozen(self) -> FrozenItems:
+        # One shared copy per version, so consumers can tell by identity
+        # that nothing changed
+        frozen = self._frozen
+        if frozen is None or frozen.version != self.version:
+            frozen = self._frozen = FrozenItems(self)
+        return frozen
+
+    def append(self, item: Item) -> None:
+        # A new drop: merged into a nearby one that still has room,
+        # otherwise stored with a fresh expiry
+        if self.merge_radius > 0.0:
+            target = self._merge_target(item)
+            if target is not None:
+                target.heal = min(
+                    float(ITEM_MAX_HEAL), target.heal + item.heal
+                )
+                self.merged += 1
+                self.version += 1
+                self._release(item)
+                return
+        item.expires_at = (
+            self.time + self.lifetime if self.lifetime > 0.0 else math.inf
+        )
+        self._add(item)
+        if 0 < self.max_count < len(self._items):
+            self.remove(next(iter(self._items)))
+
+    def load(self, items: Iterable[Item]) -> None:
+        # Replace the contents as-is, e.g. from a snapshot; items must
+        # come in drop order
+        self.clear()
+        for item in items:
+            self._add(item)
+
+    def clear(self) -> None:
+        self._release_many(list(self._items))
+        self._items.clear()
+        self._grid.clear()
+        self.version += 1
+
+    def remove(self, item: Item) -> None:
+        del self._items[item]
+        self._grid.remove(item)
+        self.version += 1
+        self._release(item)
+
+    def advance(self, now: float) -> int:
+        # Set the clock and drop expired items; returns how many
+        self.time = now
+        if self.lifetime <= 0.0:
+            return 0
+        gone = []
+        for item in self._items:
+            if item.expires_at > now:
+                break
+            gone.append(item)
+        for item in gone:
+            self.remove(item)
+        self.expired += len(gone)
+        return len(gone)
+
+    def collect(self, x: float, y: float, reach: float) -> float:
+        # Remove every item within reach of (x, y); returns their heal
+        limit = reach * reach
+        picked = [
+            item
+            for item in self._grid.query(x, y, reach)
+            if (item.x - x) ** 2 + (item.y - y) ** 2 <= limit
+        ]
+        heal = 0.0
+        for item in picked:
+            heal += item.heal
+            self.remove(item)
+        return heal
+
+    def _merge_target(self, item: Item) -> Item | None:
+        x = item.x
+        y = item.y
+        best = None
+        best_d2 = self.merge_radius * self.merge_radius
+        for other in self._grid.query(x, y, self.merge_radius):
+            if other.heal >= ITEM_MAX_HEAL:
+                continue
+            d2 = (other.x - x) ** 2 + (other.y - y) ** 2
+            if d2 <= best_d2:
+                best = other
+                best_d2 = d2
+        return best
+
+    def _add(self, item: Item) -> None:
+        self._items[item] = None
+        self._grid.insert(item, item.x, item.y)
+        self.version += 1
+
+    def _release(self, item: Item) -> None:
+        if self.pool is not None:
+            self.pool.release(item)
+
+    def _release_many(self, items: list[Item]) -> None:
+        if self.pool is not None:
+            self.pool.release_many(items)
+
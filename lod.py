@@ -0,0 +1,133 @@
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from config import (
+    MONSTER_LOD_TIERS,
+    WINDOW_WIDTH,
+    WINDOW_HEIGHT,
+    WORLD_WIDTH,
+    WORLD_HEIGHT,
+)
+from camera import Camera
+from player import Player
+from monster import Monster
+from monster_store import MonsterStore
+
+
+class LodPlan(NamedTuple):
+    # Per-monster time to simulate this tick, 0.0 for monsters whose
+    # update is deferred; a list, or an array for the numpy store
+    step_seconds: list[float] | np.ndarray
+    # Indices taking part in pairwise separation, or None for all; only
+    # monsters updated this tick, in tiers that separate
+    separate: list[int] | None
+
+
+class LodScheduler:
+    # Sorts monsters into tiers each tick by how far they are outside
+    # the view a camera following the player would show. A tier with
+    # period N updates a monster on one tick in N, with the buckets
+    # staggered by index so the work is spread evenly; the monster then
+    # steps by all the time it has accumulated, so slow tiers move just
+    # as far and never drift.
+    def __init__(
+        self,
+        tiers=None,
+        view: tuple[int, int] = (WINDOW_WIDTH, WINDOW_HEIGHT),
+        world: tuple[float, float] = (WORLD_WIDTH, WORLD_HEIGHT),
+    ) -> None:
+        if tiers is None:
+            tiers = MONSTER_LOD_TIERS
+        tiers = sorted(tiers, key=lambda tier: tier[0])
+        if not tiers:
+            raise ValueError("LOD needs at least one tier")
+        if int(tiers[0][1]) != 1 or not tiers[0][2]:
+            # Anything on screen must move and separate every tick, or
+            # interpolation shows it stalling and jumping
+            raise ValueError("the nearest LOD tier must be full rate")
+        self.camera = Camera(view[0], view[1], world[0], world[1])
+        self.limits = np.array([float(t[0]) for t in tiers[:-1]])
+        self.periods = np.array(
+            [max(1, int(t[1])) for t in tiers], dtype=np.int64
+        )
+        self.separates = np.array([bool(t[2]) for t in tiers])
+        self._limits = self.limits.tolist()
+        self._periods = self.periods.tolist()
+        self._separates = self.separates.tolist()
+        # Monsters per tier in the last plan, nearest first
+        self.tier_counts = [0] * len(tiers)
+
+    def _view(self, player: Player) -> tuple[float, float, float, float]:
+        # Tier distances are measured from this rectangle, 0 inside it
+        camera = self.camera
+        camera.follow(player.x, player.y)
+        return camera.bounds()
+
+    def plan(
+        self,
+        monsters: list[Monster] | MonsterStore,
+        player: Player,
+        frame: int,
+        dt_seconds: float,
+    ) -> LodPlan:
+        if isinstance(monsters, MonsterStore):
+            return self._plan_store(monsters, player, frame, dt_seconds)
+        limits = self._limits
+        periods = self._periods
+        separates = self._separates
+        counts = [0] * len(periods)
+        left, top, right, bottom = self._view(player)
+        steps: list[float] = []
+        separate: list[int] = []
+        for i, m in enumerate(monsters):
+            x = m.x
+            y = m.y
+            dist = math.hypot(
+                left - x if x < left else max(x - right, 0.0),
+                top - y if y < top else max(y - bottom, 0.0),
+            )
+            tier = 0
+            while tier < len(limits) and dist > limits[tier]:
+                tier += 1
+            counts[tier] += 1
+            owed = m.lod_dt + dt_seconds
+            if (frame + i) % periods[tier] == 0:
+                steps.append(owed)
+                m.lod_dt = 0.0
+                if separates[tier]:
+                    separate.append(i)
+            else:
+                steps.append(0.0)
+                m.lod_dt = owed
+        self.tier_counts = counts
+        if len(separate) == len(steps):
+            return LodPlan(steps, None)
+        return LodPlan(steps, separate)
+
+    def _plan_store(
+        self,
+        store: MonsterStore,
+        player: Player,
+        frame: int,
+        dt_seconds: float,
+    ) -> LodPlan:
+        n = len(store)
+        left, top, right, bottom = self._view(player)
+        dist = np.hypot(
+            np.maximum(np.maximum(left - store.x, store.x - right), 0.0),
+            np.maximum(np.maximum(top - store.y, store.y - bottom), 0.0),
+        )
+        tier = np.searchsorted(self.limits, dist, side="left")
+        self.tier_counts = np.bincount(
+            tier, minlength=len(self.periods)
+        ).tolist()
+        due = (frame + np.arange(n)) % self.periods[tier] == 0
+        owed = store.lod_dt + dt_seconds
+        steps = np.where(due, owed, 0.0)
+        store.lod_dt[:] = np.where(due, 0.0, owed)
+        separate = due & self.separates[tier]
+        if separate.all():
+            return LodPlan(steps, None)
+        return LodPlan(steps, np.flatnonzero(separate).tolist())
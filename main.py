@@ -1,28 +1,73 @@
+import os
 import sys
-import math
-import random
+import time
+
+# Taken before the heavy imports, so the startup report covers them
+LAUNCH_TIME = time.perf_counter()
+
+from typing import NamedTuple
+
 import pygame
 
 from config import *
 from player import Player
 from monster import Monster
+from monster_store import MonsterStore
 from bullet import Bullet
-from item import Item
-
-
-def handle_frame_events() -> tuple[bool, bool]:
-    quit_requested = False
-    pause_requested = False
+from bullet_pool import BulletPool
+from item_store import ItemStore
+from hud import Hud
+from dirty_render import DirtyRectRenderer
+from profiler import FrameProfiler, PhaseTimer
+from profiler_overlay import ProfilerOverlay
+from sprites import (
+    SpriteCache,
+    WorldBackdrop,
+    collect_bullet_blits,
+    collect_item_blits,
+    collect_monster_blits,
+    collect_player_blits,
+    scene_backdrop,
+)
+from simulation import (
+    FixedStepDriver,
+    FrameInput,
+    Simulation,
+    normalize_move,
+)
+from replay import ReplayRecorder
+from snapshot import restore_snapshot_file, save_snapshot
+from gc_policy import GcPolicy
+from camera import Camera
+from pipeline import PipelinedDriver
+from assets import get_font, static_text
+from broadcast import Broadcaster
+
+
+class FrameEvents(NamedTuple):
+    quit_requested: bool = False
+    pause_requested: bool = False
+    profiler_toggled: bool = False
+    save_requested: bool = False
+    load_requested: bool = False
+
+
+def handle_frame_events(hotkeys: dict[int, str]) -> FrameEvents:
+    # hotkeys maps a key code to the FrameEvents field it sets
+    flags: dict[str, bool] = {}
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
-            quit_requested = True
+            flags["quit_requested"] = True
         elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE:
-                pause_requested = True
-    return quit_requested, pause_requested
+                flags["pause_requested"] = True
+            elif event.key in hotkeys:
+                action = hotkeys[event.key]
+                flags[action] = not flags.get(action, False)
+    return FrameEvents(**flags)
 
 
-def compute_move_vector() -> tuple[float, float]:
+def read_move_keys() -> tuple[int, int]:
     keys = pygame.key.get_pressed()
     move_x = (
         (keys[pygame.K_d] or keys[pygame.K_RIGHT])
@@ -32,38 +77,34 @@ def compute_move_vector() -> tuple[float, float]:
         (keys[pygame.K_s] or keys[pygame.K_DOWN])
         - (keys[pygame.K_w] or keys[pygame.K_UP])
     )
+    return int(move_x), int(move_y)
 
-    if move_x or move_y:
-        length = math.hypot(move_x, move_y)
-        move_x /= length
-        move_y /= length
 
-    return float(move_x), float(move_y)
+def compute_move_vector() -> tuple[float, float]:
+    return normalize_move(*read_move_keys())
 
 
  
 
 
-def compose_hint_surfaces(
-    font: pygame.font.Font,
-) -> tuple[list[pygame.Surface], int]:
-    hint_lines = [
-        font.render(line, True, HINT_TEXT_COLOR)
-        for line in HINT_TEXT.splitlines()
-        if line
-    ]
-    return hint_lines, font.get_linesize()
+def draw_main_menu(screen: pygame.Surface, show_prompt: bool) -> None:
+    title = static_text(get_font(42), MENU_TITLE)
+    prompt = static_text(get_font(24), MENU_START_PROMPT)
+    screen.fill(BACKGROUND_COLOR)
+    # Center title
+    tx = WINDOW_WIDTH // 2 - title.get_width() // 2
+    ty = WINDOW_HEIGHT // 3 - title.get_height() // 2
+    screen.blit(title, (tx, ty))
+    if show_prompt:
+        px = WINDOW_WIDTH // 2 - prompt.get_width() // 2
+        py = ty + title.get_height() + 28
+        screen.blit(prompt, (px, py))
 
 
 def show_main_menu(
     screen: pygame.Surface,
     clock: pygame.time.Clock,
 ) -> bool:
-    font_big = pygame.font.SysFont(FONT_NAME, 42)
-    font_small = pygame.font.SysFont(FONT_NAME, 24)
-    title = font_big.render(MENU_TITLE, True, TEXT_COLOR)
-    prompt = font_small.render(MENU_START_PROMPT, True, TEXT_COLOR)
-
     blink_timer = 0.0
     show_prompt = True
 
@@ -86,15 +127,7 @@ def show_main_menu(
             if event.type == pygame.MOUSEBUTTONDOWN:
                 return True
 
-        screen.fill(BACKGROUND_COLOR)
-        # Center title
-        tx = WINDOW_WIDTH // 2 - title.get_width() // 2
-        ty = WINDOW_HEIGHT // 3 - title.get_height() // 2
-        screen.blit(title, (tx, ty))
-        if show_prompt:
-            px = WINDOW_WIDTH // 2 - prompt.get_width() // 2
-            py = ty + title.get_height() + 28
-            screen.blit(prompt, (px, py))
+        draw_main_menu(screen, show_prompt)
         pygame.display.flip()
 
 
@@ -103,9 +136,9 @@ def show_pause_menu(
     clock: pygame.time.Clock,
     font: pygame.font.Font,
 ) -> str:
-    title = font.render("Paused", True, TEXT_COLOR)
-    opt_continue = font.render("ENTER: Continue", True, TEXT_COLOR)
-    opt_main = font.render("ESC: Main Menu", True, TEXT_COLOR)
+    title = static_text(font, "Paused")
+    opt_continue = static_text(font, "ENTER: Continue")
+    opt_main = static_text(font, "ESC: Main Menu")
     while True:
         dt_ms = clock.tick(FPS)
         _ = dt_ms
@@ -133,549 +166,333 @@ def show_pause_menu(
 
 def render_scene(
     screen: pygame.Surface,
-    hint_surfaces: list[pygame.Surface],
-    hint_line_height: int,
+    hud: Hud,
+    sprites: SpriteCache,
     player: Player,
     time_seconds: float,
-    monsters: list[Monster],
-    bullets: list[Bullet],
-    items: list[Item],
-    timer_surface: pygame.Surface,
-    timer_pos: tuple[int, int],
-    hp_surface: pygame.Surface,
-    hp_pos: tuple[int, int],
-    lvl_surface: pygame.Surface,
-    lvl_pos: tuple[int, int],
-    xp_surface: pygame.Surface,
-    xp_pos: tuple[int, int],
+    monsters: list[Monster] | MonsterStore,
+    bullets: list[Bullet] | BulletPool,
+    items: ItemStore,
+    alpha: float = 1.0,
+    backdrop: pygame.Surface | WorldBackdrop | None = None,
+    camera: Camera | None = None,
 ) -> None:
-    screen.fill(BACKGROUND_COLOR)
-
-    screen.blit(timer_surface, timer_pos)
-    screen.blit(hp_surface, hp_pos)
-    screen.blit(lvl_surface, lvl_pos)
-    screen.blit(xp_surface, xp_pos)
-
-    y = 20
-    for surf in hint_surfaces:
-        screen.blit(surf, (20, y))
-        y += hint_line_height
-
-    for monster in monsters:
-        monster.draw(screen)
-
-    for item in items:
-        item.draw(screen)
-
-    for bullet in bullets:
-        bullet.draw(screen)
-
-    player.draw(screen, time_seconds)
-
-    pygame.display.flip()
-
-
-def generate_monster(player: Player) -> Monster:
-    # Try random positions away from the player
-    for _ in range(32):
-        x = random.uniform(16.0, float(WINDOW_WIDTH - 16))
-        y = random.uniform(16.0, float(WINDOW_HEIGHT - 16))
-        if (
-            math.hypot(x - player.x, y - player.y)
-            >= MONSTER_MIN_DISTANCE_FROM_PLAYER
-        ):
-            return Monster(
-                x,
-                y,
-                float(MONSTER_SPEED),
-                float(MONSTER_RADIUS),
-                MONSTER_COLOR,
-                float(MONSTER_MAX_HP),
-            )
-
-    # Fallback: place near a corner far from player
-    x = 16.0 if player.x > WINDOW_WIDTH / 2 else float(WINDOW_WIDTH - 16)
-    y = 16.0 if player.y > WINDOW_HEIGHT / 2 else float(WINDOW_HEIGHT - 16)
-    return Monster(
-        x,
-        y,
-        float(MONSTER_SPEED),
-        float(MONSTER_RADIUS),
-        MONSTER_COLOR,
-        float(MONSTER_MAX_HP),
-    )
-
-
-def generate_boss(player: Player) -> Monster:
-    # Integer scale with player level: floor(level / step), min 1
-    scale = max(1, int(player.level) // int(BOSS_SPAWN_LEVEL_STEP))
-    base_radius = float(BOSS_RADIUS)
-    scaled_hp = float(BOSS_MAX_HP) * float(scale)
-    # Spawn far from player near edges
-    for _ in range(32):
-        x = random.uniform(16.0, float(WINDOW_WIDTH - 16))
-        y = random.uniform(16.0, float(WINDOW_HEIGHT - 16))
-        if (
-            math.hypot(x - player.x, y - player.y)
-            >= MONSTER_MIN_DISTANCE_FROM_PLAYER
-        ):
-            return Monster(
-                x,
-                y,
-                float(BOSS_SPEED),
-                base_radius,
-                BOSS_COLOR,
-                scaled_hp,
-            )
-    # Fallback: corner
-    x = 16.0 if player.x > WINDOW_WIDTH / 2 else float(WINDOW_WIDTH - 16)
-    y = 16.0 if player.y > WINDOW_HEIGHT / 2 else float(WINDOW_HEIGHT - 16)
-    return Monster(
-        x,
-        y,
-        float(BOSS_SPEED),
-        base_radius,
-        BOSS_COLOR,
-        scaled_hp,
+    if backdrop is None:
+        screen.fill(BACKGROUND_COLOR)
+    elif isinstance(backdrop, WorldBackdrop):
+        backdrop.draw(screen, camera)
+    else:
+        screen.blit(backdrop, (0, 0))
+
+    # HUD and every entity sprite in view go out in a single blits()
+    # call
+    batch = list(hud.blit_list())
+    collect_monster_blits(sprites, monsters, batch, alpha, camera)
+    collect_item_blits(sprites, items, batch, camera)
+    collect_bullet_blits(sprites, bullets, batch, alpha, camera)
+    collect_player_blits(
+        sprites, player, time_seconds, batch, alpha, camera
     )
-
-
-def apply_monster_damage(
-    player: Player,
-    monsters: list[Monster],
-    dt_seconds: float,
-) -> None:
-    damage_total = 0.0
-    for m in monsters:
-        if math.hypot(player.x - m.x, player.y - m.y) <= (
-            float(PLAYER_RADIUS) + float(m.radius) + PLAYER_MONSTER_PADDING
-        ):
-            damage_total += MONSTER_DAMAGE_PER_SECOND * dt_seconds
-    if damage_total > 0.0:
-        player.take_damage(damage_total)
-
-
-def separate_monsters(monsters: list[Monster]) -> None:
-    if len(monsters) <= 1:
-        return
-    # Per-pair min distance using each entity's radius
-    for _ in range(MONSTER_SEPARATION_PASSES):
-        for i in range(len(monsters)):
-            mi = monsters[i]
-            for j in range(i + 1, len(monsters)):
-                mj = monsters[j]
-                dx = mj.x - mi.x
-                dy = mj.y - mi.y
-                dist = math.hypot(dx, dy)
-                if dist < 1e-6:
-                    # tiny nudge to avoid zero division
-                    dx, dy, dist = 1.0, 0.0, 1.0
-                min_dist = (
-                    float(mi.radius)
-                    + float(mj.radius)
-                    + MONSTER_SEPARATION_PADDING
-                )
-                if dist < min_dist:
-                    overlap = float(min_dist - dist) * 0.5
-                    nx = dx / dist
-                    ny = dy / dist
-                    mi.x -= nx * overlap
-                    mi.y -= ny * overlap
-                    mj.x += nx * overlap
-                    mj.y += ny * overlap
-                    # clamp to screen
-                    mi.x = max(
-                        16.0 + float(mi.radius),
-                        min(
-                            float(
-                                WINDOW_WIDTH - 16 - float(mi.radius)
-                            ),
-                            mi.x,
-                        ),
-                    )
-                    mi.y = max(
-                        16.0 + float(mi.radius),
-                        min(
-                            float(
-                                WINDOW_HEIGHT - 16 - float(mi.radius)
-                            ),
-                            mi.y,
-                        ),
-                    )
-                    mj.x = max(
-                        16.0 + float(mj.radius),
-                        min(
-                            float(
-                                WINDOW_WIDTH - 16 - float(mj.radius)
-                            ),
-                            mj.x,
-                        ),
-                    )
-                    mj.y = max(
-                        16.0 + float(mj.radius),
-                        min(
-                            float(
-                                WINDOW_HEIGHT - 16 - float(mj.radius)
-                            ),
-                            mj.y,
-                        ),
-                    )
-
-
-def separate_player_and_monsters(
-    player: Player,
-    monsters: list[Monster],
-) -> None:
-    for m in monsters:
-        dx = m.x - player.x
-        dy = m.y - player.y
-        dist = math.hypot(dx, dy)
-        if dist < 1e-6:
-            dx, dy, dist = 1.0, 0.0, 1.0
-        min_dist = (
-            float(PLAYER_RADIUS)
-            + float(m.radius)
-            + PLAYER_MONSTER_PADDING
-        )
-        if dist < min_dist:
-            overlap = float(min_dist - dist)
-            nx = dx / dist
-            ny = dy / dist
-            m.x += nx * overlap
-            m.y += ny * overlap
-            # clamp to screen
-            m.x = max(
-                16.0 + float(m.radius),
-                min(
-                    float(WINDOW_WIDTH - 16 - float(m.radius)),
-                    m.x,
-                ),
-            )
-            m.y = max(
-                16.0 + float(m.radius),
-                min(
-                    float(
-                        WINDOW_HEIGHT - 16 - float(m.radius)
-                    ),
-                    m.y,
-                ),
-            )
-
-
-def update_monsters(
-    monsters: list[Monster],
-    player: Player,
-    dt_seconds: float,
-) -> None:
-    for monster in monsters:
-        monster.update_towards(player, dt_seconds)
-
-
-def compute_spawn_interval(elapsed_seconds: float) -> float:
-    # Decrease interval every full minute by a fixed step,
-    # down to a minimum cap.
-    period = float(MONSTER_SPAWN_SCALING_PERIOD_SECONDS)
-    minutes = int(elapsed_seconds // period)
-    interval = (
-        MONSTER_SPAWN_INTERVAL_SECONDS
-        - minutes * MONSTER_SPAWN_INTERVAL_STEP_SECONDS
+    screen.blits(batch, doreturn=False)
+    player.draw_facing(
+        screen, alpha, camera.offset if camera is not None else (0, 0)
     )
-    if interval < MONSTER_SPAWN_INTERVAL_MIN_SECONDS:
-        interval = MONSTER_SPAWN_INTERVAL_MIN_SECONDS
-    return float(interval)
 
 
 def initialize_game(
     screen: pygame.Surface,
     clock: pygame.time.Clock,
+    seed: int | None = None,
 ) -> tuple[
     pygame.Surface,
     pygame.time.Clock,
     pygame.font.Font,
-    list[pygame.Surface],
-    int,
-    Player,
-    list[Monster],
-    list[Bullet],
-    list[Item],
-    int,
+    Hud,
+    SpriteCache,
+    Simulation,
 ]:
-    font = pygame.font.SysFont(FONT_NAME, 28)
-    hint_surfaces, hint_line_height = compose_hint_surfaces(
-        font
-    )
-
-    player = Player(
-        float(WINDOW_WIDTH // 2),
-        float(WINDOW_HEIGHT // 2),
-        float(PLAYER_BASE_SPEED),
-    )
+    font = get_font(28)
 
     return (
         screen,
         clock,
         font,
-        hint_surfaces,
-        hint_line_height,
-        player,
-        [],
-        [],
-        [],
-        int(BOSS_SPAWN_LEVEL_STEP),
+        Hud(font),
+        SpriteCache(),
+        Simulation(seed),
     )
 
 
+def read_aim(camera: Camera | None = None) -> tuple[int, int]:
+    # Mouse cursor in world pixels
+    mouse_x, mouse_y = pygame.mouse.get_pos()
+    if camera is not None:
+        return camera.to_world(mouse_x, mouse_y)
+    return mouse_x, mouse_y
+
+
+def read_frame_input(camera: Camera | None = None) -> FrameInput:
+    move_x, move_y = compute_move_vector()
+    # Face towards mouse cursor
+    mouse_x, mouse_y = read_aim(camera)
+    return FrameInput(move_x, move_y, float(mouse_x), float(mouse_y))
+
+
+def read_recorded_input(
+    recorder: ReplayRecorder,
+    dt_ms: int,
+    paused: bool,
+    camera: Camera | None = None,
+) -> FrameInput:
+    # Same as read_frame_input, but logs the raw keys and the aim point
+    # first; the aim is in world pixels so playback needs no camera
+    move = read_move_keys()
+    mouse_x, mouse_y = read_aim(camera)
+    recorder.record(dt_ms, move, (mouse_x, mouse_y), paused)
+    move_x, move_y = normalize_move(*move)
+    return FrameInput(move_x, move_y, float(mouse_x), float(mouse_y))
+
+
 def game_loop(
     screen: pygame.Surface,
     clock: pygame.time.Clock,
     font: pygame.font.Font,
-    hint_surfaces: list[pygame.Surface],
-    hint_line_height: int,
-    player: Player,
-    monsters: list[Monster],
-    bullets: list[Bullet],
-    items: list[Item],
-    next_boss_level: int,
+    hud: Hud,
+    sprites: SpriteCache,
+    sim: Simulation,
+    gc_policy: GcPolicy | None = None,
+    broadcaster: Broadcaster | None = None,
 ) -> str:
+    driver = FixedStepDriver(sim)
+    camera = Camera(*screen.get_size())
+    camera.follow(sim.player.x, sim.player.y)
+    backdrop = scene_backdrop(sim.tile_map, camera, screen.get_size())
+    # Dirty rects only pay off while the view holds still
+    dirty_renderer = (
+        DirtyRectRenderer(screen, backdrop=backdrop)
+        if DIRTY_RECT_RENDERING and not camera.scrolls
+        else None
+    )
+    profiler = FrameProfiler()
+    sim.profiler = profiler
+    # Pipelined, the worker simulates frame N+1 while frame N is drawn
+    # from its captured state; otherwise the live simulation is drawn
+    pipeline = (
+        PipelinedDriver(driver, profiler) if PIPELINED_RENDERING else None
+    )
+    view = pipeline.front if pipeline is not None else sim
+    hotkeys = {
+        pygame.key.key_code(PROFILER_TOGGLE_KEY): "profiler_toggled",
+        pygame.key.key_code(SNAPSHOT_SAVE_KEY): "save_requested",
+        pygame.key.key_code(SNAPSHOT_LOAD_KEY): "load_requested",
+    }
+    overlay: ProfilerOverlay | None = None
+    recorder = (
+        ReplayRecorder(REPLAY_RECORD_PATH, sim, driver)
+        if REPLAY_RECORD_PATH
+        else None
+    )
 
-    time_accumulator = 0.0
-    next_spawn_time = compute_spawn_interval(0.0)
-    next_shot_time = 0.0
-    next_volley_time = 0.0
-
-    while True:
-        dt_ms = clock.tick(FPS)
-        dt = dt_ms / 1000.0
-        time_accumulator += dt
-
-        quit_requested, pause_requested = handle_frame_events()
-        if quit_requested:
-            return "exit"
-        if pause_requested:
-            pause_result = show_pause_menu(screen, clock, font)
-            if pause_result == "exit":
+    try:
+        while True:
+            dt_ms = clock.tick(FPS)
+            dt = dt_ms / 1000.0
+            profiler.begin_frame()
+
+            events = handle_frame_events(hotkeys)
+            if pipeline is not None:
+                # The simulation is only safe to touch once the worker
+                # is done with it
+                view = pipeline.wait()
+                profiler.mark("sim_wait")
+            if events.quit_requested:
                 return "exit"
-            if pause_result == "main_menu":
-                return "main_menu"
-
-        move_x, move_y = compute_move_vector()
-        player.update(move_x, move_y, dt)
-
-        # Face towards mouse cursor
-        mouse_x, mouse_y = pygame.mouse.get_pos()
-        player.update_facing_towards(
-            float(mouse_x), float(mouse_y)
-        )
-
-        while time_accumulator >= next_spawn_time:
-            monsters.append(generate_monster(player))
-            next_spawn_time += compute_spawn_interval(
-                time_accumulator
-            )
-
-        # Boss spawn on level milestones
-        if player.level >= next_boss_level:
-            monsters.append(generate_boss(player))
-            next_boss_level += int(BOSS_SPAWN_LEVEL_STEP)
-
-        update_monsters(monsters, player, dt)
-
-        separate_monsters(monsters)
-        separate_player_and_monsters(player, monsters)
-
-        apply_monster_damage(player, monsters, dt)
-
-        # Shooting continuously from facing direction
-        while time_accumulator >= next_shot_time:
-            fx, fy = player.get_facing()
-            if not fx and not fy:
-                fx, fy = 1.0, 0.0
-            vx = fx * BULLET_SPEED
-            vy = fy * BULLET_SPEED
-            mx, my = player.get_muzzle_position()
-            bullets.append(Bullet(mx, my, vx, vy))
-            next_shot_time += BULLET_COOLDOWN_SECONDS
-
-        # Volley attack on its own cooldown
-        while time_accumulator >= next_volley_time:
-            fx, fy = player.get_facing()
-            if not fx and not fy:
-                fx, fy = 1.0, 0.0
-            mx, my = player.get_muzzle_position()
-            # Create symmetric angle offsets around 0\n
-            count = int(VOLLEY_BULLET_COUNT)
-            spread_deg = float(VOLLEY_SPREAD_DEGREES)
-            if count <= 1:
-                offsets = [0.0]
-            else:
-                step = spread_deg / float(count - 1)
-                start = -spread_deg / 2.0
-                offsets = [start + i * step for i in range(count)]
-            for deg in offsets:
-                rad = math.radians(deg)
-                cos_a = math.cos(rad)
-                sin_a = math.sin(rad)
-                rx = fx * cos_a - fy * sin_a
-                ry = fx * sin_a + fy * cos_a
-                bvx = rx * float(VOLLEY_BULLET_SPEED)
-                bvy = ry * float(VOLLEY_BULLET_SPEED)
-                bullets.append(Bullet(mx, my, bvx, bvy))
-            next_volley_time += float(VOLLEY_COOLDOWN_SECONDS)
-
-        # Update bullets and remove off-screen
-        alive_bullets: list[Bullet] = []
-        for b in bullets:
-            b.update(dt)
-            if (
-                b.x < -BULLET_RADIUS
-                or b.x > WINDOW_WIDTH + BULLET_RADIUS
-                or b.y < -BULLET_RADIUS
-                or b.y > WINDOW_HEIGHT + BULLET_RADIUS
+            if events.pause_requested:
+                if gc_policy is not None:
+                    gc_policy.idle()
+                pause_result = show_pause_menu(screen, clock, font)
+                if pause_result == "exit":
+                    return "exit"
+                if pause_result == "main_menu":
+                    return "main_menu"
+                if dirty_renderer is not None:
+                    dirty_renderer.invalidate()
+            if events.save_requested:
+                save_snapshot(sim, SNAPSHOT_PATH)
+            if events.load_requested and os.path.exists(SNAPSHOT_PATH):
+                if recorder is not None:
+                    # A replay cannot represent the jump; end it here
+                    recorder.close(sim)
+                    recorder = None
+                restore_snapshot_file(sim, SNAPSHOT_PATH)
+                driver.accumulator = 0.0
+                if pipeline is not None:
+                    pipeline.recapture()
+            if events.profiler_toggled:
+                if overlay is None:
+                    overlay = ProfilerOverlay()
+                overlay.toggle()
+            show_overlay = overlay is not None and overlay.visible
+            if dirty_renderer is not None and (
+                show_overlay or events.profiler_toggled
             ):
-                continue
-            alive_bullets.append(b)
-        bullets[:] = alive_bullets
-
-        # Bullet collisions
-        new_monsters: list[Monster] = []
-        for m in monsters:
-            hit = False
-            for b in list(bullets):
-                if (
-                    math.hypot(m.x - b.x, m.y - b.y)
-                    <= (float(m.radius) + BULLET_RADIUS)
-                ):
-                    m.take_damage(
-                        player.get_bullet_damage()
-                    )
-                    bullets.remove(b)
-                    hit = True
-                    if m.hp <= 0.0:
-                        player.gain_xp(float(MONSTER_XP_ON_KILL))
-                        if random.random() < float(DROP_CHANCE):
-                            items.append(Item(m.x, m.y))
-                    break
-            if m.hp > 0.0:
-                new_monsters.append(m)
-        monsters[:] = new_monsters
-
-        # Item pickups
-        kept_items: list[Item] = []
-        for it in items:
-            dist = math.hypot(player.x - it.x, player.y - it.y)
-            if dist <= float(PLAYER_RADIUS + ITEM_SIZE):
-                player.hp = min(
-                    float(PLAYER_MAX_HP),
-                    player.hp + float(DROP_HEAL_AMOUNT),
+                # The overlay is not part of the dirty-rect bookkeeping
+                dirty_renderer.invalidate()
+            profiler.mark("events")
+            if broadcaster is not None:
+                # Before submit(), so safe to read even when pipelined
+                broadcaster.publish(sim)
+                profiler.mark("broadcast")
+
+            if recorder is not None:
+                inputs = read_recorded_input(
+                    recorder, dt_ms, events.pause_requested, camera
                 )
             else:
-                kept_items.append(it)
-        items[:] = kept_items
-
-        # Timer string and surface
-        total_seconds = int(time_accumulator)
-        minutes = total_seconds // 60
-        seconds = total_seconds % 60
-        timer_text = f"{minutes:02d}:{seconds:02d}"
-        timer_surface = font.render(
-            timer_text, True, TEXT_COLOR
-        )
-        timer_x = (
-            WINDOW_WIDTH // 2
-            - timer_surface.get_width() // 2
-        )
-        timer_y = 6
-
-        # HP string and surface
-        hp_text = f"HP: {int(player.hp)}"
-        hp_surface = font.render(hp_text, True, TEXT_COLOR)
-        line_h = font.get_linesize()
-        hp_x = (
-            WINDOW_WIDTH - hp_surface.get_width() - 20
-        )
-        hp_pos = (hp_x, 6 + line_h + 2)
-
-        # Level above HP
-        lvl_text = f"LVL: {player.level}"
-        lvl_surface = font.render(lvl_text, True, TEXT_COLOR)
-        lvl_x = (
-            WINDOW_WIDTH - lvl_surface.get_width() - 20
-        )
-        lvl_pos = (lvl_x, 6)
-
-        # XP below HP
-        xp_text = (
-            f"XP: {int(player.xp)}/"
-            f"{int(player.xp_to_next)}"
-        )
-        xp_surface = font.render(xp_text, True, TEXT_COLOR)
-        xp_x = (
-            WINDOW_WIDTH - xp_surface.get_width() - 20
-        )
-        xp_pos = (xp_x, hp_pos[1] + line_h + 2)
-
-        render_scene(
-            screen,
-            hint_surfaces,
-            hint_line_height,
-            player,
-            time_accumulator,
-            monsters,
-            bullets,
-            items,
-            timer_surface,
-            (timer_x, timer_y),
-            hp_surface,
-            hp_pos,
-            lvl_surface,
-            lvl_pos,
-            xp_surface,
-            xp_pos,
-        )
-
+                inputs = read_frame_input(camera)
+            if pipeline is not None:
+                pipeline.submit(dt, inputs)
+                # Captured positions are already interpolated
+                alpha = 1.0
+            else:
+                alpha = driver.advance(dt, inputs)
+            camera.follow(*view.player.lerp_position(alpha))
+            profiler.start()
+            hud.update(view.player, view.time)
+            profiler.mark("hud")
+
+            if dirty_renderer is not None:
+                dirty_renderer.render(
+                    hud,
+                    sprites,
+                    view.player,
+                    view.time,
+                    view.monsters,
+                    view.bullets,
+                    view.items,
+                    alpha,
+                )
+            else:
+                render_scene(
+                    screen,
+                    hud,
+                    sprites,
+                    view.player,
+                    view.time,
+                    view.monsters,
+                    view.bullets,
+                    view.items,
+                    alpha,
+                    backdrop,
+                    camera,
+                )
+            if show_overlay:
+                overlay.draw(screen, profiler)
+            profiler.mark("render_scene")
 
-def run() -> None:
-    pygame.init()
+            if dirty_renderer is not None:
+                dirty_renderer.present()
+            else:
+                pygame.display.flip()
+            profiler.mark("flip")
+            if gc_policy is not None:
+                gc_policy.frame_end(profiler.frame_elapsed())
+                profiler.mark("gc")
+            profiler.end_frame(
+                len(view.monsters), len(view.bullets), len(view.items)
+            )
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+        if recorder is not None:
+            recorder.close(sim)
+        if PROFILER_CSV_PATH:
+            profiler.dump_csv(PROFILER_CSV_PATH)
+
+
+def report_startup(startup: PhaseTimer) -> str:
+    phases = ", ".join(
+        f"{phase} {sum(samples) * 1000.0:.1f}"
+        for phase, samples in startup.samples.items()
+    )
+    total = sum(sum(samples) for samples in startup.samples.values())
+    return f"startup: {total * 1000.0:.1f} ms to the menu ({phases})"
+
+
+def run(startup_only: bool = False) -> None:
+    # Timed from LAUNCH_TIME up to the first menu frame on screen
+    startup = None
+    if STARTUP_REPORT or startup_only:
+        startup = PhaseTimer()
+        startup.start(LAUNCH_TIME)
+        startup.mark("imports")
+    # Only the subsystems the game uses; pygame.init() would also open
+    # the audio device and scan for joysticks
+    pygame.display.init()
+    pygame.font.init()
+    if startup is not None:
+        startup.mark("pygame_init")
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     pygame.display.set_caption(WINDOW_CAPTION)
     clock = pygame.time.Clock()
-
-    while True:
-        if not show_main_menu(screen, clock):
-            break
-
-        (
-            screen,
-            clock,
-            font,
-            hint_surfaces,
-            hint_line_height,
-            player,
-            monsters,
-            bullets,
-        items,
-            next_boss_level,
-    ) = initialize_game(screen, clock)
-
-        result = game_loop(
-            screen,
-            clock,
-            font,
-            hint_surfaces,
-            hint_line_height,
-            player,
-            monsters,
-            bullets,
-            items,
-            next_boss_level,
-        )
-        if result == "exit":
-            break
-        # If main_menu requested, loop to show main menu again
-
+    if startup is not None:
+        startup.mark("display")
+        get_font(42)
+        get_font(24)
+        startup.mark("fonts")
+        draw_main_menu(screen, True)
+        pygame.display.flip()
+        startup.mark("first_frame")
+        print(report_startup(startup))
+        if startup_only:
+            pygame.quit()
+            return
+
+    broadcaster = (
+        Broadcaster(BROADCAST_ADDRESS) if BROADCAST_ADDRESS else None
+    )
+    try:
+        while True:
+            if not show_main_menu(screen, clock):
+                break
+
+            (
+                screen,
+                clock,
+                font,
+                hud,
+                sprites,
+                sim,
+            ) = initialize_game(screen, clock)
+
+            gc_policy = GcPolicy() if GC_POLICY_ENABLED else None
+            if gc_policy is not None:
+                gc_policy.begin()
+            try:
+                result = game_loop(
+                    screen,
+                    clock,
+                    font,
+                    hud,
+                    sprites,
+                    sim,
+                    gc_policy,
+                    broadcaster,
+                )
+            finally:
+                if gc_policy is not None:
+                    gc_policy.end()
+                    if GC_REPORT:
+                        print(gc_policy.summary())
+            if result == "exit":
+                break
+            # If main_menu requested, loop to show main menu again
+    finally:
+        if broadcaster is not None:
+            broadcaster.close()
     pygame.quit()
     sys.exit(0)
 
 
 if __name__ == "__main__":
-    run()
+    run("--startup-time" in sys.argv[1:])
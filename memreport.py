@@ -0,0 +1,108 @@
+import sys
+import argparse
+import tracemalloc
+
+from config import *
+from player import Player
+from monster import Monster
+import bullet_pool
+import monster_store
+from monster_store import MonsterStore
+from bullet import Bullet
+from bullet_pool import BulletPool
+from item import Item
+from simulation import Simulation
+from sweep import bot_input
+
+SAMPLE_ARGS = {
+    Monster: (1.0, 2.0, 60.0, 12.0, MONSTER_COLOR, 100.0),
+    Bullet: (1.0, 2.0, 3.0, 4.0),
+    Item: (1.0, 2.0),
+    Player: (1.0, 2.0, 280.0),
+}
+
+
+def unslotted(cls: type) -> type:
+    # Same methods, but attributes land in a per-instance __dict__ the
+    # way they did before the entity classes declared __slots__
+    namespace = {
+        key: value
+        for key, value in vars(cls).items()
+        if key != "__slots__" and key not in cls.__slots__
+    }
+    return type(cls.__name__, (), namespace)
+
+
+def bytes_per_instance(cls: type, args: tuple, count: int) -> float:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objs = [cls(*args) for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # The list holding them costs one pointer per object
+    return (after - before) / len(objs) - 8.0
+
+
+def column_bytes(*arrays) -> int:
+    return sum(arr.itemsize for arr in arrays)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Report per-entity memory and allocation churn."
+    )
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument(
+        "--frames", type=int, default=0,
+        help="also simulate this many ticks and report free-list reuse",
+    )
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    print(f"{'entity':<10}{'dict':>10}{'slots':>10}{'saved':>10}")
+    for cls, sample in SAMPLE_ARGS.items():
+        before = bytes_per_instance(unslotted(cls), sample, args.count)
+        after = bytes_per_instance(cls, sample, args.count)
+        print(
+            f"{cls.__name__:<10}{before:>10.0f}{after:>10.0f}"
+            f"{(1.0 - after / before) * 100.0:>9.0f}%"
+        )
+
+    store = MonsterStore()
+    per_monster = column_bytes(
+        *(getattr(store, name) for name in monster_store.COLUMNS)
+    )
+    pool = BulletPool(1)
+    # Spawn-order columns have room for two capacities
+    per_bullet = 2 * column_bytes(
+        *(getattr(pool, name) for name in bullet_pool.COLUMNS)
+    ) + column_bytes(*(getattr(pool, name) for name in bullet_pool.SCRATCH))
+    print(
+        f"\narray backends: MonsterStore {per_monster} bytes/monster, "
+        f"BulletPool {per_bullet} bytes/slot"
+    )
+
+    if args.frames > 0:
+        sim = Simulation(args.seed)
+        dt = 1.0 / float(SIMULATION_TICK_RATE)
+        for _ in range(args.frames):
+            sim.step(dt, bot_input(sim))
+        print(f"\nafter {args.frames} ticks ({sim.time:.0f}s simulated):")
+        for name, free in (
+            ("monsters", sim.monster_pool),
+            ("items", sim.item_pool),
+        ):
+            total = free.created + free.reused
+            share = free.reused / total * 100.0 if total else 0.0
+            print(
+                f"  {name:<10}{free.created:>8} allocated"
+                f"{free.reused:>8} recycled ({share:.0f}%)"
+                f"{len(free):>8} on the free list"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
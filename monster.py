@@ -1,14 +1,23 @@
 import math
+import itertools
 import pygame
 
 from config import (
-    WINDOW_WIDTH,
-    WINDOW_HEIGHT,
+    WORLD_WIDTH,
+    WORLD_HEIGHT,
     MONSTER_RADIUS,
 )
 
+# Every monster life gets a new id, even in a recycled object
+_uids = itertools.count()
+
 
 class Monster:
+    __slots__ = (
+        "x", "y", "prev_x", "prev_y", "speed", "radius", "color", "hp",
+        "lod_dt", "uid",
+    )
+
     def __init__(
         self,
         x: float,
@@ -17,13 +26,30 @@ class Monster:
         radius: float,
         color: tuple[int, int, int],
         max_hp: float,
+    ) -> None:
+        self.reset(x, y, speed, radius, color, max_hp)
+
+    def reset(
+        self,
+        x: float,
+        y: float,
+        speed: float,
+        radius: float,
+        color: tuple[int, int, int],
+        max_hp: float,
     ) -> None:
         self.x = x
         self.y = y
+        # Position at the start of the last simulation tick
+        self.prev_x = x
+        self.prev_y = y
         self.speed = speed
         self.radius = float(radius)
         self.color = color
         self.hp = float(max_hp)
+        # Time owed by ticks skipped under the LOD scheduler
+        self.lod_dt = 0.0
+        self.uid = next(_uids)
 
     def take_damage(self, amount: float) -> None:
         if amount <= 0:
@@ -37,20 +63,35 @@ class Monster:
         if dist > 1e-4:
             self.x += (dx / dist) * self.speed * dt_seconds
             self.y += (dy / dist) * self.speed * dt_seconds
+        self.clamp_to_world()
+
+    def move_along(
+        self, dir_x: float, dir_y: float, dt_seconds: float
+    ) -> None:
+        # Step along a unit direction, e.g. from a flow field
+        self.x += dir_x * self.speed * dt_seconds
+        self.y += dir_y * self.speed * dt_seconds
+        self.clamp_to_world()
+
+    def clamp_to_world(self) -> None:
         self.x = max(
             16.0 + self.radius,
-            min(float(WINDOW_WIDTH - 16 - self.radius), self.x),
+            min(float(WORLD_WIDTH - 16 - self.radius), self.x),
         )
         self.y = max(
             16.0 + self.radius,
-            min(float(WINDOW_HEIGHT - 16 - self.radius), self.y),
+            min(float(WORLD_HEIGHT - 16 - self.radius), self.y),
         )
 
-    def draw(self, screen: pygame.Surface) -> None:
+    def draw(
+        self, screen: pygame.Surface, offset: tuple[int, int] = (0, 0)
+    ) -> None:
+        # offset is the camera's top-left corner in world pixels
+        center = (int(self.x) - offset[0], int(self.y) - offset[1])
         pygame.draw.circle(
             screen,
             self.color,
-            (int(self.x), int(self.y)),
+            center,
             int(self.radius),
         )
         # If larger than normal, draw an outline ring
@@ -58,7 +99,7 @@ class Monster:
             pygame.draw.circle(
                 screen,
                 (255, 255, 255),
-                (int(self.x), int(self.y)),
+                center,
                 int(self.radius) + 4,
                 width=2,
             )
@@ -0,0 +1,417 @@
+import numpy as np
+
+from config import (
+    WORLD_WIDTH,
+    WORLD_HEIGHT,
+    PLAYER_RADIUS,
+)
+from monster import Monster
+
+# Per-monster arrays, each ``capacity`` long
+COLUMNS = (
+    "_x", "_y", "_prev_x", "_prev_y", "_speed", "_radius", "_hp",
+    "_color_index", "_lod_dt", "_uid",
+)
+
+
+class MonsterView:
+    # Index-based handle into a MonsterStore; only valid until the
+    # store is next compacted
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "MonsterStore", index: int) -> None:
+        self._store = store
+        self._index = index
+
+    @property
+    def x(self) -> float:
+        return float(self._store.x[self._index])
+
+    @x.setter
+    def x(self, value: float) -> None:
+        self._store.x[self._index] = value
+
+    @property
+    def y(self) -> float:
+        return float(self._store.y[self._index])
+
+    @y.setter
+    def y(self, value: float) -> None:
+        self._store.y[self._index] = value
+
+    @property
+    def prev_x(self) -> float:
+        return float(self._store._prev_x[self._index])
+
+    @property
+    def prev_y(self) -> float:
+        return float(self._store._prev_y[self._index])
+
+    @property
+    def speed(self) -> float:
+        return float(self._store.speed[self._index])
+
+    @speed.setter
+    def speed(self, value: float) -> None:
+        self._store.speed[self._index] = value
+
+    @property
+    def radius(self) -> float:
+        return float(self._store.radius[self._index])
+
+    @radius.setter
+    def radius(self, value: float) -> None:
+        self._store.radius[self._index] = value
+
+    @property
+    def hp(self) -> float:
+        return float(self._store.hp[self._index])
+
+    @hp.setter
+    def hp(self, value: float) -> None:
+        self._store.hp[self._index] = value
+
+    @property
+    def color(self) -> tuple[int, int, int]:
+        store = self._store
+        return store.palette[int(store.color_index[self._index])]
+
+    @color.setter
+    def color(self, value: tuple[int, int, int]) -> None:
+        store = self._store
+        store.color_index[self._index] = store.color_id(value)
+
+    take_damage = Monster.take_damage
+    update_towards = Monster.update_towards
+    move_along = Monster.move_along
+    clamp_to_world = Monster.clamp_to_world
+    draw = Monster.draw
+
+
+class MonsterStore:
+    def __init__(self, capacity: int = 256) -> None:
+        capacity = max(1, int(capacity))
+        self.count = 0
+        # Stable id for the next monster added; ids never change while a
+        # monster lives, however rows are moved
+        self.next_uid = 0
+        self.palette: list[tuple[int, int, int]] = []
+        self._palette_ids: dict[tuple[int, int, int], int] = {}
+        self._x = np.zeros(capacity, dtype=np.float64)
+        self._y = np.zeros(capacity, dtype=np.float64)
+        self._prev_x = np.zeros(capacity, dtype=np.float64)
+        self._prev_y = np.zeros(capacity, dtype=np.float64)
+        self._speed = np.zeros(capacity, dtype=np.float64)
+        self._radius = np.zeros(capacity, dtype=np.float64)
+        self._hp = np.zeros(capacity, dtype=np.float64)
+        self._color_index = np.zeros(capacity, dtype=np.int16)
+        self._lod_dt = np.zeros(capacity, dtype=np.float64)
+        self._uid = np.zeros(capacity, dtype=np.int64)
+
+    # Live slices over the first ``count`` slots
+    @property
+    def x(self) -> np.ndarray:
+        return self._x[:self.count]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y[:self.count]
+
+    @property
+    def prev_x(self) -> np.ndarray:
+        return self._prev_x[:self.count]
+
+    @property
+    def prev_y(self) -> np.ndarray:
+        return self._prev_y[:self.count]
+
+    @property
+    def speed(self) -> np.ndarray:
+        return self._speed[:self.count]
+
+    @property
+    def radius(self) -> np.ndarray:
+        return self._radius[:self.count]
+
+    @property
+    def hp(self) -> np.ndarray:
+        return self._hp[:self.count]
+
+    @property
+    def color_index(self) -> np.ndarray:
+        return self._color_index[:self.count]
+
+    @property
+    def lod_dt(self) -> np.ndarray:
+        return self._lod_dt[:self.count]
+
+    @property
+    def uid(self) -> np.ndarray:
+        return self._uid[:self.count]
+
+    @property
+    def capacity(self) -> int:
+        return len(self._x)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __getitem__(self, index: int) -> MonsterView:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("monster index out of range")
+        return MonsterView(self, index)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield MonsterView(self, index)
+
+    def color_id(self, color: tuple[int, int, int]) -> int:
+        color = tuple(color)
+        cid = self._palette_ids.get(color)
+        if cid is None:
+            cid = len(self.palette)
+            self.palette.append(color)
+            self._palette_ids[color] = cid
+        return cid
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._x)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def reserve(self, capacity: int) -> None:
+        self._grow(capacity)
+
+    def rebind(self, arrays: dict[str, np.ndarray]) -> None:
+        # Move the named columns into caller-owned storage, e.g. shared
+        # memory, of one length at least the current capacity; live
+        # values are copied over. The store uses them until it next
+        # grows or is reloaded.
+        capacity = max(len(values) for values in arrays.values())
+        self._grow(capacity)
+        n = self.count
+        for name, values in arrays.items():
+            if len(values) != capacity:
+                raise ValueError("rebound columns differ in length")
+            values[:n] = getattr(self, "_" + name)[:n]
+            setattr(self, "_" + name, values)
+
+    def reorder(self, order: np.ndarray) -> None:
+        # Permute the live rows, e.g. to group them by region
+        n = self.count
+        for name in COLUMNS:
+            column = getattr(self, name)
+            column[:n] = column[:n][order]
+
+    def add(
+        self,
+        x: float,
+        y: float,
+        speed: float,
+        radius: float,
+        color: tuple[int, int, int],
+        hp: float,
+    ) -> int:
+        self._grow(self.count + 1)
+        i = self.count
+        self._x[i] = x
+        self._y[i] = y
+        self._prev_x[i] = x
+        self._prev_y[i] = y
+        self._speed[i] = speed
+        self._radius[i] = radius
+        self._hp[i] = hp
+        self._color_index[i] = self.color_id(color)
+        self._lod_dt[i] = 0.0
+        self._uid[i] = self.next_uid
+        self.next_uid += 1
+        self.count += 1
+        return i
+
+    def add_many(
+        self,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        speed: float,
+        radius: float,
+        color: tuple[int, int, int],
+        hp: float,
+    ) -> None:
+        # Batch of identical monsters at the given positions
+        n = len(xs)
+        self._grow(self.count + n)
+        s = slice(self.count, self.count + n)
+        self._x[s] = xs
+        self._y[s] = ys
+        self._prev_x[s] = xs
+        self._prev_y[s] = ys
+        self._speed[s] = speed
+        self._radius[s] = radius
+        self._hp[s] = hp
+        self._color_index[s] = self.color_id(color)
+        self._lod_dt[s] = 0.0
+        self._uid[s] = np.arange(self.next_uid, self.next_uid + n)
+        self.next_uid += n
+        self.count += n
+
+    def append(self, monster: Monster) -> None:
+        self.add(
+            monster.x,
+            monster.y,
+            monster.speed,
+            monster.radius,
+            monster.color,
+            monster.hp,
+        )
+
+    def clear(self) -> None:
+        self.count = 0
+
+    def load_arrays(
+        self,
+        columns: dict[str, np.ndarray],
+        palette: list[tuple[int, int, int]],
+        copy: bool = True,
+    ) -> None:
+        # Replace the contents wholesale; with copy=False the given
+        # writable arrays become the storage until the next _grow.
+        # Without a uid column the rows are numbered in order.
+        n = len(columns["x"])
+        self.palette = []
+        self._palette_ids = {}
+        for color in palette:
+            self.color_id(color)
+        self.count = 0
+        if copy or not n:
+            self._grow(n)
+            for name, values in columns.items():
+                getattr(self, "_" + name)[:n] = values
+        else:
+            for name, values in columns.items():
+                setattr(self, "_" + name, values)
+        self.count = n
+        if "uid" not in columns:
+            self.uid[:] = np.arange(n)
+        self.next_uid = int(self.uid.max()) + 1 if n else 0
+
+    def remember_positions(self) -> None:
+        n = self.count
+        np.copyto(self._prev_x[:n], self._x[:n])
+        np.copyto(self._prev_y[:n], self._y[:n])
+
+    def update_towards(self, player, dt_seconds: float) -> None:
+        if not self.count:
+            return
+        x = self.x
+        y = self.y
+        dx = player.x - x
+        dy = player.y - y
+        dist = np.hypot(dx, dy)
+        moving = dist > 1e-4
+        step = np.where(
+            moving, self.speed * dt_seconds / np.where(moving, dist, 1.0),
+            0.0,
+        )
+        x += dx * step
+        y += dy * step
+        self.clamp_to_world()
+
+    def update_along(
+        self,
+        dir_x: np.ndarray,
+        dir_y: np.ndarray,
+        player,
+        dt_seconds: float,
+    ) -> None:
+        # Flow-field steering; a zero direction heads straight for the
+        # player as update_towards does
+        if not self.count:
+            return
+        x = self.x
+        y = self.y
+        dx = player.x - x
+        dy = player.y - y
+        dist = np.hypot(dx, dy)
+        moving = dist > 1e-4
+        safe = np.where(moving, dist, 1.0)
+        straight = (dir_x == 0.0) & (dir_y == 0.0)
+        ux = np.where(straight, np.where(moving, dx / safe, 0.0), dir_x)
+        uy = np.where(straight, np.where(moving, dy / safe, 0.0), dir_y)
+        step = self.speed * dt_seconds
+        x += ux * step
+        y += uy * step
+        self.clamp_to_world()
+
+    def clamp_to_world(self) -> None:
+        if not self.count:
+            return
+        radius = self.radius
+        np.clip(
+            self.x, 16.0 + radius, float(WORLD_WIDTH - 16) - radius,
+            out=self.x,
+        )
+        np.clip(
+            self.y, 16.0 + radius, float(WORLD_HEIGHT - 16) - radius,
+            out=self.y,
+        )
+
+    def push_away_from(self, px: float, py: float, padding: float) -> None:
+        if not self.count:
+            return
+        dx = self.x - px
+        dy = self.y - py
+        dist = np.hypot(dx, dy)
+        degenerate = dist < 1e-6
+        if degenerate.any():
+            dx[degenerate] = 1.0
+            dy[degenerate] = 0.0
+            dist[degenerate] = 1.0
+        min_dist = float(PLAYER_RADIUS) + self.radius + padding
+        overlap = np.maximum(min_dist - dist, 0.0)
+        x = self.x
+        y = self.y
+        x += (dx / dist) * overlap
+        y += (dy / dist) * overlap
+        self.clamp_to_world()
+
+    def count_touching(self, px: float, py: float, padding: float) -> int:
+        if not self.count:
+            return 0
+        dist = np.hypot(px - self.x, py - self.y)
+        reach = float(PLAYER_RADIUS) + self.radius + padding
+        return int(np.count_nonzero(dist <= reach))
+
+    def apply_damage(self, indices, amounts) -> None:
+        indices = np.asarray(indices, dtype=np.intp)
+        if not len(indices):
+            return
+        amounts = np.maximum(np.asarray(amounts, dtype=np.float64), 0.0)
+        hp = self.hp
+        np.subtract.at(hp, indices, amounts)
+        np.maximum(hp, 0.0, out=hp)
+
+    def remove_dead(self) -> int:
+        n = self.count
+        if not n:
+            return 0
+        alive = self._hp[:n] > 0.0
+        kept = int(np.count_nonzero(alive))
+        if kept == n:
+            return 0
+        for name in COLUMNS:
+            arr = getattr(self, name)
+            arr[:kept] = arr[:n][alive]
+        self.count = kept
+        return n - kept
@@ -0,0 +1,79 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from simulation import FixedStepDriver, FrameInput
+from profiler import PhaseTimer
+from render_state import RenderState
+
+
+class PipelinedDriver:
+    # Runs FixedStepDriver.advance on a worker thread one frame ahead of
+    # rendering. Each advance ends by capturing the render state into
+    # the back buffer; wait() swaps it to the front, where the main
+    # thread draws it while the worker fills the other buffer. pygame's
+    # blits and flips release the GIL, so the two overlap. The
+    # Simulation must only be touched between wait() and submit().
+    def __init__(self, driver: FixedStepDriver, profiler=None) -> None:
+        self.driver = driver
+        self.sim = driver.sim
+        # Phase marks from the worker go to a private timer and are
+        # handed to profiler (anything with add(phase, seconds)) by wait()
+        self.profiler = profiler
+        self._timer = PhaseTimer() if profiler is not None else None
+        self.sim.profiler = self._timer
+        self._buffers = (RenderState(), RenderState())
+        self._back = 0
+        self._pending: Future | None = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="simulation"
+        )
+        self.front = self._buffers[1]
+        self.recapture()
+
+    def recapture(self) -> None:
+        # Refresh the front buffer after the simulation was changed
+        # directly, e.g. by loading a snapshot
+        self.wait()
+        driver = self.driver
+        self.front.capture(
+            self.sim, driver.accumulator / driver.step_seconds
+        )
+
+    def submit(self, dt_seconds: float, inputs: FrameInput) -> None:
+        if self._pending is not None:
+            raise RuntimeError("previous frame is still being simulated")
+        self._pending = self._executor.submit(
+            self._advance, self._buffers[self._back], dt_seconds, inputs
+        )
+
+    def _advance(
+        self, state: RenderState, dt_seconds: float, inputs: FrameInput
+    ) -> None:
+        alpha = self.driver.advance(dt_seconds, inputs)
+        state.capture(self.sim, alpha)
+
+    def wait(self) -> RenderState:
+        # Block until the submitted frame is simulated and make it the
+        # front buffer; re-raises anything the worker raised
+        pending = self._pending
+        if pending is None:
+            return self.front
+        self._pending = None
+        pending.result()
+        self.front = self._buffers[self._back]
+        self._back ^= 1
+        timer = self._timer
+        if timer is not None:
+            for phase, samples in timer.samples.items():
+                self.profiler.add(phase, sum(samples))
+            timer.clear()
+        return self.front
+
+    def close(self) -> None:
+        try:
+            if self._pending is not None:
+                self._pending.exception()
+                self._pending = None
+        finally:
+            self._executor.shutdown(wait=True)
+            if self.sim.profiler is self._timer:
+                self.sim.profiler = self.profiler
@@ -5,9 +5,16 @@ from config import *
 
 
 class Player:
+    __slots__ = (
+        "x", "y", "prev_x", "prev_y", "speed", "hp", "face_dx", "face_dy",
+        "level", "xp", "xp_to_next",
+    )
+
     def __init__(self, x: float, y: float, speed: float) -> None:
         self.x = x
         self.y = y
+        self.prev_x = x
+        self.prev_y = y
         self.speed = speed
         self.hp = float(PLAYER_MAX_HP)
         self.face_dx = 1.0
@@ -24,12 +31,20 @@ class Player:
     def update(self, move_x: float, move_y: float, dt_seconds: float) -> None:
         self.x += move_x * self.speed * dt_seconds
         self.y += move_y * self.speed * dt_seconds
-        self._clamp_to_screen()
+        self._clamp_to_world()
         if move_x or move_y:
             length = math.hypot(move_x, move_y) or 1.0
             self.face_dx = move_x / length
             self.face_dy = move_y / length
 
+    def lerp_position(self, alpha: float) -> tuple[float, float]:
+        if alpha >= 1.0:
+            return self.x, self.y
+        return (
+            self.prev_x + (self.x - self.prev_x) * alpha,
+            self.prev_y + (self.y - self.prev_y) * alpha,
+        )
+
     def get_facing(self) -> tuple[float, float]:
         return self.face_dx, self.face_dy
 
@@ -77,38 +92,56 @@ class Player:
                 self.hp + float(LEVEL_UP_HP_BONUS),
             )
 
-    def _clamp_to_screen(self) -> None:
-        self.x = max(16.0, min(float(WINDOW_WIDTH - 16), self.x))
-        self.y = max(16.0, min(float(WINDOW_HEIGHT - 16), self.y))
+    def _clamp_to_world(self) -> None:
+        self.x = max(16.0, min(float(WORLD_WIDTH - 16), self.x))
+        self.y = max(16.0, min(float(WORLD_HEIGHT - 16), self.y))
 
-    def draw(self, screen: pygame.Surface, time_seconds: float) -> None:
+    def draw(
+        self,
+        screen: pygame.Surface,
+        time_seconds: float,
+        offset: tuple[int, int] = (0, 0),
+    ) -> None:
+        # offset is the camera's top-left corner in world pixels
         pulse = 4 + int(3 * (1 + math.sin(time_seconds * 4)))
+        center = (int(self.x) - offset[0], int(self.y) - offset[1])
         pygame.draw.circle(
             screen,
             (60, 60, 72),
-            (int(self.x), int(self.y)),
+            center,
             18 + pulse,
             width=2,
         )
         pygame.draw.circle(
             screen,
             ACCENT_COLOR,
-            (int(self.x), int(self.y)),
+            center,
             PLAYER_RADIUS,
         )
+        self.draw_facing(screen, offset=offset)
+
+    def draw_facing(
+        self,
+        screen: pygame.Surface,
+        alpha: float = 1.0,
+        offset: tuple[int, int] = (0, 0),
+    ) -> pygame.Rect:
         # Facing indicator (small triangle)
+        x, y = self.lerp_position(alpha)
+        x -= offset[0]
+        y -= offset[1]
         fx, fy = self.get_facing()
         tip_len = float(PLAYER_RADIUS + 10)
         base_len = float(PLAYER_RADIUS - 2)
         half_w = 6.0
-        tip = (self.x + fx * tip_len, self.y + fy * tip_len)
-        bx = self.x + fx * base_len
-        by = self.y + fy * base_len
+        tip = (x + fx * tip_len, y + fy * tip_len)
+        bx = x + fx * base_len
+        by = y + fy * base_len
         # perpendicular
         px, py = -fy, fx
         left = (bx + px * half_w, by + py * half_w)
         right = (bx - px * half_w, by - py * half_w)
-        pygame.draw.polygon(
+        return pygame.draw.polygon(
             screen,
             TEXT_COLOR,
             [(int(tip[0]), int(tip[1])),
@@ -0,0 +1,149 @@
+import csv
+import time
+from array import array
+
+from config import PROFILER_HISTORY_FRAMES, PROFILER_PHASES
+
+
+class PhaseTimer:
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = {}
+        self._last = 0.0
+
+    def start(self, at: float | None = None) -> None:
+        # at: an earlier perf_counter() reading to time the first phase from
+        self._last = time.perf_counter() if at is None else at
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        bucket = self.samples.get(phase)
+        if bucket is None:
+            bucket = self.samples[phase] = []
+        bucket.append(now - self._last)
+        self._last = now
+
+    def add(self, phase: str, seconds: float) -> None:
+        # A sample timed elsewhere, e.g. on another thread
+        bucket = self.samples.get(phase)
+        if bucket is None:
+            bucket = self.samples[phase] = []
+        bucket.append(seconds)
+
+    def clear(self) -> None:
+        self.samples.clear()
+
+
+class FrameProfiler:
+    # Per-frame phase timings in a fixed-size ring buffer; marks inside
+    # one frame accumulate, so several simulation ticks per frame add up
+    def __init__(
+        self,
+        phases: tuple[str, ...] = PROFILER_PHASES,
+        capacity: int = PROFILER_HISTORY_FRAMES,
+    ) -> None:
+        self.phases = tuple(phases)
+        self.capacity = max(1, int(capacity))
+        self._index = {name: i for i, name in enumerate(self.phases)}
+        width = len(self.phases)
+        self._samples = array("d", [0.0]) * (self.capacity * width)
+        self._frame_times = array("d", [0.0]) * self.capacity
+        self._counts = array("q", [0]) * (self.capacity * 3)
+        self.head = 0
+        self.filled = 0
+        self.frames_recorded = 0
+        self._row = 0
+        self._frame_start = 0.0
+        self._last = 0.0
+
+    def begin_frame(self) -> None:
+        base = self.head * len(self.phases)
+        for i in range(len(self.phases)):
+            self._samples[base + i] = 0.0
+        self._row = base
+        self._frame_start = self._last = time.perf_counter()
+
+    def start(self) -> None:
+        self._last = time.perf_counter()
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        i = self._index.get(phase)
+        if i is not None:
+            self._samples[self._row + i] += now - self._last
+        self._last = now
+
+    def add(self, phase: str, seconds: float) -> None:
+        # Time measured elsewhere, e.g. on the simulation thread
+        i = self._index.get(phase)
+        if i is not None:
+            self._samples[self._row + i] += seconds
+
+    def frame_elapsed(self) -> float:
+        return time.perf_counter() - self._frame_start
+
+    def end_frame(self, monsters: int, bullets: int, items: int) -> None:
+        head = self.head
+        self._frame_times[head] = time.perf_counter() - self._frame_start
+        self._counts[head * 3] = monsters
+        self._counts[head * 3 + 1] = bullets
+        self._counts[head * 3 + 2] = items
+        self.head = (head + 1) % self.capacity
+        self.filled = min(self.filled + 1, self.capacity)
+        self.frames_recorded += 1
+
+    def _slot(self, age: int) -> int:
+        # age 0 is the most recent completed frame
+        return (self.head - 1 - age) % self.capacity
+
+    def frame_times(self, count: int | None = None) -> list[float]:
+        count = self.filled if count is None else min(count, self.filled)
+        return [
+            self._frame_times[self._slot(age)]
+            for age in range(count - 1, -1, -1)
+        ]
+
+    def phase_means(self, count: int) -> dict[str, float]:
+        count = min(count, self.filled)
+        width = len(self.phases)
+        totals = [0.0] * width
+        for age in range(count):
+            base = self._slot(age) * width
+            for i in range(width):
+                totals[i] += self._samples[base + i]
+        scale = 1.0 / count if count else 0.0
+        return {
+            name: totals[i] * scale for i, name in enumerate(self.phases)
+        }
+
+    def latest_counts(self) -> tuple[int, int, int]:
+        if not self.filled:
+            return 0, 0, 0
+        base = self._slot(0) * 3
+        return (
+            self._counts[base],
+            self._counts[base + 1],
+            self._counts[base + 2],
+        )
+
+    def dump_csv(self, path: str) -> int:
+        width = len(self.phases)
+        first = self.frames_recorded - self.filled
+        with open(path, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(
+                ["frame", "frame_ms"]
+                + [f"{name}_ms" for name in self.phases]
+                + ["monsters", "bullets", "items"]
+            )
+            for n, age in enumerate(range(self.filled - 1, -1, -1)):
+                slot = self._slot(age)
+                base = slot * width
+                writer.writerow(
+                    [first + n, f"{self._frame_times[slot] * 1000.0:.4f}"]
+                    + [
+                        f"{self._samples[base + i] * 1000.0:.4f}"
+                        for i in range(width)
+                    ]
+                    + list(self._counts[slot * 3:slot * 3 + 3])
+                )
+        return self.filled
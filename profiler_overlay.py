@@ -0,0 +1,139 @@
+import pygame
+
+from config import (
+    FPS,
+    TEXT_COLOR,
+    HINT_TEXT_COLOR,
+    ACCENT_COLOR,
+    MONSTER_COLOR,
+    BULLET_COLOR,
+    PROFILER_OVERLAY_REFRESH_FRAMES,
+)
+from hud import TextCache
+from assets import get_font
+from profiler import FrameProfiler
+
+PANEL_COLOR = (0, 0, 0, 170)
+GRAPH_FRAMES = 240
+GRAPH_HEIGHT = 60
+BAR_WIDTH = 160
+
+
+class ProfilerOverlay:
+    # Frame-time graph, per-phase bars and entity counts drawn over the
+    # scene; the numbers only re-render every few frames so the overlay
+    # stays cheap and readable
+    def __init__(
+        self,
+        font_size: int = 16,
+        refresh_frames: int = PROFILER_OVERLAY_REFRESH_FRAMES,
+    ) -> None:
+        self.font = get_font(font_size)
+        self.text = TextCache(self.font, max_entries=256)
+        self.refresh_frames = max(1, int(refresh_frames))
+        self.visible = False
+        self.line_height = self.font.get_linesize()
+        self.budget_ms = 1000.0 / float(FPS)
+        self._label_width = 0
+        self._panel: pygame.Surface | None = None
+        self._layout: list | None = None
+        self._countdown = 0
+
+    def toggle(self) -> None:
+        self.visible = not self.visible
+        self._countdown = 0
+
+    def _ensure_panel(self, phases: tuple[str, ...]) -> pygame.Surface:
+        if self._panel is None:
+            self._label_width = max(
+                self.font.size(name)[0] for name in phases
+            )
+            width = max(GRAPH_FRAMES, self._label_width + BAR_WIDTH + 80)
+            height = (
+                GRAPH_HEIGHT + (len(phases) + 2) * self.line_height + 24
+            )
+            panel = pygame.Surface((width + 16, height), pygame.SRCALPHA)
+            panel.fill(PANEL_COLOR)
+            self._panel = panel
+        return self._panel
+
+    def _relayout(self, profiler: FrameProfiler) -> None:
+        means = profiler.phase_means(self.refresh_frames)
+        frames = profiler.frame_times(self.refresh_frames)
+        frame_ms = sum(frames) / len(frames) * 1000.0 if frames else 0.0
+        render = self.text.render
+        rows = [
+            (
+                render(f"frame {frame_ms:6.2f} ms", TEXT_COLOR),
+                None,
+                0.0,
+            )
+        ]
+        for name in profiler.phases:
+            ms = means[name] * 1000.0
+            rows.append(
+                (render(name, HINT_TEXT_COLOR), render(f"{ms:5.2f}"), ms)
+            )
+        monsters, bullets, items = profiler.latest_counts()
+        rows.append(
+            (
+                render(
+                    f"monsters {monsters}  bullets {bullets}  "
+                    f"items {items}",
+                    TEXT_COLOR,
+                ),
+                None,
+                0.0,
+            )
+        )
+        self._layout = rows
+
+    def draw(self, screen: pygame.Surface, profiler: FrameProfiler) -> None:
+        if not profiler.filled:
+            return
+        panel = self._ensure_panel(profiler.phases)
+        if self._countdown <= 0 or self._layout is None:
+            self._relayout(profiler)
+            self._countdown = self.refresh_frames
+        self._countdown -= 1
+
+        left = 10
+        top = screen.get_height() - panel.get_height() - 10
+        screen.blit(panel, (left, top))
+        x0 = left + 8
+        y0 = top + 8
+
+        # Frame-time graph, full height at twice the frame budget
+        scale = GRAPH_HEIGHT / (2.0 * self.budget_ms)
+        base = y0 + GRAPH_HEIGHT
+        budget_y = base - int(self.budget_ms * scale)
+        pygame.draw.line(
+            screen, MONSTER_COLOR, (x0, budget_y),
+            (x0 + GRAPH_FRAMES - 1, budget_y),
+        )
+        times = profiler.frame_times(GRAPH_FRAMES)
+        if len(times) > 1:
+            offset = GRAPH_FRAMES - len(times)
+            points = [
+                (
+                    x0 + offset + i,
+                    base - min(GRAPH_HEIGHT, int(t * 1000.0 * scale)),
+                )
+                for i, t in enumerate(times)
+            ]
+            pygame.draw.lines(screen, ACCENT_COLOR, False, points)
+
+        y = base + 8
+        bar_x = x0 + self._label_width + 8
+        bar_h = max(2, self.line_height - 6)
+        for label, value, ms in self._layout:
+            screen.blit(label, (x0, y))
+            if value is not None:
+                width = min(BAR_WIDTH, int(ms / self.budget_ms * BAR_WIDTH))
+                if width > 0:
+                    pygame.draw.rect(
+                        screen, BULLET_COLOR,
+                        (bar_x, y + 3, width, bar_h),
+                    )
+                screen.blit(value, (bar_x + BAR_WIDTH + 8, y))
+            y += self.line_height
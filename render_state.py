@@ -0,0 +1,163 @@
+import numpy as np
+
+from player import Player
+from monster import Monster
+from monster_store import MonsterStore
+from bullet import Bullet
+from bullet_pool import BulletPool
+from item_store import FrozenItems
+
+
+def _blend(
+    prev: np.ndarray, cur: np.ndarray, alpha: float, out: np.ndarray
+) -> None:
+    # Same arithmetic as sprites.entity_positions, so drawing a capture
+    # lands on exactly the pixels drawing the live entities would
+    if alpha >= 1.0:
+        np.copyto(out, cur)
+        return
+    np.subtract(cur, prev, out=out)
+    out *= alpha
+    out += prev
+
+
+class PointBuffer:
+    # Positions of a batch of entities, already interpolated when
+    # captured; prev_x and prev_y alias them, so the batch draws in the
+    # same place at any alpha
+    _columns: tuple[tuple[str, type], ...] = (
+        ("_x", np.float64),
+        ("_y", np.float64),
+    )
+
+    def __init__(self, capacity: int = 256) -> None:
+        self.count = 0
+        self._capacity = 0
+        self._reserve(max(1, int(capacity)))
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._x[:self.count]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y[:self.count]
+
+    prev_x = x
+    prev_y = y
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def resize(self, count: int) -> None:
+        # Make room for count entities, e.g. before filling x and y
+        self._reserve(count)
+        self.count = count
+
+    def _reserve(self, needed: int) -> None:
+        # Contents are overwritten by every capture, so nothing is kept
+        if needed <= self._capacity:
+            return
+        capacity = max(1, self._capacity)
+        while capacity < needed:
+            capacity *= 2
+        for name, dtype in self._columns:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self._capacity = capacity
+
+    def capture(
+        self,
+        entities: list[Monster] | list[Bullet] | MonsterStore | BulletPool,
+        alpha: float,
+    ) -> None:
+        n = len(entities)
+        self.resize(n)
+        if isinstance(entities, (MonsterStore, BulletPool)):
+            _blend(entities.prev_x, entities.x, alpha, self.x)
+            _blend(entities.prev_y, entities.y, alpha, self.y)
+            return
+        x = np.fromiter((e.x for e in entities), np.float64, n)
+        y = np.fromiter((e.y for e in entities), np.float64, n)
+        if alpha < 1.0:
+            px = np.fromiter((e.prev_x for e in entities), np.float64, n)
+            py = np.fromiter((e.prev_y for e in entities), np.float64, n)
+            _blend(px, x, alpha, self.x)
+            _blend(py, y, alpha, self.y)
+        else:
+            self.x[:] = x
+            self.y[:] = y
+
+
+class MonsterFrame(PointBuffer):
+    # Monster positions plus what their sprites are keyed on, laid out
+    # like a MonsterStore so the same blit collector handles both
+    _columns = PointBuffer._columns + (
+        ("_radius", np.float64),
+        ("_color_index", np.int16),
+    )
+
+    def __init__(self, capacity: int = 256) -> None:
+        super().__init__(capacity)
+        self.palette: list[tuple[int, int, int]] = []
+
+    @property
+    def radius(self) -> np.ndarray:
+        return self._radius[:self.count]
+
+    @property
+    def color_index(self) -> np.ndarray:
+        return self._color_index[:self.count]
+
+    def capture(
+        self,
+        monsters: list[Monster] | MonsterStore,
+        alpha: float,
+    ) -> None:
+        super().capture(monsters, alpha)
+        if isinstance(monsters, MonsterStore):
+            np.copyto(self.radius, monsters.radius)
+            np.copyto(self.color_index, monsters.color_index)
+            self.palette = list(monsters.palette)
+            return
+        ids: dict[tuple[int, int, int], int] = {}
+        palette: list[tuple[int, int, int]] = []
+        cids = []
+        for m in monsters:
+            cid = ids.get(m.color)
+            if cid is None:
+                cid = ids[m.color] = len(palette)
+                palette.append(m.color)
+            cids.append(cid)
+        self.radius[:] = [m.radius for m in monsters]
+        self.color_index[:] = cids
+        self.palette = palette
+
+
+class RenderState:
+    # Everything the renderer reads from a Simulation, copied at one
+    # instant. Attribute names match Simulation's, so render code takes
+    # either; positions are pre-blended, so draw it with alpha 1.0.
+    def __init__(self) -> None:
+        self.player = Player(0.0, 0.0, 0.0)
+        self.monsters = MonsterFrame()
+        self.bullets = PointBuffer()
+        self.items: FrozenItems | None = None
+        self.time = 0.0
+        self.frame = 0
+
+    def capture(self, sim, alpha: float) -> None:
+        player = self.player
+        source = sim.player
+        for name in Player.__slots__:
+            setattr(player, name, getattr(source, name))
+        player.x, player.y = source.lerp_position(alpha)
+        player.prev_x = player.x
+        player.prev_y = player.y
+        self.monsters.capture(sim.monsters, alpha)
+        self.bullets.capture(sim.bullets, alpha)
+        self.items = sim.items.frozen()
+        self.time = sim.time
+        self.frame = sim.frame
@@ -0,0 +1,387 @@
+import os
+import sys
+import time
+import struct
+import hashlib
+import argparse
+from array import array
+from typing import BinaryIO, Iterator, NamedTuple
+
+import numpy as np
+
+from config import *
+from monster_store import MonsterStore
+from bullet_pool import BulletPool
+from simulation import (
+    FixedStepDriver,
+    FrameInput,
+    Simulation,
+    normalize_move,
+)
+
+REPLAY_MAGIC = b"SNMR"
+REPLAY_VERSION = 1
+# magic, version, seed, tick rate, catch-up cap, monster/bullet backend
+HEADER = struct.Struct("<4sHQdH8s8s")
+DIGEST = struct.Struct("<Q")
+
+# Frame record: one flags byte, then only the fields that changed
+FLAG_MOVE_MASK = 0x0F
+FLAG_PAUSED = 0x10
+FLAG_MOUSE = 0x20
+FLAG_DT = 0x40
+FLAG_END = 0x80
+
+FLUSH_BYTES = 4096
+
+
+class ReplayFrame(NamedTuple):
+    dt_ms: int
+    move_x: int
+    move_y: int
+    mouse_x: int
+    mouse_y: int
+    paused: bool
+
+
+class ReplayHeader(NamedTuple):
+    seed: int
+    tick_rate: float
+    max_catch_up_steps: int
+    monster_backend: str
+    bullet_backend: str
+
+
+def frame_input(frame: ReplayFrame) -> FrameInput:
+    move_x, move_y = normalize_move(frame.move_x, frame.move_y)
+    return FrameInput(
+        move_x, move_y, float(frame.mouse_x), float(frame.mouse_y)
+    )
+
+
+def state_digest(sim: Simulation) -> int:
+    # Cheap fingerprint of the simulation state used to check that a
+    # playback ended exactly where the recording did
+    player = sim.player
+    h = hashlib.blake2b(digest_size=8)
+    h.update(
+        struct.pack(
+            "<qdddddi",
+            sim.frame,
+            sim.time,
+            player.x,
+            player.y,
+            player.hp,
+            player.xp,
+            player.level,
+        )
+    )
+    monsters = sim.monsters
+    if isinstance(monsters, MonsterStore):
+        # In spawn order, whatever order the rows are kept in
+        order = np.argsort(monsters.uid, kind="stable")
+        h.update(monsters.x[order].tobytes())
+        h.update(monsters.y[order].tobytes())
+        h.update(monsters.hp[order].tobytes())
+    else:
+        h.update(array("d", [m.x for m in monsters]).tobytes())
+        h.update(array("d", [m.y for m in monsters]).tobytes())
+        h.update(array("d", [m.hp for m in monsters]).tobytes())
+    h.update(struct.pack("<qq", len(sim.bullets), len(sim.items)))
+    return DIGEST.unpack(h.digest())[0]
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    # Zigzag so small negative deltas stay small
+    value = (value << 1) ^ (value >> 63)
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    shift = 0
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (value >> 1) ^ -(value & 1), pos
+
+
+class ReplayRecorder:
+    # Streams frames to disk as they are played; most frames are a single
+    # flags byte since dt and the mouse rarely change between frames
+    def __init__(
+        self,
+        path: str,
+        sim: Simulation,
+        driver: FixedStepDriver,
+    ) -> None:
+        monster_backend = (
+            "numpy" if isinstance(sim.monsters, MonsterStore) else "list"
+        )
+        bullet_backend = (
+            "pool" if isinstance(sim.bullets, BulletPool) else "list"
+        )
+        self.path = path
+        self.frames = 0
+        self._fh: BinaryIO | None = open(path, "wb")
+        self._fh.write(
+            HEADER.pack(
+                REPLAY_MAGIC,
+                REPLAY_VERSION,
+                sim.seed,
+                1.0 / driver.step_seconds,
+                driver.max_catch_up_steps,
+                monster_backend.encode("ascii"),
+                bullet_backend.encode("ascii"),
+            )
+        )
+        self._buffer = bytearray()
+        self._dt_ms = -1
+        self._mouse = (0, 0)
+
+    def record(
+        self,
+        dt_ms: int,
+        move: tuple[int, int],
+        mouse: tuple[int, int],
+        paused: bool = False,
+    ) -> None:
+        out = self._buffer
+        flags = (move[0] + 1) * 3 + (move[1] + 1)
+        if paused:
+            flags |= FLAG_PAUSED
+        if mouse != self._mouse:
+            flags |= FLAG_MOUSE
+        if dt_ms != self._dt_ms:
+            flags |= FLAG_DT
+        out.append(flags)
+        if flags & FLAG_DT:
+            _write_varint(out, dt_ms - self._dt_ms)
+            self._dt_ms = dt_ms
+        if flags & FLAG_MOUSE:
+            _write_varint(out, mouse[0] - self._mouse[0])
+            _write_varint(out, mouse[1] - self._mouse[1])
+            self._mouse = mouse
+        self.frames += 1
+        if len(out) >= FLUSH_BYTES:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._fh is not None and self._buffer:
+            self._fh.write(self._buffer)
+            self._fh.flush()
+            self._buffer.clear()
+
+    def close(self, sim: Simulation) -> None:
+        if self._fh is None:
+            return
+        self._buffer.append(FLAG_END)
+        self._buffer += DIGEST.pack(state_digest(sim))
+        self.flush()
+        self._fh.close()
+        self._fh = None
+
+
+class ReplayReader:
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as fh:
+            data = fh.read()
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path}: truncated replay header")
+        (
+            magic,
+            version,
+            seed,
+            tick_rate,
+            max_catch_up_steps,
+            monster_backend,
+            bullet_backend,
+        ) = HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ValueError(f"{path}: not a replay file")
+        if version != REPLAY_VERSION:
+            raise ValueError(f"{path}: unsupported replay version {version}")
+        self.header = ReplayHeader(
+            seed,
+            tick_rate,
+            max_catch_up_steps,
+            monster_backend.rstrip(b"\0").decode("ascii"),
+            bullet_backend.rstrip(b"\0").decode("ascii"),
+        )
+        self._data = data
+        # Set once iteration reaches the end marker; a recording cut off
+        # by a crash has no digest
+        self.digest: int | None = None
+
+    def __iter__(self) -> Iterator[ReplayFrame]:
+        data = self._data
+        end = len(data)
+        pos = HEADER.size
+        dt_ms = -1
+        mouse_x = 0
+        mouse_y = 0
+        while pos < end:
+            flags = data[pos]
+            pos += 1
+            if flags & FLAG_END:
+                if pos + DIGEST.size <= end:
+                    self.digest = DIGEST.unpack_from(data, pos)[0]
+                return
+            if flags & FLAG_DT:
+                delta, pos = _read_varint(data, pos)
+                dt_ms += delta
+            if flags & FLAG_MOUSE:
+                dx, pos = _read_varint(data, pos)
+                dy, pos = _read_varint(data, pos)
+                mouse_x += dx
+                mouse_y += dy
+            code = flags & FLAG_MOVE_MASK
+            yield ReplayFrame(
+                dt_ms,
+                code // 3 - 1,
+                code % 3 - 1,
+                mouse_x,
+                mouse_y,
+                bool(flags & FLAG_PAUSED),
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Re-simulate a recorded session."
+    )
+    parser.add_argument("replay")
+    parser.add_argument(
+        "--headless", action="store_true",
+        help="no window; run as fast as possible",
+    )
+    parser.add_argument(
+        "--render-every", type=int, default=1,
+        help="render every Nth frame (0 disables rendering)",
+    )
+    parser.add_argument(
+        "--fast", action="store_true",
+        help="do not pace frames to the recorded dt",
+    )
+    args = parser.parse_args()
+
+    if args.headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    from profiler import PhaseTimer
+    from hud import Hud
+    from assets import get_font
+    from sprites import SpriteCache, scene_backdrop
+    from main import render_scene
+    from bench import summarize
+    from camera import Camera
+
+    reader = ReplayReader(args.replay)
+    header = reader.header
+    sim = Simulation(
+        header.seed, header.monster_backend, header.bullet_backend
+    )
+    driver = FixedStepDriver(
+        sim, header.tick_rate, header.max_catch_up_steps
+    )
+    timer = PhaseTimer()
+    sim.profiler = timer
+
+    render_every = max(0, args.render_every)
+    screen = None
+    if render_every:
+        pygame.init()
+        screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        pygame.display.set_caption(f"{WINDOW_CAPTION} - replay")
+        hud = Hud(get_font(28))
+        sprites = SpriteCache()
+        camera = Camera(*screen.get_size())
+        backdrop = scene_backdrop(
+            sim.tile_map, camera, screen.get_size()
+        )
+    pace = screen is not None and not (args.fast or args.headless)
+
+    frame_times: list[float] = []
+    pauses = 0
+    started = time.perf_counter()
+    for index, frame in enumerate(reader):
+        if screen is not None:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    return 0
+        pauses += frame.paused
+        start = time.perf_counter()
+        alpha = driver.advance(frame.dt_ms / 1000.0, frame_input(frame))
+        if screen is not None and index % render_every == 0:
+            timer.start()
+            camera.follow(*sim.player.lerp_position(alpha))
+            hud.update(sim.player, sim.time)
+            render_scene(
+                screen,
+                hud,
+                sprites,
+                sim.player,
+                sim.time,
+                sim.monsters,
+                sim.bullets,
+                sim.items,
+                alpha,
+                backdrop,
+                camera,
+            )
+            pygame.display.flip()
+            timer.mark("render")
+        frame_times.append(time.perf_counter() - start)
+        if pace:
+            pygame.time.wait(
+                max(0, frame.dt_ms - int(frame_times[-1] * 1000.0))
+            )
+    elapsed = time.perf_counter() - started
+    if screen is not None:
+        pygame.quit()
+
+    print(
+        f"{len(frame_times)} frames, {sim.frame} ticks, "
+        f"{sim.time:.1f}s simulated in {elapsed:.2f}s wall, "
+        f"{pauses} pause(s)"
+    )
+    print(
+        f"level {sim.player.level}, {len(sim.monsters)} monsters, "
+        f"{len(sim.bullets)} bullets, {len(sim.items)} items"
+    )
+    if frame_times:
+        print(f"  {'phase':<30}{'mean':>10}{'p50':>10}{'p99':>10}")
+        rows = [
+            (phase, summarize(samples))
+            for phase, samples in timer.samples.items()
+        ]
+        rows.append(("frame", summarize(frame_times)))
+        for phase, stats in rows:
+            print(
+                f"  {phase:<30}"
+                f"{stats['mean_ms']:>10.3f}"
+                f"{stats['p50_ms']:>10.3f}"
+                f"{stats['p99_ms']:>10.3f}"
+            )
+
+    if reader.digest is None:
+        print("recording has no end marker; cannot verify")
+        return 0
+    if reader.digest != state_digest(sim):
+        print("DESYNC: final state differs from the recording")
+        return 1
+    print("final state matches the recording")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,672 @@
+import sys
+import time
+import argparse
+import traceback
+import multiprocessing
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import NamedTuple
+
+import numpy as np
+
+from config import *
+from player import Player
+from monster_store import MonsterStore
+from bullet_pool import BulletPool
+from collision import resolve_contact_hits
+from tilemap import TileMap, load_tile_map
+from spatial import NO_PAIRS, neighbour_pairs
+from spawner import spawn_horde
+from simulation import (
+    FrameInput,
+    Simulation,
+    remember_positions,
+    resolve_monster_walls,
+    separation_pass,
+    update_bullets,
+)
+
+# Monster columns the strips read and write; the rest of the store
+# stays private to the coordinating process
+SHARED_COLUMNS = (
+    ("x", np.float64),
+    ("y", np.float64),
+    ("prev_x", np.float64),
+    ("prev_y", np.float64),
+    ("speed", np.float64),
+    ("radius", np.float64),
+    ("hp", np.float64),
+    ("uid", np.int64),
+)
+# Separation passes alternate between the positions and these
+SCRATCH_COLUMNS = (
+    ("sep_x", np.float64),
+    ("sep_y", np.float64),
+)
+FIELD_COLUMNS = (
+    ("dir_x", np.float64),
+    ("dir_y", np.float64),
+)
+
+
+class SharedColumns:
+    # Fixed-length arrays laid out back to back in one shared memory
+    # block; other processes open the same block by name
+    def __init__(
+        self,
+        layout: tuple[tuple[str, type], ...],
+        length: int,
+        name: str | None = None,
+    ) -> None:
+        self.layout = tuple(layout)
+        self.length = int(length)
+        offsets = []
+        size = 0
+        for _, dtype in self.layout:
+            offsets.append(size)
+            size += (np.dtype(dtype).itemsize * self.length + 7) & ~7
+        self.owner = name is None
+        if self.owner:
+            self.shm = SharedMemory(create=True, size=max(1, size))
+        else:
+            self.shm = SharedMemory(name=name)
+        self.name = self.shm.name
+        self.arrays = {
+            column: np.ndarray(
+                self.length, dtype=dtype, buffer=self.shm.buf, offset=offset
+            )
+            for (column, dtype), offset in zip(self.layout, offsets)
+        }
+
+    def spec(self) -> tuple:
+        return self.layout, self.length, self.name
+
+    def close(self) -> None:
+        # Every view into the block must be gone before it can close
+        self.arrays.clear()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class ShardTick(NamedTuple):
+    count: int
+    # Strip k owns rows bounds[k]:bounds[k + 1]
+    bounds: tuple[int, ...]
+    player_x: float
+    player_y: float
+    dt_seconds: float
+    max_radius: float
+    # World width and height monsters are kept inside
+    world: tuple[float, float]
+    bullet_x: np.ndarray
+    bullet_y: np.ndarray
+
+
+class ShardResult(NamedTuple):
+    # Own monsters touching the player
+    touching: int
+    # Store rows within reach of bullets hits[n], hits indexing bullets
+    rows: np.ndarray
+    hits: np.ndarray
+
+
+class ShardKernel:
+    # One strip's share of a tick. Each worker process runs one; the
+    # in-process reference runs them all in turn. Every strip finishes
+    # a phase before any strip starts the next.
+    def __init__(
+        self, index: int, strips: int, tile_map: TileMap | None = None
+    ) -> None:
+        self.index = index
+        self.strips = strips
+        self.tile_map = tile_map
+        self.player = Player(0.0, 0.0, 0.0)
+        self.arrays: dict[str, np.ndarray] = {}
+        self.dir_x: np.ndarray | None = None
+        self.dir_y: np.ndarray | None = None
+        self.view = MonsterStore(1)
+        self.tick: ShardTick | None = None
+        self.lo = 0
+        self.hi = 0
+
+    def attach(
+        self,
+        arrays: dict[str, np.ndarray],
+        dir_x: np.ndarray | None = None,
+        dir_y: np.ndarray | None = None,
+    ) -> None:
+        # Monster columns (at least SHARED_COLUMNS and SCRATCH_COLUMNS)
+        # and flow field directions to work on from now on
+        self.detach()
+        self.arrays = arrays
+        self.dir_x = dir_x
+        self.dir_y = dir_y
+
+    def detach(self) -> None:
+        self.arrays = {}
+        self.dir_x = None
+        self.dir_y = None
+        self.view = MonsterStore(1)
+        self.tick = None
+
+    def run(self, tick: ShardTick, barrier) -> ShardResult:
+        self.begin(tick)
+        self.move()
+        barrier.wait()
+        for pass_index in range(MONSTER_SEPARATION_PASSES):
+            self.separate(pass_index)
+            barrier.wait()
+        return self.finish()
+
+    def begin(self, tick: ShardTick) -> None:
+        self.tick = tick
+        self.lo = tick.bounds[self.index]
+        self.hi = tick.bounds[self.index + 1]
+        self.player.x = tick.player_x
+        self.player.y = tick.player_y
+        # A store over this strip's rows, for its vectorized methods
+        own = slice(self.lo, self.hi)
+        self.view.load_arrays(
+            {name: self.arrays[name][own] for name, _ in SHARED_COLUMNS},
+            [],
+            copy=False,
+        )
+
+    def move(self) -> None:
+        view = self.view
+        if not view:
+            return
+        view.remember_positions()
+        if self.dir_x is None:
+            view.update_towards(self.player, self.tick.dt_seconds)
+            return
+        index, inside = self.tile_map.tile_indices(view.x, view.y)
+        view.update_along(
+            np.where(inside, self.dir_x[index], 0.0),
+            np.where(inside, self.dir_y[index], 0.0),
+            self.player,
+            self.tick.dt_seconds,
+        )
+
+    def separate(self, pass_index: int) -> None:
+        # This strip's share of one separation_pass, written to the
+        # other buffer. Neighbours in other strips (the halo) are read
+        # where their owners keep them.
+        lo, hi = self.lo, self.hi
+        if lo == hi:
+            return
+        arrays = self.arrays
+        n = self.tick.count
+        src = ("x", "y") if pass_index % 2 == 0 else ("sep_x", "sep_y")
+        dst = ("sep_x", "sep_y") if pass_index % 2 == 0 else ("x", "y")
+        xs = arrays[src[0]][:n]
+        ys = arrays[src[1]][:n]
+        radius = arrays["radius"][:n]
+        uid = arrays["uid"][:n]
+        own_x = xs[lo:hi]
+        reach = 2.0 * self.tick.max_radius + MONSTER_SEPARATION_PADDING
+        near = np.flatnonzero(
+            (xs >= own_x.min() - reach) & (xs <= own_x.max() + reach)
+        )
+        own = np.arange(lo, hi)
+        halo = near[(near < lo) | (near >= hi)]
+        separation_pass(
+            xs, ys, radius, uid, own, np.concatenate((own, halo)),
+            arrays[dst[0]], arrays[dst[1]], self.tick.world,
+        )
+
+    def finish(self) -> ShardResult:
+        view = self.view
+        tick = self.tick
+        if not view:
+            return ShardResult(0, *NO_PAIRS)
+        if MONSTER_SEPARATION_PASSES % 2:
+            own = slice(self.lo, self.hi)
+            view.x[:] = self.arrays["sep_x"][own]
+            view.y[:] = self.arrays["sep_y"][own]
+        view.push_away_from(
+            tick.player_x, tick.player_y, PLAYER_MONSTER_PADDING
+        )
+        if self.tile_map is not None:
+            resolve_monster_walls(view, self.tile_map)
+        touching = view.count_touching(
+            tick.player_x, tick.player_y, PLAYER_MONSTER_PADDING
+        )
+        bx = tick.bullet_x
+        by = tick.bullet_y
+        q, k = neighbour_pairs(
+            view.x, view.y, bx, by, tick.max_radius + BULLET_RADIUS
+        )
+        inside = np.hypot(view.x[q] - bx[k], view.y[q] - by[k]) <= (
+            view.radius[q] + BULLET_RADIUS
+        )
+        return ShardResult(touching, q[inside] + self.lo, k[inside])
+
+
+def _shard_worker(conn, barrier, index: int, strips: int, map_file) -> None:
+    tile_map = load_tile_map(map_file) if map_file else None
+    kernel = ShardKernel(index, strips, tile_map)
+    blocks: list[SharedColumns] = []
+    try:
+        while True:
+            message = conn.recv()
+            kind = message[0]
+            if kind == "stop":
+                break
+            if kind == "attach":
+                kernel.detach()
+                for block in blocks:
+                    block.close()
+                blocks = [SharedColumns(*spec) for spec in message[1]]
+                arrays: dict[str, np.ndarray] = {}
+                for block in blocks:
+                    arrays.update(block.arrays)
+                kernel.attach(
+                    arrays, arrays.get("dir_x"), arrays.get("dir_y")
+                )
+            elif kind == "tick":
+                conn.send(("done", kernel.run(message[1], barrier)))
+    except Exception:
+        # Release the other strips from the barrier, then report
+        barrier.abort()
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        kernel.detach()
+        for block in blocks:
+            block.close()
+
+
+class ShardedSimulation(Simulation):
+    # Headless engine for very large hordes. Each tick the player,
+    # spawning and bullets run here as in Simulation; then monster rows
+    # are regrouped by vertical strip (migration) and each strip moves,
+    # separates and collides its own monsters, reading neighbours past
+    # its edges (the halo) straight from shared memory. Separation is
+    # Jacobi-style and ties go to the lower uid, so the outcome is the
+    # same for any strip count, and the same as a numpy Simulation with
+    # separation "jacobi" and no LOD. processes=False runs the strips
+    # in turn in this process.
+    def __init__(
+        self,
+        seed: int | None = None,
+        shards: int = SHARD_COUNT,
+        processes: bool = True,
+        bullet_backend: str = BULLET_BACKEND,
+        map_file: str | None = MAP_FILE,
+    ) -> None:
+        super().__init__(seed, "numpy", bullet_backend, map_file)
+        # LOD buckets monsters by row, which would tie results to the
+        # row order
+        self.lod = None
+        self.separation = "jacobi"
+        self.map_file = map_file
+        self.shards = max(1, int(shards))
+        self.processes = bool(processes)
+        self.bounds = (0,) * (self.shards + 1)
+        self.regroups = 0
+        self.monsters.reserve(SHARD_MONSTER_CAPACITY)
+        self._block: SharedColumns | None = None
+        self._field_block: SharedColumns | None = None
+        self._field_target: tuple[int, int] | None = None
+        self._scratch: dict[str, np.ndarray] = {}
+        self._workers: list = []
+        self._conns: list = []
+        self._kernels: list[ShardKernel] = []
+        if self.processes:
+            self._start_workers()
+        else:
+            self._kernels = [
+                ShardKernel(k, self.shards, self.tile_map)
+                for k in range(self.shards)
+            ]
+
+    def __enter__(self) -> "ShardedSimulation":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _start_workers(self) -> None:
+        # Workers must share this process's resource tracker: one of
+        # their own would unlink the blocks they attach to as they exit
+        resource_tracker.ensure_running()
+        context = multiprocessing.get_context()
+        barrier = context.Barrier(self.shards)
+        for k in range(self.shards):
+            parent, child = context.Pipe()
+            worker = context.Process(
+                target=_shard_worker,
+                args=(child, barrier, k, self.shards, self.map_file),
+                name=f"shard-{k}",
+                daemon=True,
+            )
+            worker.start()
+            child.close()
+            self._workers.append(worker)
+            self._conns.append(parent)
+
+    def close(self) -> None:
+        # Stop the workers and move the monsters back into private
+        # arrays, so the simulation stays usable in this process
+        for conn in self._conns:
+            try:
+                conn.send(("stop",))
+            except OSError:
+                pass
+        for worker in self._workers:
+            worker.join(5.0)
+            if worker.is_alive():
+                worker.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._workers = []
+        self._conns = []
+        block = self._block
+        if block is not None:
+            self.monsters.rebind(
+                {
+                    name: np.zeros(block.length, dtype=dtype)
+                    for name, dtype in SHARED_COLUMNS
+                }
+            )
+            block.close()
+            self._block = None
+        if self._field_block is not None:
+            self._field_block.close()
+            self._field_block = None
+
+    def step(self, dt_seconds: float, inputs: FrameInput) -> None:
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+        self.time += dt_seconds
+        self.frame += 1
+        self.items.advance(self.time)
+        player = self.player
+        player.prev_x = player.x
+        player.prev_y = player.y
+        remember_positions(self.bullets)
+
+        player.update(inputs.move_x, inputs.move_y, dt_seconds)
+        player.update_facing_towards(inputs.aim_x, inputs.aim_y)
+        tile_map = self.tile_map
+        if tile_map is not None:
+            player.x, player.y = tile_map.push_out(
+                player.x, player.y, float(PLAYER_RADIUS)
+            )
+        if prof is not None:
+            prof.mark("player")
+        self._spawn_monsters()
+        if prof is not None:
+            prof.mark("spawning")
+        # Bullets never depend on monsters until they collide, so they
+        # move before the strips run and go out with the tick
+        self._fire_shots()
+        self._fire_volleys()
+        update_bullets(self.bullets, dt_seconds, tile_map)
+        if prof is not None:
+            prof.mark("bullets")
+
+        results = self._run_strips(dt_seconds)
+        if prof is not None:
+            prof.mark("update_monsters")
+        touching = sum(result.touching for result in results)
+        if touching:
+            player.take_damage(
+                touching * MONSTER_DAMAGE_PER_SECOND * dt_seconds
+            )
+        if prof is not None:
+            prof.mark("apply_monster_damage")
+        resolve_contact_hits(
+            player,
+            self.monsters,
+            self.bullets,
+            self.items,
+            self.rng,
+            np.concatenate([r.rows for r in results] or [NO_PAIRS[0]]),
+            np.concatenate([r.hits for r in results] or [NO_PAIRS[1]]),
+            self.item_pool.acquire,
+        )
+        if prof is not None:
+            prof.mark("collision")
+        self._collect_items()
+        if prof is not None:
+            prof.mark("item_pickup")
+
+    def _run_strips(self, dt_seconds: float) -> list[ShardResult]:
+        store = self.monsters
+        if not store:
+            return []
+        if self.processes:
+            self._share()
+        self._regroup()
+        player = self.player
+        field = self.flow_field
+        if field is not None:
+            field.update(player.x, player.y)
+        bullets = self.bullets
+        if isinstance(bullets, BulletPool):
+            bullet_x = bullets.x.copy()
+            bullet_y = bullets.y.copy()
+        else:
+            bullet_x = np.fromiter((b.x for b in bullets), np.float64)
+            bullet_y = np.fromiter((b.y for b in bullets), np.float64)
+        tick = ShardTick(
+            len(store),
+            self.bounds,
+            player.x,
+            player.y,
+            dt_seconds,
+            float(store.radius.max()),
+            (float(WORLD_WIDTH), float(WORLD_HEIGHT)),
+            bullet_x,
+            bullet_y,
+        )
+        if self.processes:
+            return self._run_workers(tick)
+
+        arrays = {name: getattr(store, name) for name, _ in SHARED_COLUMNS}
+        for name, dtype in SCRATCH_COLUMNS:
+            scratch = self._scratch.get(name)
+            if scratch is None or len(scratch) < len(store):
+                scratch = self._scratch[name] = np.zeros(
+                    store.capacity, dtype=dtype
+                )
+            arrays[name] = scratch
+        kernels = self._kernels
+        for kernel in kernels:
+            if field is not None:
+                kernel.attach(arrays, field.dir_x, field.dir_y)
+            else:
+                kernel.attach(arrays)
+            kernel.begin(tick)
+            kernel.move()
+        for pass_index in range(MONSTER_SEPARATION_PASSES):
+            for kernel in kernels:
+                kernel.separate(pass_index)
+        return [kernel.finish() for kernel in kernels]
+
+    def _run_workers(self, tick: ShardTick) -> list[ShardResult]:
+        for conn in self._conns:
+            conn.send(("tick", tick))
+        results = []
+        failure = None
+        for conn in self._conns:
+            kind, payload = conn.recv()
+            if kind == "error":
+                failure = failure or payload
+            else:
+                results.append(payload)
+        if failure is not None:
+            self.close()
+            raise RuntimeError(f"shard worker failed:\n{failure}")
+        return results
+
+    def _share(self) -> None:
+        # Keep the store's worker-visible columns in shared memory; a
+        # store that outgrew its block gets a bigger one
+        store = self.monsters
+        block = self._block
+        if block is None or store.capacity > block.length:
+            new = SharedColumns(
+                SHARED_COLUMNS + SCRATCH_COLUMNS, store.capacity
+            )
+            store.rebind(
+                {name: new.arrays[name] for name, _ in SHARED_COLUMNS}
+            )
+            if block is not None:
+                block.close()
+            self._block = block = new
+            specs = [block.spec()]
+            field = self.flow_field
+            if field is not None:
+                if self._field_block is None:
+                    self._field_block = SharedColumns(
+                        FIELD_COLUMNS, len(field.dir_x)
+                    )
+                    self._field_target = None
+                specs.append(self._field_block.spec())
+            for conn in self._conns:
+                conn.send(("attach", specs))
+        elif (
+            store.x.ctypes.data != block.arrays["x"].ctypes.data
+        ):
+            # Reloaded into new arrays, e.g. from a snapshot
+            store.rebind(
+                {name: block.arrays[name] for name, _ in SHARED_COLUMNS}
+            )
+        field = self.flow_field
+        if field is not None:
+            field.update(self.player.x, self.player.y)
+            if field.target != self._field_target:
+                arrays = self._field_block.arrays
+                arrays["dir_x"][:] = field.dir_x
+                arrays["dir_y"][:] = field.dir_y
+                self._field_target = field.target
+
+    def _regroup(self) -> None:
+        # Migration: rows are kept grouped by the strip their monster is
+        # in, so each strip owns one contiguous range
+        store = self.monsters
+        strips = self.shards
+        strip = np.floor(store.x * (strips / float(WORLD_WIDTH)))
+        strip = np.clip(strip, 0, strips - 1).astype(np.int16)
+        if len(strip) > 1 and (strip[1:] < strip[:-1]).any():
+            order = np.argsort(strip, kind="stable")
+            store.reorder(order)
+            strip = strip[order]
+            self.regroups += 1
+        self.bounds = tuple(
+            np.searchsorted(strip, np.arange(strips + 1)).tolist()
+        )
+
+
+def run_soak(
+    sim: Simulation,
+    monsters: int,
+    ticks: int,
+    check_every: int = 0,
+    reference: Simulation | None = None,
+) -> tuple[list[float], list[int]]:
+    # Fill the arena, then step with the benchmark's scripted input;
+    # returns per-tick seconds and the ticks where sim and reference
+    # disagreed
+    from bench import scripted_input
+    from replay import state_digest
+
+    sims = [sim] if reference is None else [sim, reference]
+    for s in sims:
+        spawn_horde(s.monsters, s.player, s.rng, monsters)
+    dt = 1.0 / float(SIMULATION_TICK_RATE)
+    times: list[float] = []
+    mismatches: list[int] = []
+    for tick in range(ticks):
+        inputs = scripted_input(tick)
+        start = time.perf_counter()
+        sim.step(dt, inputs)
+        times.append(time.perf_counter() - start)
+        if reference is None:
+            continue
+        reference.step(dt, inputs)
+        last = tick == ticks - 1
+        if (check_every and (tick + 1) % check_every == 0) or last:
+            if state_digest(sim) != state_digest(reference):
+                mismatches.append(tick)
+    return times, mismatches
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Run a headless sharded simulation of a large horde."
+    )
+    parser.add_argument("--monsters", type=int, default=5000)
+    parser.add_argument("--shards", type=int, default=SHARD_COUNT)
+    parser.add_argument("--ticks", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument(
+        "--world", type=float, default=1.0, metavar="SCALE",
+        help="world size as a multiple of the configured one each way",
+    )
+    parser.add_argument(
+        "--in-process", action="store_true",
+        help="run the strips in turn in this process",
+    )
+    parser.add_argument(
+        "--check", type=int, default=0, metavar="TICKS",
+        help="compare against the single-process engine every TICKS "
+        "ticks (0: only at the end, when --verify is given)",
+    )
+    parser.add_argument(
+        "--verify", action="store_true",
+        help="step a single-process numpy Simulation alongside",
+    )
+    args = parser.parse_args()
+
+    if args.world != 1.0:
+        # Before any simulation exists, so workers fork with it too
+        from sweep import GAME_MODULES, apply_overrides
+
+        apply_overrides(
+            {
+                "WORLD_WIDTH": WORLD_WIDTH * args.world,
+                "WORLD_HEIGHT": WORLD_HEIGHT * args.world,
+                "MONSTER_DENSITY_SCALE": (
+                    MONSTER_DENSITY_SCALE * args.world * args.world
+                ),
+            },
+            GAME_MODULES + ("bench", __name__),
+        )
+
+    reference = None
+    if args.verify or args.check:
+        reference = Simulation(args.seed, "numpy")
+        reference.lod = None
+        reference.separation = "jacobi"
+    with ShardedSimulation(
+        args.seed, args.shards, processes=not args.in_process
+    ) as sim:
+        times, mismatches = run_soak(
+            sim, args.monsters, args.ticks, args.check, reference
+        )
+        ordered = sorted(times)
+        print(
+            f"{args.ticks} ticks, {args.shards} strips, "
+            f"{len(sim.monsters)} monsters left, {sim.regroups} regroups"
+        )
+        print(
+            f"tick ms: mean {sum(times) / len(times) * 1000.0:.2f}"
+            f"  p50 {ordered[len(ordered) // 2] * 1000.0:.2f}"
+            f"  p99 {ordered[int(len(ordered) * 0.99)] * 1000.0:.2f}"
+        )
+    if reference is None:
+        return 0
+    if mismatches:
+        print(f"differs from the engine from tick {mismatches[0]}")
+        return 1
+    print("matches the single-process engine")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,899 @@
+import math
+import random
+from typing import NamedTuple
+
+import numpy as np
+
+from config import *
+from player import Player
+from monster import Monster
+from monster_store import MonsterStore
+from bullet import Bullet
+from bullet_pool import BulletPool
+from item import Item
+from item_store import ItemStore
+from spatial import SpatialGrid, neighbour_pairs
+from collision import resolve_bullet_hits
+from free_list import FreeList
+from tilemap import FlowField, TileMap, load_tile_map
+from spawner import Wave, spawn_horde
+from lod import LodPlan, LodScheduler
+
+
+class FrameInput(NamedTuple):
+    move_x: float = 0.0
+    move_y: float = 0.0
+    aim_x: float = 0.0
+    aim_y: float = 0.0
+
+
+def normalize_move(move_x: int, move_y: int) -> tuple[float, float]:
+    # Key axes in {-1, 0, 1}; diagonals are scaled to unit length
+    if move_x or move_y:
+        length = math.hypot(move_x, move_y)
+        move_x /= length
+        move_y /= length
+    return float(move_x), float(move_y)
+
+
+def generate_monster(
+    player: Player,
+    rng: random.Random,
+    pool: FreeList | None = None,
+    tile_map: TileMap | None = None,
+) -> Monster:
+    make = pool.acquire if pool is not None else Monster
+    # Try random positions away from the player
+    for _ in range(32):
+        x = rng.uniform(16.0, float(WORLD_WIDTH - 16))
+        y = rng.uniform(16.0, float(WORLD_HEIGHT - 16))
+        if (
+            math.hypot(x - player.x, y - player.y)
+            >= MONSTER_MIN_DISTANCE_FROM_PLAYER
+            and (tile_map is None or not tile_map.blocked_at(x, y))
+        ):
+            return make(
+                x,
+                y,
+                float(MONSTER_SPEED),
+                float(MONSTER_RADIUS),
+                MONSTER_COLOR,
+                float(MONSTER_MAX_HP),
+            )
+
+    # Fallback: place near a corner far from player
+    x = 16.0 if player.x > WORLD_WIDTH / 2 else float(WORLD_WIDTH - 16)
+    y = 16.0 if player.y > WORLD_HEIGHT / 2 else float(WORLD_HEIGHT - 16)
+    return make(
+        x,
+        y,
+        float(MONSTER_SPEED),
+        float(MONSTER_RADIUS),
+        MONSTER_COLOR,
+        float(MONSTER_MAX_HP),
+    )
+
+
+def generate_boss(
+    player: Player,
+    rng: random.Random,
+    pool: FreeList | None = None,
+    tile_map: TileMap | None = None,
+) -> Monster:
+    make = pool.acquire if pool is not None else Monster
+    # Integer scale with player level: floor(level / step), min 1
+    scale = max(1, int(player.level) // int(BOSS_SPAWN_LEVEL_STEP))
+    base_radius = float(BOSS_RADIUS)
+    scaled_hp = float(BOSS_MAX_HP) * float(scale)
+    # Spawn far from player near edges
+    for _ in range(32):
+        x = rng.uniform(16.0, float(WORLD_WIDTH - 16))
+        y = rng.uniform(16.0, float(WORLD_HEIGHT - 16))
+        if (
+            math.hypot(x - player.x, y - player.y)
+            >= MONSTER_MIN_DISTANCE_FROM_PLAYER
+            and (tile_map is None or not tile_map.blocked_at(x, y))
+        ):
+            return make(
+                x,
+                y,
+                float(BOSS_SPEED),
+                base_radius,
+                BOSS_COLOR,
+                scaled_hp,
+            )
+    # Fallback: corner
+    x = 16.0 if player.x > WORLD_WIDTH / 2 else float(WORLD_WIDTH - 16)
+    y = 16.0 if player.y > WORLD_HEIGHT / 2 else float(WORLD_HEIGHT - 16)
+    return make(
+        x,
+        y,
+        float(BOSS_SPEED),
+        base_radius,
+        BOSS_COLOR,
+        scaled_hp,
+    )
+
+
+def add_monster(
+    monsters: list[Monster] | MonsterStore,
+    monster: Monster,
+    pool: FreeList | None = None,
+) -> None:
+    monsters.append(monster)
+    if pool is not None and isinstance(monsters, MonsterStore):
+        # The store copied the fields; the object itself is free again
+        pool.release(monster)
+
+
+def apply_monster_damage(
+    player: Player,
+    monsters: list[Monster] | MonsterStore,
+    dt_seconds: float,
+    grid: SpatialGrid | None = None,
+) -> None:
+    if isinstance(monsters, MonsterStore):
+        touching = monsters.count_touching(
+            player.x, player.y, PLAYER_MONSTER_PADDING
+        )
+        if touching:
+            player.take_damage(
+                touching * MONSTER_DAMAGE_PER_SECOND * dt_seconds
+            )
+        return
+    if grid is None:
+        candidates = monsters
+    else:
+        reach = (
+            float(PLAYER_RADIUS)
+            + max_monster_radius(monsters)
+            + PLAYER_MONSTER_PADDING
+        )
+        candidates = [
+            monsters[k] for k in grid.query(player.x, player.y, reach)
+        ]
+    damage_total = 0.0
+    for m in candidates:
+        if math.hypot(player.x - m.x, player.y - m.y) <= (
+            float(PLAYER_RADIUS) + float(m.radius) + PLAYER_MONSTER_PADDING
+        ):
+            damage_total += MONSTER_DAMAGE_PER_SECOND * dt_seconds
+    if damage_total > 0.0:
+        player.take_damage(damage_total)
+
+
+def max_monster_radius(monsters: list[Monster] | MonsterStore) -> float:
+    if not monsters:
+        return float(max(MONSTER_RADIUS, BOSS_RADIUS))
+    if isinstance(monsters, MonsterStore):
+        return float(monsters.radius.max())
+    return max(float(m.radius) for m in monsters)
+
+
+def separate_monsters(
+    monsters: list[Monster] | MonsterStore,
+    grid: SpatialGrid | None = None,
+    active: list[int] | None = None,
+    separation: str = "sequential",
+) -> None:
+    # active limits pairwise separation to those indices; the grid then
+    # holds only them, still keyed by their index in monsters
+    if separation == "jacobi" and isinstance(monsters, MonsterStore):
+        # The store paths after this never look at the grid
+        separate_store(monsters, active)
+        return
+    if grid is None:
+        grid = SpatialGrid()
+    grid.ensure_cell_size(
+        2.0 * max_monster_radius(monsters) + MONSTER_SEPARATION_PADDING
+    )
+    if isinstance(monsters, MonsterStore):
+        xs = monsters.x.tolist()
+        ys = monsters.y.tolist()
+        radii = monsters.radius.tolist()
+    else:
+        xs = [m.x for m in monsters]
+        ys = [m.y for m in monsters]
+        radii = [float(m.radius) for m in monsters]
+    if active is not None:
+        xs = [xs[k] for k in active]
+        ys = [ys[k] for k in active]
+        radii = [radii[k] for k in active]
+    grid.rebuild_points(xs, ys)
+    if len(xs) > 1:
+        separate_points(xs, ys, radii, grid)
+    if active is not None:
+        grid.rebuild_keyed(active, xs, ys)
+    if len(xs) <= 1:
+        return
+    if isinstance(monsters, MonsterStore):
+        if active is None:
+            monsters.x[:] = xs
+            monsters.y[:] = ys
+        else:
+            monsters.x[active] = xs
+            monsters.y[active] = ys
+    else:
+        if active is not None:
+            monsters = [monsters[k] for k in active]
+        for m, x, y in zip(monsters, xs, ys):
+            m.x = x
+            m.y = y
+
+
+def separate_points(
+    xs: list[float],
+    ys: list[float],
+    radii: list[float],
+    grid: SpatialGrid,
+) -> None:
+    # Same pair order as a full i < j sweep: candidates are visited by
+    # index and re-queried whenever i moves, so results are identical
+    for _ in range(MONSTER_SEPARATION_PASSES):
+        for i in range(len(xs)):
+            ri = radii[i]
+            candidates = sorted(
+                k for k in grid.neighbours(xs[i], ys[i]) if k > i
+            )
+            pos = 0
+            while pos < len(candidates):
+                j = candidates[pos]
+                pos += 1
+                rj = radii[j]
+                dx = xs[j] - xs[i]
+                dy = ys[j] - ys[i]
+                dist = math.hypot(dx, dy)
+                if dist < 1e-6:
+                    # tiny nudge to avoid zero division
+                    dx, dy, dist = 1.0, 0.0, 1.0
+                min_dist = ri + rj + MONSTER_SEPARATION_PADDING
+                if dist < min_dist:
+                    overlap = float(min_dist - dist) * 0.5
+                    nx = dx / dist
+                    ny = dy / dist
+                    # push apart and clamp to the world
+                    xs[i] = max(
+                        16.0 + ri,
+                        min(float(WORLD_WIDTH - 16 - ri),
+                            xs[i] - nx * overlap),
+                    )
+                    ys[i] = max(
+                        16.0 + ri,
+                        min(float(WORLD_HEIGHT - 16 - ri),
+                            ys[i] - ny * overlap),
+                    )
+                    xs[j] = max(
+                        16.0 + rj,
+                        min(float(WORLD_WIDTH - 16 - rj),
+                            xs[j] + nx * overlap),
+                    )
+                    ys[j] = max(
+                        16.0 + rj,
+                        min(float(WORLD_HEIGHT - 16 - rj),
+                            ys[j] + ny * overlap),
+                    )
+                    grid.move(i, xs[i], ys[i])
+                    grid.move(j, xs[j], ys[j])
+                    candidates = sorted(
+                        k for k in grid.neighbours(xs[i], ys[i])
+                        if k > j
+                    )
+                    pos = 0
+
+
+def separate_store(
+    store: MonsterStore, active: list[int] | None = None
+) -> None:
+    # MONSTER_SEPARATION_PASSES Jacobi passes over the store, or over
+    # the active rows alone
+    own = (
+        np.arange(len(store))
+        if active is None
+        else np.asarray(active, dtype=np.intp)
+    )
+    if len(own) < 2:
+        return
+    world = (float(WORLD_WIDTH), float(WORLD_HEIGHT))
+    buffers = (
+        (store.x, store.y),
+        (np.empty_like(store.x), np.empty_like(store.y)),
+    )
+    for pass_index in range(MONSTER_SEPARATION_PASSES):
+        src = buffers[pass_index % 2]
+        dst = buffers[1 - pass_index % 2]
+        separation_pass(
+            src[0], src[1], store.radius, store.uid, own, own,
+            dst[0], dst[1], world,
+        )
+    if MONSTER_SEPARATION_PASSES % 2:
+        store.x[own] = buffers[1][0][own]
+        store.y[own] = buffers[1][1][own]
+
+
+def separation_pass(
+    xs: np.ndarray,
+    ys: np.ndarray,
+    radius: np.ndarray,
+    uid: np.ndarray,
+    own: np.ndarray,
+    rows: np.ndarray,
+    out_x: np.ndarray,
+    out_y: np.ndarray,
+    world: tuple[float, float],
+) -> None:
+    # One Jacobi pass over store columns. Each row in own (ascending)
+    # adds up the pushes from its neighbours among rows, which include
+    # own, as they all stood before the pass, in neighbour uid order;
+    # the result goes to out_x/out_y at the same row. Neither row order
+    # nor how the own rows are split between callers changes it.
+    if not len(own):
+        return
+    # Pairs of regular monsters come from cells sized for them; the few
+    # bigger ones, e.g. bosses, are matched by a scan of their own
+    regular = float(MONSTER_RADIUS)
+    padding = MONSTER_SEPARATION_PADDING
+    own_big = radius[own] > regular
+    rows_big = radius[rows] > regular
+    small_own = own[~own_big]
+    small_rows = rows[~rows_big]
+    q, p = neighbour_pairs(
+        xs[small_own],
+        ys[small_own],
+        xs[small_rows],
+        ys[small_rows],
+        2.0 * regular + padding,
+    )
+    found_i = [small_own[q]]
+    found_j = [small_rows[p]]
+    own_x = xs[own]
+    own_y = ys[own]
+    widest = float(radius[own].max())
+    for j in rows[rows_big].tolist():
+        reach = radius[j] + widest + padding
+        near = own[
+            (np.abs(own_x - xs[j]) <= reach)
+            & (np.abs(own_y - ys[j]) <= reach)
+        ]
+        found_i.append(near)
+        found_j.append(np.full(len(near), j))
+    for i in own[own_big].tolist():
+        reach = radius[i] + regular + padding
+        near = small_rows[
+            (np.abs(xs[small_rows] - xs[i]) <= reach)
+            & (np.abs(ys[small_rows] - ys[i]) <= reach)
+        ]
+        found_i.append(np.full(len(near), i))
+        found_j.append(near)
+    i = np.concatenate(found_i)
+    j = np.concatenate(found_j)
+    dx = xs[i] - xs[j]
+    dy = ys[i] - ys[j]
+    min_dist = radius[i] + radius[j] + padding
+    # Most cell neighbours are out of reach; a squared test with a
+    # little slack drops them before the exact one below
+    near = dx * dx + dy * dy <= min_dist * min_dist * (1.0 + 1e-9)
+    near &= i != j
+    # Index arrays gather much faster than scattered boolean masks
+    near = np.flatnonzero(near)
+    i = i[near]
+    j = j[near]
+    dx = dx[near]
+    dy = dy[near]
+    min_dist = min_dist[near]
+    dist = np.hypot(dx, dy)
+    # Coincident pairs split along x, the lower uid going left
+    same = dist < 1e-6
+    if same.any():
+        dx[same] = np.where(uid[i[same]] < uid[j[same]], -1.0, 1.0)
+        dy[same] = 0.0
+        dist[same] = 1.0
+    close = np.flatnonzero(dist < min_dist)
+    if own[-1] - own[0] + 1 == len(own):
+        slot = i[close] - own[0]
+    else:
+        slot = np.searchsorted(own, i[close])
+    j = j[close]
+    overlap = (min_dist[close] - dist[close]) * 0.5
+    push_x = dx[close] / dist[close] * overlap
+    push_y = dy[close] / dist[close] * overlap
+    # By slot, then neighbour uid; one key sorts far faster than two
+    order = np.argsort(slot * (int(uid.max()) + 1) + uid[j])
+    shift_x = np.bincount(slot[order], push_x[order], minlength=len(own))
+    shift_y = np.bincount(slot[order], push_y[order], minlength=len(own))
+    r = radius[own]
+    out_x[own] = np.clip(own_x + shift_x, 16.0 + r, world[0] - 16.0 - r)
+    out_y[own] = np.clip(own_y + shift_y, 16.0 + r, world[1] - 16.0 - r)
+
+
+def separate_player_and_monsters(
+    player: Player,
+    monsters: list[Monster] | MonsterStore,
+    grid: SpatialGrid | None = None,
+) -> None:
+    if isinstance(monsters, MonsterStore):
+        monsters.push_away_from(
+            player.x, player.y, PLAYER_MONSTER_PADDING
+        )
+        return
+    if grid is None:
+        candidates = range(len(monsters))
+    else:
+        reach = (
+            float(PLAYER_RADIUS)
+            + max_monster_radius(monsters)
+            + PLAYER_MONSTER_PADDING
+        )
+        candidates = sorted(grid.query(player.x, player.y, reach))
+    for k in candidates:
+        m = monsters[k]
+        dx = m.x - player.x
+        dy = m.y - player.y
+        dist = math.hypot(dx, dy)
+        if dist < 1e-6:
+            dx, dy, dist = 1.0, 0.0, 1.0
+        min_dist = (
+            float(PLAYER_RADIUS)
+            + float(m.radius)
+            + PLAYER_MONSTER_PADDING
+        )
+        if dist < min_dist:
+            overlap = float(min_dist - dist)
+            nx = dx / dist
+            ny = dy / dist
+            m.x += nx * overlap
+            m.y += ny * overlap
+            m.clamp_to_world()
+            if grid is not None:
+                grid.move(k, m.x, m.y)
+
+
+def update_monsters(
+    monsters: list[Monster] | MonsterStore,
+    player: Player,
+    dt_seconds: float,
+    field: FlowField | None = None,
+    lod: LodPlan | None = None,
+) -> None:
+    # With an LOD plan each monster steps by its own time, and those
+    # at 0.0 stay put this tick
+    if lod is None:
+        if isinstance(monsters, MonsterStore):
+            step = dt_seconds
+        else:
+            step = [dt_seconds] * len(monsters)
+    else:
+        step = lod.step_seconds
+    if field is None:
+        if isinstance(monsters, MonsterStore):
+            monsters.update_towards(player, step)
+            return
+        for monster, dt in zip(monsters, step):
+            if dt:
+                monster.update_towards(player, dt)
+        return
+    if isinstance(monsters, MonsterStore):
+        dir_x, dir_y = field.directions(monsters.x, monsters.y)
+        monsters.update_along(dir_x, dir_y, player, step)
+        return
+    direction_at = field.direction_at
+    for monster, dt in zip(monsters, step):
+        if not dt:
+            continue
+        dir_x, dir_y = direction_at(monster.x, monster.y)
+        if dir_x or dir_y:
+            monster.move_along(dir_x, dir_y, dt)
+        else:
+            monster.update_towards(player, dt)
+
+
+def resolve_monster_walls(
+    monsters: list[Monster] | MonsterStore,
+    tile_map: TileMap,
+    grid: SpatialGrid | None = None,
+) -> None:
+    # Separation can shove monsters into walls; push them back out
+    if isinstance(monsters, MonsterStore):
+        if not monsters:
+            return
+        near = tile_map.near_wall_mask(monsters.x, monsters.y)
+        xs = monsters.x
+        ys = monsters.y
+        radii = monsters.radius
+        for i in np.flatnonzero(near).tolist():
+            xs[i], ys[i] = tile_map.push_out(
+                float(xs[i]), float(ys[i]), float(radii[i])
+            )
+        return
+    if not monsters:
+        return
+    # Only monsters in a tile next to a wall can touch one, as above
+    n = len(monsters)
+    near = tile_map.near_wall_mask(
+        np.fromiter((m.x for m in monsters), np.float64, n),
+        np.fromiter((m.y for m in monsters), np.float64, n),
+    )
+    push_out = tile_map.push_out
+    for k in np.flatnonzero(near).tolist():
+        m = monsters[k]
+        x, y = push_out(m.x, m.y, m.radius)
+        if x != m.x or y != m.y:
+            m.x = x
+            m.y = y
+            # Monsters left out of LOD separation are not in the grid
+            if grid is not None and k in grid:
+                grid.move(k, x, y)
+
+
+def compute_spawn_interval(
+    elapsed_seconds: float, density: float | None = None
+) -> float:
+    # Decrease interval every full minute by a fixed step,
+    # down to a minimum cap, then divide by the density scale so a
+    # bigger world fills as fast per unit of area. The scale is read at
+    # call time so sweep overrides reach it.
+    if density is None:
+        density = MONSTER_DENSITY_SCALE
+    period = float(MONSTER_SPAWN_SCALING_PERIOD_SECONDS)
+    minutes = int(elapsed_seconds // period)
+    interval = (
+        MONSTER_SPAWN_INTERVAL_SECONDS
+        - minutes * MONSTER_SPAWN_INTERVAL_STEP_SECONDS
+    )
+    if interval < MONSTER_SPAWN_INTERVAL_MIN_SECONDS:
+        interval = MONSTER_SPAWN_INTERVAL_MIN_SECONDS
+    return float(interval) / density
+
+
+def create_monster_container(
+    backend: str = MONSTER_BACKEND,
+) -> list[Monster] | MonsterStore:
+    if backend == "numpy":
+        return MonsterStore()
+    if backend != "list":
+        raise ValueError(f"unknown monster backend: {backend!r}")
+    return []
+
+
+def create_bullet_container(
+    backend: str = BULLET_BACKEND,
+) -> list[Bullet] | BulletPool:
+    if backend == "pool":
+        return BulletPool()
+    if backend != "list":
+        raise ValueError(f"unknown bullet backend: {backend!r}")
+    return []
+
+
+def fire_bullet(
+    bullets: list[Bullet] | BulletPool,
+    x: float,
+    y: float,
+    vx: float,
+    vy: float,
+) -> None:
+    if isinstance(bullets, BulletPool):
+        bullets.spawn(x, y, vx, vy)
+    else:
+        bullets.append(Bullet(x, y, vx, vy))
+
+
+def update_bullets(
+    bullets: list[Bullet] | BulletPool,
+    dt_seconds: float,
+    tile_map: TileMap | None = None,
+) -> None:
+    # Bullets leaving the world or entering a wall tile are removed
+    if isinstance(bullets, BulletPool):
+        bullets.update(dt_seconds)
+        bullets.cull(
+            -BULLET_RADIUS,
+            -BULLET_RADIUS,
+            WORLD_WIDTH + BULLET_RADIUS,
+            WORLD_HEIGHT + BULLET_RADIUS,
+        )
+        if tile_map is not None and bullets:
+            bullets.despawn_mask(
+                tile_map.blocked_mask(bullets.x, bullets.y)
+            )
+        return
+    alive_bullets: list[Bullet] = []
+    for b in bullets:
+        b.update(dt_seconds)
+        if (
+            b.x < -BULLET_RADIUS
+            or b.x > WORLD_WIDTH + BULLET_RADIUS
+            or b.y < -BULLET_RADIUS
+            or b.y > WORLD_HEIGHT + BULLET_RADIUS
+        ):
+            continue
+        if tile_map is not None and tile_map.blocked_at(b.x, b.y):
+            continue
+        alive_bullets.append(b)
+    bullets[:] = alive_bullets
+
+
+def remember_positions(entities) -> None:
+    if isinstance(entities, (MonsterStore, BulletPool)):
+        entities.remember_positions()
+        return
+    for e in entities:
+        e.prev_x = e.x
+        e.prev_y = e.y
+
+
+class Simulation:
+    def __init__(
+        self,
+        seed: int | None = None,
+        monster_backend: str = MONSTER_BACKEND,
+        bullet_backend: str = BULLET_BACKEND,
+        map_file: str | None = MAP_FILE,
+    ) -> None:
+        if seed is None:
+            seed = random.randrange(1 << 32)
+        self.seed = int(seed)
+        self.rng = random.Random(self.seed)
+
+        self.player = Player(
+            float(WORLD_WIDTH // 2),
+            float(WORLD_HEIGHT // 2),
+            float(PLAYER_BASE_SPEED),
+        )
+        self.monsters = create_monster_container(monster_backend)
+        self.bullets = create_bullet_container(bullet_backend)
+        self.monster_pool = FreeList(Monster)
+        self.item_pool = FreeList(Item)
+        self.items = ItemStore(self.item_pool)
+        self.next_boss_level = int(BOSS_SPAWN_LEVEL_STEP)
+
+        self.time = 0.0
+        self.frame = 0
+        self.next_spawn_time = compute_spawn_interval(0.0)
+        self.next_shot_time = 0.0
+        self.next_volley_time = 0.0
+        self.waves = [
+            Wave(at, max(1, round(count * MONSTER_DENSITY_SCALE)))
+            for at, count in sorted(MONSTER_WAVES)
+        ]
+        self.next_wave = 0
+
+        self.tile_map = load_tile_map(map_file) if map_file else None
+        self.flow_field = (
+            FlowField(self.tile_map) if self.tile_map is not None else None
+        )
+
+        self.lod = LodScheduler() if MONSTER_LOD_TIERS else None
+        if MONSTER_SEPARATION not in ("sequential", "jacobi"):
+            raise ValueError(
+                f"unknown separation scheme: {MONSTER_SEPARATION!r}"
+            )
+        self.separation = MONSTER_SEPARATION
+
+        self.monster_grid = SpatialGrid()
+        self.bullet_grid = SpatialGrid()
+        # Optional phase timer with start()/mark(name), e.g. PhaseTimer
+        self.profiler = None
+
+    def step(self, dt_seconds: float, inputs: FrameInput) -> None:
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+        self.time += dt_seconds
+        self.frame += 1
+        self.items.advance(self.time)
+        self._remember_positions()
+
+        player = self.player
+        player.update(inputs.move_x, inputs.move_y, dt_seconds)
+        player.update_facing_towards(inputs.aim_x, inputs.aim_y)
+        tile_map = self.tile_map
+        if tile_map is not None:
+            player.x, player.y = tile_map.push_out(
+                player.x, player.y, float(PLAYER_RADIUS)
+            )
+        if prof is not None:
+            prof.mark("player")
+
+        self._spawn_monsters()
+        if prof is not None:
+            prof.mark("spawning")
+        if self.flow_field is not None:
+            self.flow_field.update(player.x, player.y)
+        lod = (
+            self.lod.plan(self.monsters, player, self.frame, dt_seconds)
+            if self.lod is not None
+            else None
+        )
+        update_monsters(
+            self.monsters, player, dt_seconds, self.flow_field, lod
+        )
+        if prof is not None:
+            prof.mark("update_monsters")
+
+        separate_monsters(
+            self.monsters,
+            self.monster_grid,
+            lod.separate if lod is not None else None,
+            self.separation,
+        )
+        if prof is not None:
+            prof.mark("separate_monsters")
+        separate_player_and_monsters(
+            player, self.monsters, self.monster_grid
+        )
+        if tile_map is not None:
+            resolve_monster_walls(
+                self.monsters, tile_map, self.monster_grid
+            )
+        if prof is not None:
+            prof.mark("separate_player_and_monsters")
+        apply_monster_damage(
+            player, self.monsters, dt_seconds, self.monster_grid
+        )
+        if prof is not None:
+            prof.mark("apply_monster_damage")
+
+        self._fire_shots()
+        self._fire_volleys()
+        update_bullets(self.bullets, dt_seconds, tile_map)
+        if prof is not None:
+            prof.mark("bullets")
+
+        resolve_bullet_hits(
+            player,
+            self.monsters,
+            self.bullets,
+            self.items,
+            self.rng,
+            self.bullet_grid,
+            self.monster_pool,
+            self.item_pool,
+        )
+        if prof is not None:
+            prof.mark("collision")
+        self._collect_items()
+        if prof is not None:
+            prof.mark("item_pickup")
+
+    def _remember_positions(self) -> None:
+        player = self.player
+        player.prev_x = player.x
+        player.prev_y = player.y
+        remember_positions(self.monsters)
+        remember_positions(self.bullets)
+
+    def _spawn_monsters(self) -> None:
+        player = self.player
+        due = 0
+        while self.time >= self.next_spawn_time:
+            due += 1
+            self.next_spawn_time += compute_spawn_interval(self.time)
+        if due == 1:
+            add_monster(
+                self.monsters,
+                generate_monster(
+                    player, self.rng, self.monster_pool, self.tile_map
+                ),
+                self.monster_pool,
+            )
+        elif due:
+            # Several spawns fell due at once; place them together so
+            # they do not land on top of each other
+            spawn_horde(
+                self.monsters,
+                player,
+                self.rng,
+                due,
+                self.monster_pool,
+                self.tile_map,
+            )
+
+        waves = self.waves
+        while (
+            self.next_wave < len(waves)
+            and self.time >= waves[self.next_wave].at_seconds
+        ):
+            spawn_horde(
+                self.monsters,
+                player,
+                self.rng,
+                waves[self.next_wave].count,
+                self.monster_pool,
+                self.tile_map,
+            )
+            self.next_wave += 1
+
+        # Boss spawn on level milestones
+        if player.level >= self.next_boss_level:
+            add_monster(
+                self.monsters,
+                generate_boss(
+                    player, self.rng, self.monster_pool, self.tile_map
+                ),
+                self.monster_pool,
+            )
+            self.next_boss_level += int(BOSS_SPAWN_LEVEL_STEP)
+
+    def _fire_shots(self) -> None:
+        # Shooting continuously from facing direction
+        player = self.player
+        while self.time >= self.next_shot_time:
+            fx, fy = player.get_facing()
+            if not fx and not fy:
+                fx, fy = 1.0, 0.0
+            vx = fx * BULLET_SPEED
+            vy = fy * BULLET_SPEED
+            mx, my = player.get_muzzle_position()
+            fire_bullet(self.bullets, mx, my, vx, vy)
+            self.next_shot_time += BULLET_COOLDOWN_SECONDS
+
+    def _fire_volleys(self) -> None:
+        # Volley attack on its own cooldown
+        player = self.player
+        while self.time >= self.next_volley_time:
+            fx, fy = player.get_facing()
+            if not fx and not fy:
+                fx, fy = 1.0, 0.0
+            mx, my = player.get_muzzle_position()
+            # Create symmetric angle offsets around 0
+            count = int(VOLLEY_BULLET_COUNT)
+            spread_deg = float(VOLLEY_SPREAD_DEGREES)
+            if count <= 1:
+                offsets = [0.0]
+            else:
+                step = spread_deg / float(count - 1)
+                start = -spread_deg / 2.0
+                offsets = [start + i * step for i in range(count)]
+            for deg in offsets:
+                rad = math.radians(deg)
+                cos_a = math.cos(rad)
+                sin_a = math.sin(rad)
+                rx = fx * cos_a - fy * sin_a
+                ry = fx * sin_a + fy * cos_a
+                bvx = rx * float(VOLLEY_BULLET_SPEED)
+                bvy = ry * float(VOLLEY_BULLET_SPEED)
+                fire_bullet(self.bullets, mx, my, bvx, bvy)
+            self.next_volley_time += float(VOLLEY_COOLDOWN_SECONDS)
+
+    def _collect_items(self) -> None:
+        player = self.player
+        heal = self.items.collect(
+            player.x, player.y, float(PLAYER_RADIUS + ITEM_SIZE)
+        )
+        if heal:
+            player.hp = min(float(PLAYER_MAX_HP), player.hp + heal)
+
+
+class FixedStepDriver:
+    # Runs the simulation in fixed ticks regardless of the render rate;
+    # advance() returns how far rendering sits between the last two
+    # ticks, for interpolation
+    def __init__(
+        self,
+        sim: Simulation,
+        tick_rate: float = SIMULATION_TICK_RATE,
+        max_catch_up_steps: int = SIMULATION_MAX_CATCH_UP_STEPS,
+    ) -> None:
+        self.sim = sim
+        self.step_seconds = 1.0 / float(tick_rate)
+        self.max_catch_up_steps = max(1, int(max_catch_up_steps))
+        self.accumulator = 0.0
+        self.dropped_seconds = 0.0
+
+    def advance(self, dt_seconds: float, inputs: FrameInput) -> float:
+        self.accumulator += dt_seconds
+        step = self.step_seconds
+        steps = 0
+        while self.accumulator >= step:
+            if steps >= self.max_catch_up_steps:
+                # Too far behind: drop the backlog instead of spiralling
+                dropped = self.accumulator - math.fmod(
+                    self.accumulator, step
+                )
+                self.dropped_seconds += dropped
+                self.accumulator -= dropped
+                break
+            self.sim.step(step, inputs)
+            self.accumulator -= step
+            steps += 1
+        return self.accumulator / step
@@ -0,0 +1,314 @@
+import mmap
+import struct
+
+import numpy as np
+
+from config import *
+from monster import Monster
+from monster_store import MonsterStore
+from bullet import Bullet
+from bullet_pool import BulletPool
+from item import Item
+from simulation import Simulation
+
+SNAPSHOT_MAGIC = b"SNMS"
+SNAPSHOT_VERSION = 4
+
+HEADER = struct.Struct("<4sHH")
+# seed, time, frame, next spawn/shot/volley time, next boss level
+TIMERS = struct.Struct("<Qdqdddq")
+# x, y, prev_x, prev_y, speed, hp, face_dx, face_dy, xp, xp_to_next,
+# level
+PLAYER = struct.Struct("<10dq")
+# Mersenne Twister: version, has gauss_next, gauss_next, 625 state words
+RNG = struct.Struct("<iid625I")
+# monsters, palette entries, bullets, items
+COUNTS = struct.Struct("<qqqq")
+
+MONSTER_COLUMNS = (
+    ("x", np.float64),
+    ("y", np.float64),
+    ("prev_x", np.float64),
+    ("prev_y", np.float64),
+    ("speed", np.float64),
+    ("radius", np.float64),
+    ("hp", np.float64),
+    ("lod_dt", np.float64),
+    ("uid", np.int64),
+    ("color_index", np.int16),
+)
+BULLET_COLUMNS = (
+    ("x", np.float64),
+    ("y", np.float64),
+    ("prev_x", np.float64),
+    ("prev_y", np.float64),
+    ("vx", np.float64),
+    ("vy", np.float64),
+    ("serial", np.int64),
+)
+ITEM_COLUMNS = (
+    ("x", np.float64),
+    ("y", np.float64),
+    ("heal", np.float64),
+    ("expires_at", np.float64),
+)
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _monster_columns(
+    monsters,
+) -> tuple[dict[str, np.ndarray], list[tuple[int, int, int]]]:
+    if isinstance(monsters, MonsterStore):
+        columns = {
+            name: getattr(monsters, name) for name, _ in MONSTER_COLUMNS
+        }
+        return columns, list(monsters.palette)
+    palette: list[tuple[int, int, int]] = []
+    ids: dict[tuple[int, int, int], int] = {}
+    color_index = []
+    for m in monsters:
+        color = tuple(m.color)
+        cid = ids.get(color)
+        if cid is None:
+            cid = ids[color] = len(palette)
+            palette.append(color)
+        color_index.append(cid)
+    columns = {
+        name: np.array([getattr(m, name) for m in monsters], dtype=dtype)
+        for name, dtype in MONSTER_COLUMNS[:-2]
+    }
+    # List order is spawn order
+    columns["uid"] = np.arange(len(monsters), dtype=np.int64)
+    columns["color_index"] = np.array(color_index, dtype=np.int16)
+    return columns, palette
+
+
+def _bullet_columns(bullets) -> dict[str, np.ndarray]:
+    if isinstance(bullets, BulletPool):
+        columns = {
+            name: getattr(bullets, name)
+            for name, _ in BULLET_COLUMNS[:-1]
+        }
+        columns["serial"] = bullets.serial
+        return columns
+    columns = {
+        name: np.array([getattr(b, name) for b in bullets], dtype=dtype)
+        for name, dtype in BULLET_COLUMNS[:-1]
+    }
+    # List order is spawn order
+    columns["serial"] = np.arange(len(bullets), dtype=np.int64)
+    return columns
+
+
+def save_snapshot(sim: Simulation, path: str) -> int:
+    player = sim.player
+    rng_version, rng_state, gauss_next = sim.rng.getstate()
+    monster_columns, palette = _monster_columns(sim.monsters)
+    bullet_columns = _bullet_columns(sim.bullets)
+    item_columns = {
+        name: np.array([getattr(it, name) for it in sim.items], dtype=dtype)
+        for name, dtype in ITEM_COLUMNS
+    }
+
+    chunks = [
+        HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0),
+        TIMERS.pack(
+            sim.seed,
+            sim.time,
+            sim.frame,
+            sim.next_spawn_time,
+            sim.next_shot_time,
+            sim.next_volley_time,
+            sim.next_boss_level,
+        ),
+        PLAYER.pack(
+            player.x,
+            player.y,
+            player.prev_x,
+            player.prev_y,
+            player.speed,
+            player.hp,
+            player.face_dx,
+            player.face_dy,
+            player.xp,
+            player.xp_to_next,
+            player.level,
+        ),
+        RNG.pack(
+            rng_version,
+            gauss_next is not None,
+            gauss_next or 0.0,
+            *rng_state,
+        ),
+        COUNTS.pack(
+            len(sim.monsters),
+            len(palette),
+            len(sim.bullets),
+            len(sim.items),
+        ),
+        bytes(c for color in palette for c in color),
+    ]
+    offset = sum(len(chunk) for chunk in chunks)
+    # Every column starts on an 8-byte boundary so a mapped file can be
+    # viewed as arrays without copying
+    for layout, columns in (
+        (MONSTER_COLUMNS, monster_columns),
+        (BULLET_COLUMNS, bullet_columns),
+        (ITEM_COLUMNS, item_columns),
+    ):
+        for name, dtype in layout:
+            padding = _align(offset) - offset
+            if padding:
+                chunks.append(bytes(padding))
+            data = np.ascontiguousarray(columns[name], dtype=dtype).data
+            chunks.append(data)
+            offset += padding + data.nbytes
+    with open(path, "wb") as fh:
+        for chunk in chunks:
+            fh.write(chunk)
+    return offset
+
+
+class _Cursor:
+    def __init__(self, buffer) -> None:
+        self.buffer = buffer
+        self.pos = 0
+
+    def unpack(self, layout: struct.Struct) -> tuple:
+        values = layout.unpack_from(self.buffer, self.pos)
+        self.pos += layout.size
+        return values
+
+    def take(self, count: int) -> bytes:
+        data = bytes(self.buffer[self.pos:self.pos + count])
+        self.pos += count
+        return data
+
+    def columns(self, layout, count: int) -> dict[str, np.ndarray]:
+        columns = {}
+        for name, dtype in layout:
+            self.pos = _align(self.pos)
+            columns[name] = np.frombuffer(
+                self.buffer, dtype=dtype, count=count, offset=self.pos
+            )
+            self.pos += columns[name].nbytes
+        return columns
+
+
+def restore_snapshot(sim: Simulation, buffer, copy: bool = True) -> None:
+    # Overwrite sim in place, keeping its monster/bullet backends; the
+    # Player object is reused so existing references stay valid
+    cursor = _Cursor(buffer)
+    magic, version, _ = cursor.unpack(HEADER)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("not a snapshot file")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {version}")
+
+    (
+        seed,
+        sim.time,
+        sim.frame,
+        sim.next_spawn_time,
+        sim.next_shot_time,
+        sim.next_volley_time,
+        sim.next_boss_level,
+    ) = cursor.unpack(TIMERS)
+    sim.seed = seed
+    sim.items.time = sim.time
+    # Waves fire as soon as their time is reached, so the clock says
+    # which ones already have
+    sim.next_wave = sum(
+        1 for wave in sim.waves if wave.at_seconds <= sim.time
+    )
+
+    player = sim.player
+    (
+        player.x,
+        player.y,
+        player.prev_x,
+        player.prev_y,
+        player.speed,
+        player.hp,
+        player.face_dx,
+        player.face_dy,
+        player.xp,
+        player.xp_to_next,
+        player.level,
+    ) = cursor.unpack(PLAYER)
+
+    rng_version, has_gauss, gauss_next, *rng_state = cursor.unpack(RNG)
+    sim.rng.setstate(
+        (rng_version, tuple(rng_state), gauss_next if has_gauss else None)
+    )
+
+    n_monsters, n_palette, n_bullets, n_items = cursor.unpack(COUNTS)
+    raw = cursor.take(3 * n_palette)
+    palette = [tuple(raw[i:i + 3]) for i in range(0, len(raw), 3)]
+
+    columns = cursor.columns(MONSTER_COLUMNS, n_monsters)
+    monsters = sim.monsters
+    if isinstance(monsters, MonsterStore):
+        monsters.load_arrays(columns, palette, copy)
+    else:
+        monsters.clear()
+        # Rows of a numpy store may be out of spawn order; uid restores it
+        order = np.argsort(columns["uid"], kind="stable")
+        for x, y, px, py, speed, radius, hp, lod_dt, _, cid in zip(
+            *(columns[name][order].tolist() for name, _ in MONSTER_COLUMNS)
+        ):
+            m = Monster(x, y, speed, radius, palette[cid], hp)
+            m.prev_x = px
+            m.prev_y = py
+            m.lod_dt = lod_dt
+            monsters.append(m)
+
+    columns = cursor.columns(BULLET_COLUMNS, n_bullets)
+    bullets = sim.bullets
+    if isinstance(bullets, BulletPool):
+        if n_bullets > bullets.capacity:
+            bullets = sim.bullets = BulletPool(n_bullets, bullets.overflow)
+        bullets.load_arrays(columns)
+    else:
+        bullets.clear()
+        order = np.argsort(columns["serial"], kind="stable").tolist()
+        values = [columns[name].tolist() for name, _ in BULLET_COLUMNS]
+        for i in order:
+            b = Bullet(values[0][i], values[1][i], values[4][i], values[5][i])
+            b.prev_x = values[2][i]
+            b.prev_y = values[3][i]
+            bullets.append(b)
+
+    columns = cursor.columns(ITEM_COLUMNS, n_items)
+    sim.items.load(
+        Item(*values)
+        for values in zip(
+            *(columns[name].tolist() for name, _ in ITEM_COLUMNS)
+        )
+    )
+
+
+def restore_snapshot_file(sim: Simulation, path: str) -> None:
+    with open(path, "rb") as fh:
+        restore_snapshot(sim, fh.read())
+
+
+def load_snapshot(
+    path: str,
+    monster_backend: str = MONSTER_BACKEND,
+    bullet_backend: str = BULLET_BACKEND,
+    use_mmap: bool = False,
+) -> Simulation:
+    sim = Simulation(0, monster_backend, bullet_backend)
+    if not use_mmap:
+        restore_snapshot_file(sim, path)
+        return sim
+    with open(path, "rb") as fh:
+        # Private copy-on-write mapping: pages are read on first touch,
+        # and a numpy monster store uses them directly as its arrays
+        mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_COPY)
+    restore_snapshot(sim, mapped, copy=False)
+    return sim
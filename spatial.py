@@ -0,0 +1,182 @@
+import math
+
+import numpy as np
+
+from config import SPATIAL_GRID_CELL_SIZE
+
+# Cell keys pack (column, row) into one int64
+CELL_SPAN = 1 << 32
+
+
+class SpatialGrid:
+    def __init__(self, cell_size: float = SPATIAL_GRID_CELL_SIZE) -> None:
+        self.cell_size = float(cell_size)
+        self._inv_cell = 1.0 / self.cell_size
+        self._cells: dict[tuple[int, int], list] = {}
+        self._cell_of: dict = {}
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def __contains__(self, key) -> bool:
+        return key in self._cell_of
+
+    def cell_for(self, x: float, y: float) -> tuple[int, int]:
+        return (
+            int(math.floor(x * self._inv_cell)),
+            int(math.floor(y * self._inv_cell)),
+        )
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._cell_of.clear()
+
+    def ensure_cell_size(self, cell_size: float) -> None:
+        # Neighbour queries are only exact while every interaction
+        # distance fits inside one cell
+        if cell_size > self.cell_size:
+            self.cell_size = float(cell_size)
+            self._inv_cell = 1.0 / self.cell_size
+            self.clear()
+
+    def insert(self, key, x: float, y: float) -> None:
+        cell = self.cell_for(x, y)
+        self._cell_of[key] = cell
+        bucket = self._cells.get(cell)
+        if bucket is None:
+            self._cells[cell] = [key]
+        else:
+            bucket.append(key)
+
+    def remove(self, key) -> None:
+        cell = self._cell_of.pop(key)
+        bucket = self._cells[cell]
+        bucket.remove(key)
+        if not bucket:
+            del self._cells[cell]
+
+    def move(self, key, x: float, y: float) -> None:
+        cell = self.cell_for(x, y)
+        old = self._cell_of[key]
+        if cell == old:
+            return
+        bucket = self._cells[old]
+        bucket.remove(key)
+        if not bucket:
+            del self._cells[old]
+        self._cell_of[key] = cell
+        bucket = self._cells.get(cell)
+        if bucket is None:
+            self._cells[cell] = [key]
+        else:
+            bucket.append(key)
+
+    def rebuild(self, entities) -> None:
+        # Keys are list indices, so a rebuild is needed whenever the
+        # entity list is reordered or shrinks
+        self.clear()
+        for index, entity in enumerate(entities):
+            self.insert(index, entity.x, entity.y)
+
+    def rebuild_points(self, xs: list[float], ys: list[float]) -> None:
+        self.clear()
+        for index in range(len(xs)):
+            self.insert(index, xs[index], ys[index])
+
+    def rebuild_keyed(self, keys, xs: list[float], ys: list[float]) -> None:
+        self.clear()
+        for key, x, y in zip(keys, xs, ys):
+            self.insert(key, x, y)
+
+    def neighbours(self, x: float, y: float) -> list:
+        cx, cy = self.cell_for(x, y)
+        cells = self._cells
+        found: list = []
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                bucket = cells.get((gx, gy))
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+    def query(self, x: float, y: float, radius: float) -> list:
+        min_cx, min_cy = self.cell_for(x - radius, y - radius)
+        max_cx, max_cy = self.cell_for(x + radius, y + radius)
+        cells = self._cells
+        found: list = []
+        for gx in range(min_cx, max_cx + 1):
+            for gy in range(min_cy, max_cy + 1):
+                bucket = cells.get((gx, gy))
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+
+NO_PAIRS = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp))
+
+
+def neighbour_pairs(
+    qx: np.ndarray,
+    qy: np.ndarray,
+    px: np.ndarray,
+    py: np.ndarray,
+    cell_size: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    # Index pairs (q, p) for every point p in the 3x3 cells around each
+    # query point q; callers filter by the actual distance
+    if not len(qx) or not len(px):
+        return NO_PAIRS
+    inv_cell = 1.0 / cell_size
+    pcx = np.floor(px * inv_cell).astype(np.int64)
+    pcy = np.floor(py * inv_cell).astype(np.int64)
+    qcx = np.floor(qx * inv_cell).astype(np.int64)
+    qcy = np.floor(qy * inv_cell).astype(np.int64)
+    offsets = [(ox, oy) for ox in (-1, 0, 1) for oy in (-1, 0, 1)]
+    # Where each query's points start in order, and how many, per
+    # neighbouring cell
+    runs = []
+    # A table over the points' extent, two cells in from its edges, so
+    # a query whose 3x3 block would leave it has no points near it
+    col0 = int(pcx.min()) - 2
+    row0 = int(pcy.min()) - 2
+    cols = int(pcx.max()) - col0 + 3
+    rows = int(pcy.max()) - row0 + 3
+    if cols * rows <= 4 * (len(px) + len(qx)) + (1 << 16):
+        cell = (pcx - col0) * rows + (pcy - row0)
+        order = np.argsort(cell, kind="stable")
+        counts = np.bincount(cell, minlength=cols * rows)
+        starts = np.cumsum(counts) - counts
+        qcx -= col0
+        qcy -= row0
+        inside = (
+            (qcx >= 1) & (qcx <= cols - 2) & (qcy >= 1) & (qcy <= rows - 2)
+        )
+        base = np.where(inside, qcx * rows + qcy, rows + 1)
+        for ox, oy in offsets:
+            wanted = base + (ox * rows + oy)
+            runs.append((starts[wanted], np.where(inside, counts[wanted], 0)))
+    else:
+        # Too sparse for a table: binary search the sorted cell keys
+        keys = pcx * CELL_SPAN + pcy
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        for ox, oy in offsets:
+            wanted = (qcx + ox) * CELL_SPAN + (qcy + oy)
+            lo = np.searchsorted(keys, wanted, side="left")
+            runs.append(
+                (lo, np.searchsorted(keys, wanted, side="right") - lo)
+            )
+    queries = np.arange(len(qx))
+    found_q = []
+    found_p = []
+    for lo, counts in runs:
+        total = int(counts.sum())
+        if not total:
+            continue
+        # Walk each query's run of points in the sorted order
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        found_q.append(np.repeat(queries, counts))
+        found_p.append(order[np.arange(total) + starts])
+    if not found_q:
+        return NO_PAIRS
+    return np.concatenate(found_q), np.concatenate(found_p)
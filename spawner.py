@@ -0,0 +1,192 @@
+import random
+from typing import NamedTuple
+
+import numpy as np
+
+from config import (
+    MONSTER_COLOR,
+    MONSTER_MAX_HP,
+    MONSTER_MIN_DISTANCE_FROM_PLAYER,
+    MONSTER_RADIUS,
+    MONSTER_SPAWN_SAMPLE_ROUNDS,
+    MONSTER_SPAWN_SPACING,
+    MONSTER_SPEED,
+    WORLD_HEIGHT,
+    WORLD_WIDTH,
+)
+from player import Player
+from monster import Monster
+from monster_store import MonsterStore
+from free_list import FreeList
+from tilemap import TileMap
+
+SPAWN_MARGIN = 16.0
+# Candidates drawn per monster still to place in each sampling round
+CANDIDATES_PER_SLOT = 4
+
+
+class Wave(NamedTuple):
+    at_seconds: float
+    count: int
+
+
+def _valid_candidates(
+    gen: np.random.Generator,
+    count: int,
+    player: Player,
+    tile_map: TileMap | None,
+) -> tuple[np.ndarray, np.ndarray]:
+    # Uniform points in the arena, away from the player and off walls
+    xs = gen.uniform(SPAWN_MARGIN, WORLD_WIDTH - SPAWN_MARGIN, count)
+    ys = gen.uniform(SPAWN_MARGIN, WORLD_HEIGHT - SPAWN_MARGIN, count)
+    ok = (
+        np.hypot(xs - player.x, ys - player.y)
+        >= MONSTER_MIN_DISTANCE_FROM_PLAYER
+    )
+    if tile_map is not None:
+        ok &= ~tile_map.blocked_mask(xs, ys)
+    return xs[ok], ys[ok]
+
+
+def sample_positions(
+    count: int,
+    player: Player,
+    rng: random.Random,
+    tile_map: TileMap | None = None,
+    avoid: tuple[np.ndarray, np.ndarray] | None = None,
+    spacing: float | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    # Poisson-disk style placement of a whole batch. Points live on a
+    # grid of spacing-sized cells holding at most one point each; cells
+    # whose column and row parities match are never within spacing of
+    # each other, so each parity class is accepted in one vectorized
+    # pass against its already filled neighbours.
+    if spacing is None:
+        spacing = float(MONSTER_SPAWN_SPACING)
+    # One draw from the simulation's rng keeps batches reproducible
+    gen = np.random.default_rng(rng.getrandbits(64))
+    cols = int(WORLD_WIDTH // spacing) + 1
+    rows = int(WORLD_HEIGHT // spacing) + 1
+    cell_x = np.full(cols * rows, np.nan)
+    cell_y = np.full(cols * rows, np.nan)
+    taken = np.zeros((rows, cols), dtype=bool)
+    if avoid is not None and len(avoid[0]):
+        # Keep clear of monsters already on the field: their cells and
+        # every cell touching them are off limits
+        ax = np.clip((avoid[0] // spacing).astype(np.intp), 0, cols - 1)
+        ay = np.clip((avoid[1] // spacing).astype(np.intp), 0, rows - 1)
+        padded = np.zeros((rows + 2, cols + 2), dtype=bool)
+        padded[ay + 1, ax + 1] = True
+        for ox in (-1, 0, 1):
+            for oy in (-1, 0, 1):
+                taken |= padded[1 + oy:1 + oy + rows, 1 + ox:1 + ox + cols]
+    taken = taken.ravel()
+    limit = spacing * spacing
+
+    out_x: list[np.ndarray] = []
+    out_y: list[np.ndarray] = []
+    need = count
+    for _ in range(MONSTER_SPAWN_SAMPLE_ROUNDS):
+        if need <= 0:
+            break
+        xs, ys = _valid_candidates(
+            gen, max(64, need * CANDIDATES_PER_SLOT), player, tile_map
+        )
+        cx = (xs // spacing).astype(np.intp)
+        cy = (ys // spacing).astype(np.intp)
+        cell = cy * cols + cx
+        free = np.flatnonzero(~taken[cell] & np.isnan(cell_x[cell]))
+        # First candidate per free cell, in draw order
+        _, first = np.unique(cell[free], return_index=True)
+        free = free[np.sort(first)]
+        parity = (cx[free] & 1) | ((cy[free] & 1) << 1)
+        for phase in range(4):
+            sel = free[parity == phase]
+            if not len(sel):
+                continue
+            close = np.zeros(len(sel), dtype=bool)
+            for ox in (-1, 0, 1):
+                for oy in (-1, 0, 1):
+                    if not ox and not oy:
+                        continue
+                    ncx = cx[sel] + ox
+                    ncy = cy[sel] + oy
+                    inside = (
+                        (ncx >= 0) & (ncx < cols) & (ncy >= 0) & (ncy < rows)
+                    )
+                    ncell = np.where(inside, ncy * cols + ncx, 0)
+                    dx = cell_x[ncell] - xs[sel]
+                    dy = cell_y[ncell] - ys[sel]
+                    # Empty cells hold NaN, which never compares close
+                    close |= inside & (dx * dx + dy * dy < limit)
+            sel = sel[~close][:need]
+            cell_x[cell[sel]] = xs[sel]
+            cell_y[cell[sel]] = ys[sel]
+            out_x.append(xs[sel])
+            out_y.append(ys[sel])
+            need -= len(sel)
+            if need <= 0:
+                break
+
+    # A crowded arena may not have room for everyone at full spacing;
+    # the rest still avoid the player and walls and are separated later
+    for _ in range(MONSTER_SPAWN_SAMPLE_ROUNDS):
+        if need <= 0:
+            break
+        xs, ys = _valid_candidates(
+            gen, max(64, need * CANDIDATES_PER_SLOT), player, tile_map
+        )
+        out_x.append(xs[:need])
+        out_y.append(ys[:need])
+        need -= len(xs[:need])
+    if need > 0:
+        # Fallback: the corner farthest from the player
+        corner_x = (
+            SPAWN_MARGIN
+            if player.x > WORLD_WIDTH / 2
+            else WORLD_WIDTH - SPAWN_MARGIN
+        )
+        corner_y = (
+            SPAWN_MARGIN
+            if player.y > WORLD_HEIGHT / 2
+            else WORLD_HEIGHT - SPAWN_MARGIN
+        )
+        out_x.append(np.full(need, corner_x))
+        out_y.append(np.full(need, corner_y))
+    if not out_x:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(out_x), np.concatenate(out_y)
+
+
+def spawn_horde(
+    monsters: list[Monster] | MonsterStore,
+    player: Player,
+    rng: random.Random,
+    count: int,
+    pool: FreeList | None = None,
+    tile_map: TileMap | None = None,
+) -> int:
+    # Place and add count regular monsters in one go; returns how many
+    # were added
+    if count <= 0:
+        return 0
+    if isinstance(monsters, MonsterStore):
+        avoid = (monsters.x, monsters.y)
+    else:
+        avoid = (
+            np.fromiter((m.x for m in monsters), np.float64, len(monsters)),
+            np.fromiter((m.y for m in monsters), np.float64, len(monsters)),
+        )
+    xs, ys = sample_positions(count, player, rng, tile_map, avoid)
+    speed = float(MONSTER_SPEED)
+    radius = float(MONSTER_RADIUS)
+    hp = float(MONSTER_MAX_HP)
+    if isinstance(monsters, MonsterStore):
+        monsters.add_many(xs, ys, speed, radius, MONSTER_COLOR, hp)
+    else:
+        make = pool.acquire if pool is not None else Monster
+        monsters.extend(
+            make(x, y, speed, radius, MONSTER_COLOR, hp)
+            for x, y in zip(xs.tolist(), ys.tolist())
+        )
+    return len(xs)
@@ -0,0 +1,365 @@
+import math
+
+import numpy as np
+import pygame
+
+from config import (
+    ACCENT_COLOR,
+    BACKGROUND_COLOR,
+    BOSS_RADIUS,
+    BULLET_COLOR,
+    BULLET_RADIUS,
+    DROP_HEAL_AMOUNT,
+    FLOOR_GRID_COLOR,
+    FLOOR_GRID_SPACING,
+    ITEM_COLOR,
+    ITEM_SIZE,
+    MONSTER_RADIUS,
+    PLAYER_RADIUS,
+    WALL_COLOR,
+)
+from monster_store import MonsterStore
+from bullet_pool import BulletPool
+from item_store import FrozenItems, ItemStore
+from tilemap import TileMap
+from camera import Camera
+from render_state import MonsterFrame, PointBuffer
+
+# Transparent key colour; never used by any entity
+SPRITE_COLORKEY = (255, 0, 255)
+OUTLINE_COLOR = (255, 255, 255)
+ITEM_BORDER_COLOR = (40, 80, 40)
+PLAYER_RING_COLOR = (60, 60, 72)
+# How far past the view edge an entity centre may be and still show
+MONSTER_CULL_MARGIN = max(MONSTER_RADIUS, BOSS_RADIUS) + 4
+ITEM_CULL_MARGIN = ITEM_SIZE + 12
+
+Blit = tuple[pygame.Surface, tuple[int, int]]
+
+
+def _new_sprite(width: int, height: int) -> pygame.Surface:
+    surface = pygame.Surface((width, height))
+    surface.fill(SPRITE_COLORKEY)
+    return surface
+
+
+def _prepare(surface: pygame.Surface) -> pygame.Surface:
+    # Entity shapes are drawn without antialiasing, so an RLE colour key
+    # gives the same pixels as per-pixel alpha and blits much faster
+    surface.set_colorkey(SPRITE_COLORKEY, pygame.RLEACCEL)
+    if pygame.display.get_surface() is not None:
+        return surface.convert()
+    return surface
+
+
+class SpriteCache:
+    # Each sprite is drawn once with the same pygame.draw calls the
+    # entity draw methods use, so blitting it is pixel-identical
+    def __init__(self) -> None:
+        self._sprites: dict[tuple, tuple[pygame.Surface, int]] = {}
+        # (items, version, view offset, blits) for the last item batch
+        self.item_batch: tuple | None = None
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+    def circle(
+        self,
+        radius: int,
+        color: tuple[int, int, int],
+        outline: bool = False,
+    ) -> tuple[pygame.Surface, int]:
+        key = ("circle", radius, color, outline)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            half = radius + 4 if outline else radius
+            surface = _new_sprite(2 * half + 1, 2 * half + 1)
+            pygame.draw.circle(surface, color, (half, half), radius)
+            if outline:
+                pygame.draw.circle(
+                    surface, OUTLINE_COLOR, (half, half), radius + 4,
+                    width=2,
+                )
+            sprite = self._sprites[key] = (_prepare(surface), half)
+        return sprite
+
+    def ring(
+        self,
+        radius: int,
+        color: tuple[int, int, int],
+        width: int,
+    ) -> tuple[pygame.Surface, int]:
+        key = ("ring", radius, color, width)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            surface = _new_sprite(2 * radius + 1, 2 * radius + 1)
+            pygame.draw.circle(
+                surface, color, (radius, radius), radius, width=width
+            )
+            sprite = self._sprites[key] = (_prepare(surface), radius)
+        return sprite
+
+    def item(self, size: int = ITEM_SIZE) -> tuple[pygame.Surface, int]:
+        key = ("item", size)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            surface = _new_sprite(size, size)
+            rect = pygame.Rect(0, 0, size, size)
+            pygame.draw.rect(surface, ITEM_COLOR, rect)
+            pygame.draw.rect(surface, ITEM_BORDER_COLOR, rect, width=2)
+            sprite = self._sprites[key] = (_prepare(surface), size // 2)
+        return sprite
+
+    def monster(
+        self,
+        radius: float,
+        color: tuple[int, int, int],
+    ) -> tuple[pygame.Surface, int]:
+        # Larger than normal monsters get the outline ring
+        return self.circle(
+            int(radius), color, radius > float(MONSTER_RADIUS)
+        )
+
+
+def render_backdrop(
+    tile_map: TileMap,
+    size: tuple[int, int],
+) -> pygame.Surface:
+    # Static walls drawn once over the background colour
+    surface = pygame.Surface(size)
+    surface.fill(BACKGROUND_COLOR)
+    for rect in tile_map.wall_rects():
+        surface.fill(WALL_COLOR, rect)
+    if pygame.display.get_surface() is not None:
+        return surface.convert()
+    return surface
+
+
+class WorldBackdrop:
+    # Floor and walls of a world larger than the window, drawn each
+    # frame from the part in view instead of one world-sized surface
+    def __init__(self, tile_map: TileMap | None = None) -> None:
+        self.tile_map = tile_map
+
+    def draw(self, screen: pygame.Surface, camera: Camera) -> None:
+        screen.fill(BACKGROUND_COLOR)
+        width, height = screen.get_size()
+        ox, oy = camera.offset
+        spacing = FLOOR_GRID_SPACING
+        for x in range(-(ox % spacing), width, spacing):
+            screen.fill(FLOOR_GRID_COLOR, (x, 0, 1, height))
+        for y in range(-(oy % spacing), height, spacing):
+            screen.fill(FLOOR_GRID_COLOR, (0, y, width, 1))
+        tm = self.tile_map
+        if tm is None:
+            return
+        size = int(tm.tile_size)
+        col0 = max(0, ox // size)
+        row0 = max(0, oy // size)
+        col1 = min(tm.cols, (ox + width) // size + 1)
+        row1 = min(tm.rows, (oy + height) // size + 1)
+        blocked = tm.blocked
+        for row in range(row0, row1):
+            base = row * tm.cols
+            top = row * size - oy
+            for col in range(col0, col1):
+                if blocked[base + col]:
+                    screen.fill(
+                        WALL_COLOR, (col * size - ox, top, size, size)
+                    )
+
+
+def scene_backdrop(
+    tile_map: TileMap | None,
+    camera: Camera,
+    size: tuple[int, int],
+) -> pygame.Surface | WorldBackdrop | None:
+    # A map that fits the window is drawn once; a scrolling world is
+    # drawn per frame from what is in view
+    if camera.scrolls:
+        return WorldBackdrop(tile_map)
+    if tile_map is None:
+        return None
+    return render_backdrop(tile_map, size)
+
+
+def entity_positions(
+    entities,
+    alpha: float = 1.0,
+    camera: Camera | None = None,
+    margin: float = 0.0,
+) -> tuple[list[float], list[float], list[int] | None]:
+    # Screen positions, blended from the previous tick when alpha < 1.
+    # With a scrolling camera only entities within margin of the view
+    # are kept and their indices come back third; otherwise that is
+    # None and every entity is included. Positions are cut to whole
+    # pixels before the camera offset comes off, as for items and the
+    # player, so everything moves across the screen in step.
+    cull = camera is not None and camera.scrolls
+    if isinstance(entities, (MonsterStore, BulletPool, PointBuffer)):
+        xs = entities.x
+        ys = entities.y
+        if alpha < 1.0:
+            px = entities.prev_x
+            py = entities.prev_y
+            xs = px + (xs - px) * alpha
+            ys = py + (ys - py) * alpha
+        if not cull:
+            return xs.tolist(), ys.tolist(), None
+        keep = np.flatnonzero(camera.visible_mask(xs, ys, margin))
+        return (
+            (np.trunc(xs[keep]) - camera.x).tolist(),
+            (np.trunc(ys[keep]) - camera.y).tolist(),
+            keep.tolist(),
+        )
+    if alpha >= 1.0:
+        xs = [e.x for e in entities]
+        ys = [e.y for e in entities]
+    else:
+        xs = [e.prev_x + (e.x - e.prev_x) * alpha for e in entities]
+        ys = [e.prev_y + (e.y - e.prev_y) * alpha for e in entities]
+    if not cull:
+        return xs, ys, None
+    left, top, right, bottom = camera.bounds(margin)
+    keep = [
+        i
+        for i, (x, y) in enumerate(zip(xs, ys))
+        if left <= x <= right and top <= y <= bottom
+    ]
+    ox = camera.x
+    oy = camera.y
+    return (
+        [int(xs[i]) - ox for i in keep],
+        [int(ys[i]) - oy for i in keep],
+        keep,
+    )
+
+
+def collect_monster_blits(
+    cache: SpriteCache,
+    monsters,
+    out: list[Blit],
+    alpha: float = 1.0,
+    camera: Camera | None = None,
+) -> None:
+    # Resolve each distinct look once per call, not once per monster
+    looks: dict[tuple, tuple[pygame.Surface, int]] = {}
+    append = out.append
+    xs, ys, keep = entity_positions(
+        monsters, alpha, camera, MONSTER_CULL_MARGIN
+    )
+    if isinstance(monsters, (MonsterStore, MonsterFrame)):
+        palette = monsters.palette
+        radii = monsters.radius
+        cids = monsters.color_index
+        if keep is not None:
+            radii = radii[keep]
+            cids = cids[keep]
+        for x, y, radius, cid in zip(xs, ys, radii.tolist(), cids.tolist()):
+            sprite = looks.get((radius, cid))
+            if sprite is None:
+                sprite = looks[(radius, cid)] = cache.monster(
+                    radius, palette[cid]
+                )
+            surface, half = sprite
+            append((surface, (int(x) - half, int(y) - half)))
+        return
+    if keep is not None:
+        monsters = [monsters[i] for i in keep]
+    for m, x, y in zip(monsters, xs, ys):
+        key = (m.radius, m.color)
+        sprite = looks.get(key)
+        if sprite is None:
+            sprite = looks[key] = cache.monster(m.radius, m.color)
+        surface, half = sprite
+        append((surface, (int(x) - half, int(y) - half)))
+
+
+def item_size(heal: float) -> int:
+    # Merged drops grow a step per extra regular drop, up to three
+    stacks = min(3, max(0, int(heal / DROP_HEAL_AMOUNT + 0.5) - 1))
+    return ITEM_SIZE + 4 * stacks
+
+
+def collect_item_blits(
+    cache: SpriteCache,
+    items,
+    out: list[Blit],
+    camera: Camera | None = None,
+) -> None:
+    if camera is not None and not camera.scrolls:
+        camera = None
+    if isinstance(items, (ItemStore, FrozenItems)):
+        # Items never move, so the batch only changes with the store or
+        # the view
+        view = camera.offset if camera is not None else None
+        batch = cache.item_batch
+        if (
+            batch is None
+            or batch[0] is not items
+            or batch[1] != items.version
+            or batch[2] != view
+        ):
+            blits: list[Blit] = []
+            _item_blits(cache, items, blits, camera)
+            batch = cache.item_batch = (items, items.version, view, blits)
+        out.extend(batch[3])
+        return
+    _item_blits(cache, items, out, camera)
+
+
+def _item_blits(
+    cache: SpriteCache,
+    items,
+    out: list[Blit],
+    camera: Camera | None,
+) -> None:
+    append = out.append
+    if camera is None:
+        for it in items:
+            surface, half = cache.item(item_size(it.heal))
+            append((surface, (int(it.x) - half, int(it.y) - half)))
+        return
+    left, top, right, bottom = camera.bounds(ITEM_CULL_MARGIN)
+    ox = camera.x
+    oy = camera.y
+    for it in items:
+        x = it.x
+        y = it.y
+        if left <= x <= right and top <= y <= bottom:
+            surface, half = cache.item(item_size(it.heal))
+            append((surface, (int(x) - ox - half, int(y) - oy - half)))
+
+
+def collect_bullet_blits(
+    cache: SpriteCache,
+    bullets,
+    out: list[Blit],
+    alpha: float = 1.0,
+    camera: Camera | None = None,
+) -> None:
+    surface, half = cache.circle(BULLET_RADIUS, BULLET_COLOR)
+    append = out.append
+    xs, ys, _ = entity_positions(bullets, alpha, camera, BULLET_RADIUS)
+    for x, y in zip(xs, ys):
+        append((surface, (int(x) - half, int(y) - half)))
+
+
+def collect_player_blits(
+    cache: SpriteCache,
+    player,
+    time_seconds: float,
+    out: list[Blit],
+    alpha: float = 1.0,
+    camera: Camera | None = None,
+) -> None:
+    # The camera follows the player, so it is never culled
+    pulse = 4 + int(3 * (1 + math.sin(time_seconds * 4)))
+    x, y = player.lerp_position(alpha)
+    ox, oy = camera.offset if camera is not None else (0, 0)
+    px = int(x) - ox
+    py = int(y) - oy
+    surface, half = cache.ring(18 + pulse, PLAYER_RING_COLOR, 2)
+    out.append((surface, (px - half, py - half)))
+    surface, half = cache.circle(PLAYER_RADIUS, ACCENT_COLOR)
+    out.append((surface, (px - half, py - half)))
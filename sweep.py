@@ -0,0 +1,372 @@
+import os
+import sys
+import ast
+import json
+import math
+import argparse
+import itertools
+import importlib
+import multiprocessing
+
+import config
+from config import *
+from monster_store import MonsterStore
+from simulation import FrameInput, Simulation
+from bench import scripted_input
+
+# Every module that star-imports config keeps its own copy of each
+# constant, so an override has to be written into all of them
+GAME_MODULES = (
+    "config",
+    "player",
+    "monster",
+    "monster_store",
+    "bullet",
+    "bullet_pool",
+    "camera",
+    "item",
+    "item_store",
+    "spatial",
+    "collision",
+    "spawner",
+    "lod",
+    "simulation",
+)
+
+BOT_AVOID_RADIUS = 320.0
+BOT_WALL_MARGIN = 120.0
+
+
+# Values config.py derives from others, recomputed when what they are
+# derived from is overridden and they are not
+DERIVED = {
+    "MONSTER_SPAWN_SPACING": lambda get: (
+        2 * get("MONSTER_RADIUS") + get("MONSTER_SEPARATION_PADDING")
+    ),
+    "MONSTER_DENSITY_SCALE": lambda get: (
+        get("WORLD_WIDTH") * get("WORLD_HEIGHT")
+    ) / (get("WINDOW_WIDTH") * get("WINDOW_HEIGHT")),
+}
+# Read only as defaults the sweep always passes explicitly, so a grid
+# over them would silently run the same game
+NOT_SWEEPABLE = ("MONSTER_BACKEND", "BULLET_BACKEND", "MAP_FILE")
+
+
+def with_derived(overrides: dict) -> dict:
+    def get(key):
+        return overrides[key] if key in overrides else getattr(config, key)
+
+    full = dict(overrides)
+    for key, derive in DERIVED.items():
+        if key not in overrides:
+            value = derive(get)
+            if value != getattr(config, key):
+                full[key] = value
+    return full
+
+
+def apply_overrides(
+    overrides: dict, modules: tuple[str, ...] = GAME_MODULES
+) -> list[tuple]:
+    # Defaults that must follow an override are resolved at call time
+    # by the code that uses them
+    overrides = with_derived(overrides)
+    saved: list[tuple] = []
+    for name in modules:
+        module = importlib.import_module(name)
+        for key, value in overrides.items():
+            if hasattr(module, key):
+                saved.append((module, key, getattr(module, key)))
+                setattr(module, key, value)
+    return saved
+
+
+def restore_overrides(saved: list[tuple]) -> None:
+    for module, key, value in reversed(saved):
+        setattr(module, key, value)
+
+
+def monster_points(monsters) -> tuple[list[float], list[float]]:
+    if isinstance(monsters, MonsterStore):
+        return monsters.x.tolist(), monsters.y.tolist()
+    return [m.x for m in monsters], [m.y for m in monsters]
+
+
+def bot_input(sim: Simulation) -> FrameInput:
+    # Back away from nearby monsters (inverse-square weighted), drift
+    # towards the closest item, stay off the walls, aim at the nearest
+    # monster
+    player = sim.player
+    px = player.x
+    py = player.y
+    move_x = 0.0
+    move_y = 0.0
+    aim_x = px + player.face_dx
+    aim_y = py + player.face_dy
+    nearest = math.inf
+    for x, y in zip(*monster_points(sim.monsters)):
+        dx = px - x
+        dy = py - y
+        d2 = dx * dx + dy * dy
+        if d2 < nearest:
+            nearest = d2
+            aim_x = x
+            aim_y = y
+        if 0.0 < d2 < BOT_AVOID_RADIUS * BOT_AVOID_RADIUS:
+            move_x += dx / d2
+            move_y += dy / d2
+
+    if sim.items:
+        item = min(
+            sim.items,
+            key=lambda it: (it.x - px) ** 2 + (it.y - py) ** 2,
+        )
+        dx = item.x - px
+        dy = item.y - py
+        dist = math.hypot(dx, dy) or 1.0
+        pull = 0.5 / max(dist, BOT_WALL_MARGIN)
+        move_x += dx / dist * pull
+        move_y += dy / dist * pull
+
+    wall = 1.0 / BOT_WALL_MARGIN
+    if px < BOT_WALL_MARGIN:
+        move_x += wall
+    elif px > WORLD_WIDTH - BOT_WALL_MARGIN:
+        move_x -= wall
+    if py < BOT_WALL_MARGIN:
+        move_y += wall
+    elif py > WORLD_HEIGHT - BOT_WALL_MARGIN:
+        move_y -= wall
+
+    length = math.hypot(move_x, move_y)
+    if length > 0.0:
+        move_x /= length
+        move_y /= length
+    return FrameInput(move_x, move_y, aim_x, aim_y)
+
+
+def run_game(task: dict) -> dict:
+    saved = apply_overrides(task["overrides"])
+    try:
+        sim = Simulation(
+            task["seed"], task["monster_backend"], task["bullet_backend"]
+        )
+        dt = 1.0 / float(SIMULATION_TICK_RATE)
+        frames = int(task["duration"] * SIMULATION_TICK_RATE)
+        use_bot = task["input"] == "bot"
+        peaks = {"monsters": 0, "bullets": 0, "items": 0}
+        died = False
+        for frame in range(frames):
+            inputs = bot_input(sim) if use_bot else scripted_input(frame)
+            sim.step(dt, inputs)
+            peaks["monsters"] = max(peaks["monsters"], len(sim.monsters))
+            peaks["bullets"] = max(peaks["bullets"], len(sim.bullets))
+            peaks["items"] = max(peaks["items"], len(sim.items))
+            if sim.player.hp <= 0.0:
+                died = True
+                break
+    finally:
+        restore_overrides(saved)
+    return {
+        "overrides": task["overrides"],
+        "seed": task["seed"],
+        "survival_seconds": sim.time,
+        "died": died,
+        "level": sim.player.level,
+        "peak_entities": peaks,
+    }
+
+
+def parse_param(text: str) -> tuple[str, list]:
+    name, sep, values = text.partition("=")
+    name = name.strip()
+    if not sep or not values:
+        raise argparse.ArgumentTypeError(
+            f"expected NAME=V1,V2,..., got {text!r}"
+        )
+    if not hasattr(config, name):
+        raise argparse.ArgumentTypeError(f"unknown config value: {name}")
+    if name in NOT_SWEEPABLE:
+        raise argparse.ArgumentTypeError(
+            f"{name} is fixed when the game modules load; "
+            "it cannot be swept"
+        )
+    parsed = []
+    for raw in values.split(","):
+        try:
+            parsed.append(ast.literal_eval(raw.strip()))
+        except (ValueError, SyntaxError):
+            raise argparse.ArgumentTypeError(
+                f"bad value for {name}: {raw!r}"
+            ) from None
+    return name, parsed
+
+
+def build_tasks(
+    grid: list[tuple[str, list]],
+    seeds: list[int],
+    duration: float,
+    input_mode: str,
+    monster_backend: str,
+    bullet_backend: str,
+) -> list[dict]:
+    names = [name for name, _ in grid]
+    tasks = []
+    for combo in itertools.product(*(values for _, values in grid)):
+        overrides = dict(zip(names, combo))
+        for seed in seeds:
+            tasks.append(
+                {
+                    "overrides": overrides,
+                    "seed": seed,
+                    "duration": duration,
+                    "input": input_mode,
+                    "monster_backend": monster_backend,
+                    "bullet_backend": bullet_backend,
+                }
+            )
+    return tasks
+
+
+def aggregate(runs: list[dict]) -> list[dict]:
+    groups: dict[str, list[dict]] = {}
+    for run in runs:
+        key = json.dumps(run["overrides"], sort_keys=True)
+        groups.setdefault(key, []).append(run)
+    rows = []
+    for key, group in groups.items():
+        n = len(group)
+        survival = [r["survival_seconds"] for r in group]
+        levels = [r["level"] for r in group]
+        rows.append(
+            {
+                "overrides": group[0]["overrides"],
+                "runs": n,
+                "deaths": sum(r["died"] for r in group),
+                "survival_mean": sum(survival) / n,
+                "survival_min": min(survival),
+                "level_mean": sum(levels) / n,
+                "level_max": max(levels),
+                "peak_monsters": max(
+                    r["peak_entities"]["monsters"] for r in group
+                ),
+                "peak_bullets": max(
+                    r["peak_entities"]["bullets"] for r in group
+                ),
+                "peak_items": max(
+                    r["peak_entities"]["items"] for r in group
+                ),
+            }
+        )
+    rows.sort(key=lambda row: json.dumps(row["overrides"], sort_keys=True))
+    return rows
+
+
+def print_table(rows: list[dict]) -> None:
+    labels = [
+        " ".join(f"{k}={v!r}" for k, v in row["overrides"].items())
+        or "(defaults)"
+        for row in rows
+    ]
+    width = max([len("overrides")] + [len(label) for label in labels])
+    print(
+        f"{'overrides':<{width}}{'runs':>6}{'deaths':>8}"
+        f"{'surv_mean':>11}{'surv_min':>10}{'lvl_mean':>10}"
+        f"{'lvl_max':>9}{'monsters':>10}{'bullets':>9}{'items':>7}"
+    )
+    for label, row in zip(labels, rows):
+        print(
+            f"{label:<{width}}"
+            f"{row['runs']:>6}"
+            f"{row['deaths']:>8}"
+            f"{row['survival_mean']:>11.1f}"
+            f"{row['survival_min']:>10.1f}"
+            f"{row['level_mean']:>10.2f}"
+            f"{row['level_max']:>9}"
+            f"{row['peak_monsters']:>10}"
+            f"{row['peak_bullets']:>9}"
+            f"{row['peak_items']:>7}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Run seeded headless games over a grid of config "
+        "overrides in parallel."
+    )
+    parser.add_argument(
+        "--param",
+        action="append",
+        type=parse_param,
+        default=[],
+        metavar="NAME=V1,V2,...",
+        help="config value to sweep (repeatable; grid is the product)",
+    )
+    parser.add_argument("--seeds", type=int, default=4)
+    parser.add_argument("--first-seed", type=int, default=1)
+    parser.add_argument(
+        "--duration", type=float, default=300.0,
+        help="simulated seconds per game unless the player dies first",
+    )
+    parser.add_argument(
+        "--input", choices=("bot", "scripted"), default="bot"
+    )
+    parser.add_argument(
+        "--monster-backend", choices=("list", "numpy"),
+        default=MONSTER_BACKEND,
+    )
+    parser.add_argument(
+        "--bullet-backend", choices=("list", "pool"),
+        default=BULLET_BACKEND,
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1,
+        help="worker processes",
+    )
+    parser.add_argument("--output", default="sweep_results.json")
+    args = parser.parse_args()
+
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    tasks = build_tasks(
+        args.param,
+        seeds,
+        args.duration,
+        args.input,
+        args.monster_backend,
+        args.bullet_backend,
+    )
+    print(f"running {len(tasks)} games on {args.jobs} worker(s)")
+    runs: list[dict] = []
+    with multiprocessing.Pool(args.jobs) as pool:
+        for run in pool.imap_unordered(run_game, tasks):
+            runs.append(run)
+            print(f"\r{len(runs)}/{len(tasks)}", end="", flush=True)
+    print()
+
+    rows = aggregate(runs)
+    print_table(rows)
+    runs.sort(
+        key=lambda r: (json.dumps(r["overrides"], sort_keys=True), r["seed"])
+    )
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(
+            {
+                "meta": {
+                    "duration": args.duration,
+                    "input": args.input,
+                    "seeds": seeds,
+                    "monster_backend": args.monster_backend,
+                    "bullet_backend": args.bullet_backend,
+                },
+                "table": rows,
+                "runs": runs,
+            },
+            fh,
+            indent=2,
+        )
+    print(f"\nwrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
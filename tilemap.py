@@ -0,0 +1,270 @@
+import heapq
+import math
+
+import numpy as np
+
+from config import TILE_SIZE
+
+WALL_CHARS = "#"
+DIAGONAL_COST = math.sqrt(2.0)
+# Neighbour offsets: orthogonal first, then diagonals
+NEIGHBOURS = (
+    (1, 0), (-1, 0), (0, 1), (0, -1),
+    (1, 1), (1, -1), (-1, 1), (-1, -1),
+)
+
+
+class TileMap:
+    # Static obstacles on a uniform grid; anything outside the map is
+    # open floor
+    def __init__(
+        self,
+        cols: int,
+        rows: int,
+        blocked: bytearray,
+        tile_size: float = TILE_SIZE,
+    ) -> None:
+        self.cols = cols
+        self.rows = rows
+        self.tile_size = float(tile_size)
+        self.blocked = blocked
+        self._inv_tile = 1.0 / self.tile_size
+        self.blocked_array = np.frombuffer(
+            bytes(blocked), dtype=np.uint8
+        ).astype(bool)
+        # Tiles within one tile of a wall; only entities in these can
+        # touch one
+        near = self.blocked_array.reshape(rows, cols).copy()
+        padded = np.pad(near, 1)
+        for ox in (-1, 0, 1):
+            for oy in (-1, 0, 1):
+                near |= padded[1 + oy:1 + oy + rows, 1 + ox:1 + ox + cols]
+        self.near_wall = near.ravel()
+
+    def tile_of(self, x: float, y: float) -> tuple[int, int]:
+        # floor, not int(), so points just left of or above the map
+        # fall outside it as they do in tile_indices
+        return (
+            math.floor(x * self._inv_tile),
+            math.floor(y * self._inv_tile),
+        )
+
+    def is_blocked(self, col: int, row: int) -> bool:
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return bool(self.blocked[row * self.cols + col])
+        return False
+
+    def blocked_at(self, x: float, y: float) -> bool:
+        return self.is_blocked(*self.tile_of(x, y))
+
+    def tile_indices(
+        self, xs: np.ndarray, ys: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # Flat tile index per point plus a mask of points inside the map
+        cols = np.floor(xs * self._inv_tile).astype(np.intp)
+        rows = np.floor(ys * self._inv_tile).astype(np.intp)
+        inside = (
+            (cols >= 0) & (cols < self.cols)
+            & (rows >= 0) & (rows < self.rows)
+        )
+        index = np.where(inside, rows * self.cols + cols, 0)
+        return index, inside
+
+    def blocked_mask(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        index, inside = self.tile_indices(xs, ys)
+        return inside & self.blocked_array[index]
+
+    def near_wall_mask(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        index, inside = self.tile_indices(xs, ys)
+        return inside & self.near_wall[index]
+
+    def push_out(
+        self, x: float, y: float, radius: float
+    ) -> tuple[float, float]:
+        # Move a circle out of every wall tile it overlaps, nearest
+        # surface first
+        size = self.tile_size
+        c0, r0 = self.tile_of(x - radius, y - radius)
+        c1, r1 = self.tile_of(x + radius, y + radius)
+        for row in range(r0, r1 + 1):
+            for col in range(c0, c1 + 1):
+                if not self.is_blocked(col, row):
+                    continue
+                left = col * size
+                top = row * size
+                nearest_x = min(max(x, left), left + size)
+                nearest_y = min(max(y, top), top + size)
+                dx = x - nearest_x
+                dy = y - nearest_y
+                dist = math.hypot(dx, dy)
+                if dist >= radius:
+                    continue
+                if dist > 1e-6:
+                    push = radius - dist
+                    x += dx / dist * push
+                    y += dy / dist * push
+                    continue
+                # Centre inside the tile: leave through the closest edge
+                exits = (
+                    (x - left, -1.0, 0.0),
+                    (left + size - x, 1.0, 0.0),
+                    (y - top, 0.0, -1.0),
+                    (top + size - y, 0.0, 1.0),
+                )
+                depth, nx, ny = min(exits)
+                x += nx * (depth + radius)
+                y += ny * (depth + radius)
+        return x, y
+
+    def wall_rects(self) -> list[tuple[int, int, int, int]]:
+        size = int(self.tile_size)
+        return [
+            (col * size, row * size, size, size)
+            for row in range(self.rows)
+            for col in range(self.cols)
+            if self.blocked[row * self.cols + col]
+        ]
+
+
+def parse_tile_map(text: str, tile_size: float = TILE_SIZE) -> TileMap:
+    lines = [line.rstrip("\n") for line in text.splitlines()]
+    while lines and not lines[-1].strip():
+        lines.pop()
+    rows = len(lines)
+    cols = max((len(line) for line in lines), default=0)
+    if not rows or not cols:
+        raise ValueError("tile map is empty")
+    blocked = bytearray(rows * cols)
+    for row, line in enumerate(lines):
+        for col, char in enumerate(line):
+            if char in WALL_CHARS:
+                blocked[row * cols + col] = 1
+    return TileMap(cols, rows, blocked, tile_size)
+
+
+def load_tile_map(path: str, tile_size: float = TILE_SIZE) -> TileMap:
+    with open(path, encoding="utf-8") as fh:
+        return parse_tile_map(fh.read(), tile_size)
+
+
+class FlowField:
+    # One Dijkstra distance field towards the target tile, shared by
+    # every monster; each tile stores the unit step towards its cheapest
+    # neighbour so steering is a single lookup
+    def __init__(self, tile_map: TileMap) -> None:
+        self.tile_map = tile_map
+        count = tile_map.cols * tile_map.rows
+        self.distance = [math.inf] * count
+        self.dir_x = np.zeros(count, dtype=np.float64)
+        self.dir_y = np.zeros(count, dtype=np.float64)
+        self._dir_x: list[float] = [0.0] * count
+        self._dir_y: list[float] = [0.0] * count
+        self._edges = self._build_edges()
+        self.target: tuple[int, int] | None = None
+        self.recomputes = 0
+
+    def _passable(self, col: int, row: int) -> bool:
+        tm = self.tile_map
+        return (
+            0 <= col < tm.cols
+            and 0 <= row < tm.rows
+            and not tm.blocked[row * tm.cols + col]
+        )
+
+    def _build_edges(self) -> list[list[tuple[int, float, float, float]]]:
+        # The map is static, so each open tile's moves are listed once:
+        # (neighbour index, cost, unit step x, unit step y). Diagonals
+        # may not cut a wall corner.
+        tm = self.tile_map
+        passable = self._passable
+        inv_diag = 1.0 / DIAGONAL_COST
+        edges: list[list[tuple[int, float, float, float]]] = []
+        for row in range(tm.rows):
+            for col in range(tm.cols):
+                moves: list[tuple[int, float, float, float]] = []
+                edges.append(moves)
+                if not passable(col, row):
+                    continue
+                for ox, oy in NEIGHBOURS:
+                    nc = col + ox
+                    nr = row + oy
+                    if not passable(nc, nr):
+                        continue
+                    k = nr * tm.cols + nc
+                    if ox and oy:
+                        if not (
+                            passable(col + ox, row)
+                            and passable(col, row + oy)
+                        ):
+                            continue
+                        moves.append(
+                            (k, DIAGONAL_COST, ox * inv_diag, oy * inv_diag)
+                        )
+                    else:
+                        moves.append((k, 1.0, float(ox), float(oy)))
+        return edges
+
+    def update(self, x: float, y: float) -> bool:
+        # Recompute only when the target moved to another tile
+        tile = self.tile_map.tile_of(x, y)
+        if tile == self.target:
+            return False
+        self.target = tile
+        self._compute(*tile)
+        self.recomputes += 1
+        return True
+
+    def _compute(self, target_col: int, target_row: int) -> None:
+        count = len(self._edges)
+        distance = self.distance = [math.inf] * count
+        dir_x = self._dir_x = [0.0] * count
+        dir_y = self._dir_y = [0.0] * count
+        edges = self._edges
+
+        if self._passable(target_col, target_row):
+            start = target_row * self.tile_map.cols + target_col
+            distance[start] = 0.0
+            heap = [(0.0, start)]
+            pop = heapq.heappop
+            push = heapq.heappush
+            while heap:
+                dist, k = pop(heap)
+                if dist > distance[k]:
+                    continue
+                for nk, cost, _, _ in edges[k]:
+                    cost += dist
+                    if cost < distance[nk]:
+                        distance[nk] = cost
+                        push(heap, (cost, nk))
+
+        for k in range(count):
+            best = distance[k]
+            if best == math.inf or best == 0.0:
+                continue
+            for nk, _, ux, uy in edges[k]:
+                d = distance[nk]
+                if d < best:
+                    best = d
+                    dir_x[k] = ux
+                    dir_y[k] = uy
+        self.dir_x[:] = dir_x
+        self.dir_y[:] = dir_y
+
+    def direction_at(self, x: float, y: float) -> tuple[float, float]:
+        # (0, 0) on the target tile, off the map or where the target is
+        # unreachable; callers then steer straight at the target
+        tm = self.tile_map
+        col, row = tm.tile_of(x, y)
+        if 0 <= col < tm.cols and 0 <= row < tm.rows:
+            k = row * tm.cols + col
+            return self._dir_x[k], self._dir_y[k]
+        return 0.0, 0.0
+
+    def directions(
+        self, xs: np.ndarray, ys: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        index, inside = self.tile_map.tile_indices(xs, ys)
+        return (
+            np.where(inside, self.dir_x[index], 0.0),
+            np.where(inside, self.dir_y[index], 0.0),
+        )